@@ -0,0 +1,117 @@
+"""
+Match many job requisitions in one pass. Queries are read from a JSONL file (one object per
+line with "query" and optional "id" and "limit"), a CSV file (columns "query" and optional
+"id" and "limit") or a text file (one query per line). Retrieval is batched across all
+queries, LLM requests share one client's concurrency limits, and one results file is written
+per query.
+
+Run from the project root:
+    python batch_search.py requisitions.jsonl [--output-dir output/batch] [--format xlsx|csv|jsonl]
+                           [--no-expand] [--no-summaries] [--limit 5]
+"""
+import os
+import re
+import json
+import time
+import argparse
+import datetime
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+
+def read_queries(path: str) -> list:
+    """
+    Read batch queries as dicts with "query" and optional "id" and "limit".
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    elif ext == ".csv":
+        import pandas as pd
+        entries = pd.read_csv(path, dtype=str, keep_default_na=False).to_dict("records")
+    else:
+        with open(path, encoding="utf-8") as f:
+            entries = [{"query": line.strip()} for line in f if line.strip()]
+    queries = []
+    for entry in entries:
+        if not str(entry.get("query", "")).strip():
+            continue
+        limit = entry.get("limit")
+        queries.append({
+            "id": str(entry.get("id") or len(queries) + 1),
+            "query": str(entry["query"]).strip(),
+            "limit": int(limit) if limit not in (None, "") else None,
+        })
+    return queries
+
+
+def result_filename(index: int, query_id: str, fmt: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_-]+", "_", query_id).strip("_")[:60] or "query"
+    return f"{index:03d}_{slug}.{fmt}"
+
+
+def write_results(path: str, result: dict, fmt: str):
+    """
+    Write one query's ranked candidates, in the same columns as main.py's Excel output.
+    """
+    import pandas as pd
+    df = pd.DataFrame(result["candidates"])
+    if fmt == "xlsx":
+        df.to_excel(path, index=False)
+    elif fmt == "csv":
+        df.to_csv(path, index=False)
+    else:
+        df.to_json(path, orient="records", lines=True, force_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL, CSV or text file of queries")
+    parser.add_argument("--output-dir", help="Default: output/batch_<timestamp>")
+    parser.add_argument("--format", choices=("xlsx", "csv", "jsonl"), default="xlsx")
+    parser.add_argument("--limit", type=int, help="Resumes per query (default: per-query limit or the expanded query's)")
+    parser.add_argument("--no-expand", action="store_true", help="Skip LLM query expansion")
+    parser.add_argument("--no-summaries", action="store_true", help="Skip LLM summaries")
+    args = parser.parse_args()
+
+    # Imported after argument parsing so --help is instant and the extraction workers, which
+    # re-import this module, do not load the search stack.
+    from utils.config import load_config
+    from utils.logger import setup_logger
+    from utils.search_pipeline import SearchPipeline
+
+    logger = setup_logger()
+    config = load_config()
+    queries = read_queries(args.input)
+    if not queries:
+        print(f"No queries found in {args.input}")
+        return
+    output_dir = args.output_dir or os.path.join(
+        "output", f"batch_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    pipeline = SearchPipeline(config, logger)
+    start = time.perf_counter()
+    try:
+        batch = pipeline.search_batch(
+            [entry["query"] for entry in queries],
+            expand=not args.no_expand,
+            summarize=not args.no_summaries,
+            limit=[args.limit or entry["limit"] for entry in queries],
+        )
+    finally:
+        pipeline.close()
+    elapsed = time.perf_counter() - start
+
+    for index, (entry, result) in enumerate(zip(queries, batch["results"]), start=1):
+        path = os.path.join(output_dir, result_filename(index, entry["id"], args.format))
+        write_results(path, result, args.format)
+        logger.info(f"Results for query {entry['id']} saved to {path}")
+    logger.info(f"Batch timings (ms): {batch['timings_ms']}")
+    print(f"{len(queries)} queries in {elapsed:.2f}s ({elapsed / len(queries) * 1000:.0f} ms/query); "
+          f"results in {output_dir}")
+
+
+if __name__ == "__main__":
+    main()
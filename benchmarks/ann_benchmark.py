@@ -0,0 +1,102 @@
+"""
+Benchmark the FAISS index types supported by VectorIndex.
+
+For each index type, reports build/train time, memory (serialized index size), queries
+per second and recall@k against the exact flat index, sweeping nprobe (IVF), efSearch
+(HNSW) and the number of PQ sub-quantizers (ivf_pq).
+
+Vectors are synthetic, clustered and unit-normalised like sentence embeddings, unless
+--from-index points at an existing faiss.index whose vectors are used instead.
+
+Run from the project root:
+    python -m benchmarks.ann_benchmark --vectors 200000 --queries 1000 --k 10
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from vectordb.vector_index import (INDEX_TYPES, DEFAULT_INDEX_PARAMS, build_faiss_index, search_parameters,
+                                   stored_vector_ids)
+
+
+def synthetic_vectors(n: int, dimension: int, clusters: int = 256, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype('float32')
+    assignment = rng.integers(0, clusters, size=n)
+    vectors = centers[assignment] + 0.6 * rng.standard_normal((n, dimension)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(row_found) & set(row_truth)) for row_found, row_truth in zip(found, truth))
+    return hits / truth.size
+
+
+def timed_search(index, queries: np.ndarray, k: int, params=None):
+    start = time.perf_counter()
+    _, found = index.search(queries, k, params=params)
+    return found, len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--pq-m", type=int, nargs="+", default=[DEFAULT_INDEX_PARAMS["pq_m"]],
+                        help="PQ sub-quantizers for ivf_pq (each must divide the dimension)")
+    parser.add_argument("--from-index", help="Use the vectors stored in an existing faiss.index (flat or HNSW; "
+                                             "PQ vectors are lossy)")
+    args = parser.parse_args()
+
+    if args.from_index:
+        source = faiss.read_index(args.from_index)
+        data = source.reconstruct_batch(stored_vector_ids(source))
+        rng = np.random.default_rng(1)
+        picked = rng.choice(len(data), size=min(args.queries, len(data) // 10), replace=False)
+        queries = data[picked]
+        data = np.delete(data, picked, axis=0)
+    else:
+        data = synthetic_vectors(args.vectors, args.dimension)
+        queries = synthetic_vectors(args.queries, args.dimension, seed=1)
+    dimension = data.shape[1]
+
+    flat = build_faiss_index(dimension, "flat")
+    flat.add(data)
+    truth, _ = timed_search(flat, queries, args.k)
+
+    print(f"{len(data)} vectors, dim={dimension}, {len(queries)} queries, recall@{args.k} vs flat")
+    print(f"{'index':<14} {'knob':<14} {'build s':>8} {'MB':>9} {'B/vec':>7} {'QPS':>9} {'recall':>7}")
+    builds = [(index_type, {"pq_m": m} if index_type == "ivf_pq" else {})
+              for index_type in args.types for m in (args.pq_m if index_type == "ivf_pq" else [None])]
+    for index_type, params in builds:
+        start = time.perf_counter()
+        index = build_faiss_index(dimension, index_type, len(data), **params)
+        if not index.is_trained:
+            index.train(data)
+        index.add(data)
+        build_time = time.perf_counter() - start
+        size = faiss.serialize_index(index).nbytes
+        label = f"{index_type} m={params['pq_m']}" if params else index_type
+
+        if index_type.startswith("ivf"):
+            knobs = [(f"nprobe={n}", search_parameters(index, nprobe=n)) for n in args.nprobe]
+        elif index_type == "hnsw":
+            knobs = [(f"efSearch={ef}", search_parameters(index, ef_search=ef)) for ef in args.ef_search]
+        else:
+            knobs = [("-", None)]
+
+        for knob, search_params in knobs:
+            found, qps = timed_search(index, queries, args.k, search_params)
+            print(f"{label:<14} {knob:<14} {build_time:8.1f} {size / 1e6:9.1f} {size / len(data):7.0f} "
+                  f"{qps:9.0f} {recall_at_k(found, truth):7.3f}")
+
+if __name__ == "__main__":
+    main()
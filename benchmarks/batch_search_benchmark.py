@@ -0,0 +1,58 @@
+"""
+Compare running N queries one at a time through SearchPipeline.search with one
+SearchPipeline.search_batch call over the same queries.
+
+LLM calls (query expansion and summaries) go to benchmarks.llm_stub_server started
+in-process with a fixed latency, and the response cache is disabled so every request
+reaches it; --no-llm measures retrieval and reranking only. Uses the database and indices
+of the current directory, so run it from the project root (or a directory with an
+indexed corpus):
+    python -m benchmarks.batch_search_benchmark --queries 40 --latency 0.3
+"""
+import time
+import argparse
+
+from benchmarks.llm_stub_server import start_in_thread
+from benchmarks.load_test import DEFAULT_QUERIES
+from utils.config import load_config
+from utils.logger import setup_logger
+from utils.search_pipeline import SearchPipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--no-llm", action="store_true", help="Skip query expansion and summaries")
+    args = parser.parse_args()
+
+    queries = [f"{DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]} (requisition {i})" for i in range(args.queries)]
+    use_llm = not args.no_llm
+    config = load_config()
+    if use_llm:
+        server, base_url = start_in_thread(latency=args.latency)
+        config = {**config, "openai_base_url": base_url, "openai_api_key": "stub-key", "llm_cache": {"enabled": False}}
+
+    pipeline = SearchPipeline(config, setup_logger())
+    pipeline.search(queries[0], expand=False, summarize=False, limit=args.limit)  # warm up the models
+
+    start = time.perf_counter()
+    for query in queries:
+        pipeline.search(query, expand=use_llm, summarize=use_llm, limit=args.limit)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = pipeline.search_batch(queries, expand=use_llm, summarize=use_llm, limit=args.limit)
+    batched = time.perf_counter() - start
+
+    print(f"{args.queries} queries{'' if use_llm else ' (no LLM)'}, stub latency {args.latency}s")
+    print(f"sequential  {sequential:7.2f}s  {sequential / args.queries * 1000:8.1f} ms/query")
+    print(f"batch       {batched:7.2f}s  {batched / args.queries * 1000:8.1f} ms/query  "
+          f"({sequential / batched:.1f}x throughput)")
+    print(f"batch stage timings (ms): {batch['timings_ms']}")
+    pipeline.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark the native BM25 scorer in vectordb/precomputed_filter.py against rank_bm25.
+
+Builds a synthetic Zipf-distributed corpus, reports how far LexicalIndex.bm25_scores is from
+BM25Okapi.get_scores (fed the same analyzed tokens) and how much their top-k selections overlap,
+then reports per-query latency for both. Parity itself is tested in tests/test_bm25.py.
+
+Run from the project root:
+    python -m benchmarks.bm25_benchmark --docs 100000
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from vectordb.precomputed_filter import LexicalIndex, top_k_indices
+
+
+def make_corpus(n_docs: int, vocab_size: int, doc_length: int, seed: int = 0) -> list:
+    """
+    Generate documents whose term frequencies follow a Zipf distribution.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"term{i}" for i in range(vocab_size)])
+    docs = []
+    for _ in range(n_docs):
+        term_ids = np.minimum(rng.zipf(1.3, size=rng.integers(1, doc_length * 2)), vocab_size) - 1
+        docs.append(" ".join(vocab[term_ids]))
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--vocab", type=int, default=50000)
+    parser.add_argument("--doc-length", type=int, default=120)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--top-percentage", type=float, default=0.1)
+    args = parser.parse_args()
+
+    docs = make_corpus(args.docs, args.vocab, args.doc_length)
+    rng = np.random.default_rng(1)
+    queries = [" ".join(f"term{i}" for i in rng.integers(0, 2000, size=8)) for _ in range(args.queries)]
+    top_k = max(1, int(args.docs * args.top_percentage))
+
+    start = time.perf_counter()
+    lexical_index = LexicalIndex()
+    lexical_index.add_documents([str(i) for i in range(len(docs))], docs)
+    lexical_index.terms.bm25_weights(1.5, 0.75, 0.25)
+    build_native = time.perf_counter() - start
+
+    start = time.perf_counter()
+    analyzer = lexical_index.analyzer
+    bm25 = BM25Okapi([analyzer(doc) for doc in docs])
+    build_reference = time.perf_counter() - start
+
+    native_time = reference_time = 0.0
+    max_diff = 0.0
+    min_overlap = 1.0
+    for query in queries:
+        start = time.perf_counter()
+        native = lexical_index.bm25_scores(query)
+        native_top = top_k_indices(native, top_k)
+        native_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        reference = bm25.get_scores(analyzer(query))
+        reference_top = np.argsort(reference)[::-1][:top_k]
+        reference_time += time.perf_counter() - start
+
+        max_diff = max(max_diff, float(np.abs(native - reference).max()))
+        # Ties at the cut-off may be broken differently; compare the selected score values
+        min_overlap = min(min_overlap, len(set(native_top) & set(reference_top)) / top_k)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.info(f"docs={args.docs} queries={args.queries} top_k={top_k}")
+    logging.info(f"parity: max |score diff| = {max_diff:.3e}, min top-k overlap = {min_overlap:.3f}")
+    logging.info(f"build:  native {build_native:.2f} s, rank_bm25 {build_reference:.2f} s")
+    logging.info(f"query:  native {1000 * native_time / len(queries):.2f} ms, "
+                 f"rank_bm25 {1000 * reference_time / len(queries):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
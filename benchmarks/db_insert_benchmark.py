@@ -0,0 +1,82 @@
+"""
+Benchmark candidate inserts into the SQLite database.
+
+Compares the per-row path (candidate_exists + insert_candidate, one commit per row)
+against insert_candidates_bulk, with and without the tuned connection pragmas.
+
+Run from the project root:
+    python -m benchmarks.db_insert_benchmark --rows 100000
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import time
+
+from database.db_manager import DBManager
+
+
+def make_candidates(rows: int) -> list:
+    """
+    Build synthetic candidate rows shaped like CSV resumes.
+    """
+    candidates = []
+    for i in range(rows):
+        resume_text = f"skills: python, sql, skill{i % 500}; positions: engineer {i}; responsibilities: task {i}"
+        candidates.append({
+            "CandidateID": hashlib.sha256(resume_text.encode('utf-8')).hexdigest(),
+            "Name": "",
+            "ResumeText": resume_text
+        })
+    return candidates
+
+
+def run_per_row(db_path: str, candidates: list) -> float:
+    db_manager = DBManager(db_path)
+    start = time.perf_counter()
+    for candidate in candidates:
+        if not db_manager.candidate_exists(candidate["CandidateID"]):
+            db_manager.insert_candidate(candidate)
+    elapsed = time.perf_counter() - start
+    db_manager.conn.close()
+    return elapsed
+
+
+def run_bulk(db_path: str, candidates: list, tuned: bool, chunk: int = 10000) -> float:
+    db_manager = DBManager(db_path, tuned=tuned)
+    start = time.perf_counter()
+    for i in range(0, len(candidates), chunk):
+        batch = candidates[i:i + chunk]
+        known_ids = db_manager.existing_ids(c["CandidateID"] for c in batch)
+        db_manager.insert_candidates_bulk([c for c in batch if c["CandidateID"] not in known_ids])
+    elapsed = time.perf_counter() - start
+    db_manager.conn.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--per-row-rows", type=int, default=None,
+                        help="Rows for the per-row baseline (defaults to --rows; it is slow on spinning disks)")
+    args = parser.parse_args()
+
+    candidates = make_candidates(args.rows)
+    per_row_candidates = candidates[:args.per_row_rows or args.rows]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = [
+            ("per-row insert_candidate", len(per_row_candidates),
+             run_per_row(os.path.join(tmp, "per_row.db"), per_row_candidates)),
+            ("insert_candidates_bulk", len(candidates),
+             run_bulk(os.path.join(tmp, "bulk.db"), candidates, tuned=False)),
+            ("insert_candidates_bulk + tuned pragmas", len(candidates),
+             run_bulk(os.path.join(tmp, "bulk_tuned.db"), candidates, tuned=True)),
+        ]
+
+    for name, rows, elapsed in results:
+        print(f"{name:<42} {rows:>8} rows  {elapsed:8.2f} s  {rows / elapsed:>10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark the embedding encoder backends: PyTorch (fp32), ONNX Runtime fp32 and ONNX
+Runtime with int8 dynamically quantised weights.
+
+For each backend, reports encoding throughput (docs/sec) and agreement with the PyTorch
+embeddings: mean and minimum cosine similarity per document, and the overlap of each
+document's top-k nearest neighbours (by inner product) within the sample.
+
+Texts are the first --docs resumes of the database in the current directory, or synthetic
+resume-like texts if it is empty (or with --synthetic). The ONNX model is exported on first
+use to onnx_models/ (needs PyTorch once; see vectordb.encoders.export_onnx).
+
+Run from the project root:
+    python -m benchmarks.encoder_benchmark --docs 2000 --threads 4 --batch-size 64
+"""
+import time
+import argparse
+
+import numpy as np
+
+from database.db_manager import DBManager
+from vectordb.encoders import DEFAULT_MODEL, SentenceTransformerEncoder, OnnxEncoder
+
+SKILLS = ["Python", "Java", "SQL", "AWS", "Kubernetes", "React", "machine learning", "Spark",
+          "project management", "accounting", "nursing", "sales", "Excel", "C++", "data analysis"]
+
+
+def synthetic_texts(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(n):
+        skills = rng.choice(SKILLS, size=rng.integers(3, 8), replace=False)
+        sentences = [f"{rng.integers(1, 15)} years of experience with {skill}." for skill in skills]
+        texts.append(" ".join(sentences * int(rng.integers(1, 6))))
+    return texts
+
+
+def timed_encode(encoder, texts: list, batch_size: int):
+    encoder.encode(texts[:batch_size], batch_size=batch_size)  # warm up
+    start = time.perf_counter()
+    embeddings = encoder.encode(texts, batch_size=batch_size)
+    return embeddings, len(texts) / (time.perf_counter() - start)
+
+
+def unit_rows(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+
+def neighbour_overlap(embeddings: np.ndarray, reference: np.ndarray, k: int) -> float:
+    """
+    Mean fraction of each document's top-k neighbours (excluding itself) shared with the reference.
+    """
+    def neighbours(vectors):
+        similarities = vectors @ vectors.T
+        np.fill_diagonal(similarities, -np.inf)
+        return np.argsort(-similarities, axis=1)[:, :k]
+    found, truth = neighbours(unit_rows(embeddings)), neighbours(unit_rows(reference))
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, truth)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--threads", type=int, help="Intra-op CPU threads for every backend")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--k", type=int, default=10, help="Neighbours compared per document")
+    parser.add_argument("--synthetic", action="store_true", help="Use synthetic texts even if the database has resumes")
+    args = parser.parse_args()
+
+    texts = [] if args.synthetic else [text for _, text in DBManager().get_all_candidates()[:args.docs]]
+    source = "database"
+    if not texts:
+        texts, source = synthetic_texts(args.docs), "synthetic"
+    print(f"{len(texts)} {source} texts, batch size {args.batch_size}, threads {args.threads or 'default'}")
+
+    backends = [
+        ("torch fp32", lambda: SentenceTransformerEncoder(args.model, threads=args.threads)),
+        ("onnx fp32", lambda: OnnxEncoder(args.model, threads=args.threads)),
+        ("onnx int8", lambda: OnnxEncoder(args.model, quantize=True, threads=args.threads)),
+    ]
+    reference = None
+    print(f"{'backend':<12}{'docs/sec':>10}{'speed-up':>10}{'mean cos':>10}{'min cos':>10}{f'top-{args.k}':>10}")
+    for name, build in backends:
+        try:
+            encoder = build()
+        except ImportError as e:
+            print(f"{name:<12}skipped: {e}")
+            continue
+        embeddings, docs_per_sec = timed_encode(encoder, texts, args.batch_size)
+        if reference is None:
+            reference, reference_rate = embeddings, docs_per_sec
+        cosines = np.sum(unit_rows(embeddings) * unit_rows(reference), axis=1)
+        print(f"{name:<12}{docs_per_sec:>10.1f}{docs_per_sec / reference_rate:>9.2f}x"
+              f"{cosines.mean():>10.4f}{cosines.min():>10.4f}{neighbour_overlap(embeddings, reference, args.k):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Compare ways of generating candidate summaries against the local stub server.
+
+Starts benchmarks.llm_stub_server in-process with a fixed latency and optional 429 injection,
+then summarises N synthetic candidates (a) one request at a time with send_openai_request,
+(b) one request per candidate fanned out with AsyncLLMClient + asyncio.gather, and
+(c) fanned out with candidates packed into batched requests. Reports wall time, requests
+and prompt tokens seen by the server. The response cache is not used, so every request
+reaches the server.
+
+Run from the project root:
+    python -m benchmarks.llm_concurrency_benchmark --candidates 50 --latency 0.5 --rate-limit-every 20
+"""
+import time
+import asyncio
+import argparse
+
+from benchmarks.llm_stub_server import start_in_thread
+from utils.llm_client import send_openai_request
+from utils.async_llm_client import AsyncLLMClient
+from utils.prompt_loader import load_prompt
+from utils.llm_utils import summary_prompt_content, generate_summaries_async
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--token-budget", type=int, default=12000)
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url = start_in_thread(latency=args.latency, rate_limit_every=args.rate_limit_every)
+    state = server.state
+    query = "Senior data scientist with Python and machine learning"
+    candidates = [
+        {"CandidateID": f"C{i:04d}", "Name": f"Candidate {i}",
+         "ResumeText": f"Candidate {i}: Python, SQL, machine learning. " * 20}
+        for i in range(args.candidates)
+    ]
+
+    def report(label, start):
+        elapsed = time.perf_counter() - start
+        print(f"{label:<12} {elapsed:7.2f}s {state.requests:6d} requests {state.prompt_tokens:9d} prompt tokens "
+              f"({elapsed / args.latency:.1f} round trips)")
+        state.requests = state.prompt_tokens = 0
+
+    print(f"{args.candidates} candidates, {args.latency}s stub latency")
+    if not args.skip_sequential:
+        prompt = load_prompt("generate_summary")
+        start = time.perf_counter()
+        for candidate in candidates:
+            send_openai_request(summary_prompt_content(candidate["ResumeText"], query), prompt, "stub-key",
+                                base_url=base_url)
+        report("sequential", start)
+
+    async def fan_out(batching):
+        async with AsyncLLMClient("stub-key", base_url=base_url, max_concurrency=args.max_concurrency,
+                                  backoff_base=0.05) as client:
+            await generate_summaries_async([dict(c) for c in candidates], query, client=client, batching=batching)
+
+    start = time.perf_counter()
+    asyncio.run(fan_out({"enabled": False}))
+    report("asyncio", start)
+
+    start = time.perf_counter()
+    asyncio.run(fan_out({"enabled": True, "token_budget": args.token_budget, "max_candidates": args.batch_size}))
+    report("batched", start)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Local OpenAI-compatible stub server for exercising the LLM code paths without spending tokens.
+
+Serves POST /v1/chat/completions with a fixed latency (plus optional jitter) and can inject
+429 responses (with Retry-After) and 500 errors. Replies are shaped like the prompts in
+prompts/ expect: query expansions, re-rankings and per-candidate summaries.
+
+Point the application at it with "openai_base_url": "http://127.0.0.1:8089/v1" in config.json.
+
+Run from the project root:
+    python -m benchmarks.llm_stub_server --port 8089 --latency 0.5 --rate-limit-every 10
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_reply(message: str) -> dict:
+    """
+    Build a plausible JSON reply for a prompt + data message.
+    """
+    if '"expanded_query"' in message:
+        query = message.rsplit("Here is the data:\n", 1)[-1].strip()
+        return {"expanded_query": query, "total_resume": 5}
+    if "Recruiter Query:" in message:
+        candidate_ids = re.findall(r"Candidate ID: (\S+)", message) or ["stub"]
+        return {"ranked_candidates": [
+            {"candidate_id": cid, "summary": f"Stub summary for candidate {cid}."} for cid in candidate_ids
+        ]}
+    if "Re-Ranking" in message:
+        return {"ranked_candidates": re.findall(r'"CandidateID": "([^"]+)"', message.rsplit("Here is the data:\n", 1)[-1])}
+    return {"content": "stub response"}
+
+
+class StubState:
+    def __init__(self, latency=0.0, jitter=0.0, rate_limit_every=0, retry_after=0.1, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.in_flight = 0
+        self.max_in_flight = 0  # most requests handled at once, to check client concurrency limits
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def _send_json(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        state = self.server.state
+        with state.lock:
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            self._handle_post(state)
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+    def _handle_post(self, state):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        with state.lock:
+            state.requests += 1
+            count = state.requests
+            fail = state.error_rate and state.random.random() < state.error_rate
+            delay = state.latency + (state.random.uniform(0, state.jitter) if state.jitter else 0)
+        if state.rate_limit_every and count % state.rate_limit_every == 0:
+            with state.lock:
+                state.rate_limited += 1
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                            {"Retry-After": str(state.retry_after)})
+            return
+        time.sleep(delay)
+        if fail:
+            with state.lock:
+                state.errors += 1
+            self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+            return
+
+        message = "\n".join(m.get("content", "") for m in request.get("messages", []))
+        content = json.dumps(stub_reply(message))
+        prompt_tokens = len(message) // 4
+        completion_tokens = len(content) // 4
+        with state.lock:
+            state.prompt_tokens += prompt_tokens
+        self._send_json(200, {
+            "id": f"chatcmpl-stub-{count}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default listen backlog of 5 refuses bursts of concurrent clients
+
+
+def make_server(host="127.0.0.1", port=0, **options) -> StubServer:
+    """
+    Create a stub server (port=0 picks a free port); options are passed to StubState.
+    """
+    server = StubServer((host, port), StubHandler)
+    server.state = StubState(**options)
+    return server
+
+
+def start_in_thread(**options):
+    """
+    Start a stub server on a background thread. Returns (server, base_url).
+    """
+    server = make_server(**options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with a 429")
+    parser.add_argument("--retry-after", type=float, default=0.1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with a 500")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, latency=args.latency, jitter=args.jitter,
+                         rate_limit_every=args.rate_limit_every, retry_after=args.retry_after,
+                         error_rate=args.error_rate)
+    print(f"Stub OpenAI server listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Load-test the query server (server.py): send search requests from several concurrent
+clients and report throughput and latency percentiles.
+
+By default queries skip the LLM stages (expand=false, summarize=false) so the numbers
+reflect retrieval and reranking; pass --with-llm to include them.
+
+Run from the project root with the server already running:
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --requests 500 --concurrency 8
+"""
+import json
+import time
+import argparse
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+DEFAULT_QUERIES = [
+    "Senior data scientist with Python and machine learning",
+    "Java backend developer with Spring Boot and microservices",
+    "DevOps engineer with Kubernetes, Terraform and AWS",
+    "Frontend engineer React TypeScript",
+    "Data analyst SQL Tableau Power BI",
+    "Machine learning engineer deep learning PyTorch computer vision",
+    "Project manager agile scrum stakeholder management",
+    "Accountant with audit and financial reporting experience",
+]
+
+
+def post_json(url: str, payload: dict, timeout: float) -> dict:
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--queries", help="File with one query per line (default: built-in set)")
+    parser.add_argument("--with-llm", action="store_true", help="Expand queries and generate summaries")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    search_url = args.url.rstrip("/") + "/search"
+
+    def one(i: int):
+        payload = {"query": queries[i % len(queries)], "expand": args.with_llm, "summarize": args.with_llm}
+        start = time.perf_counter()
+        try:
+            post_json(search_url, payload, args.timeout)
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    for i in range(args.warmup):
+        one(i)
+
+    latencies, failures = [], 0
+    lock = threading.Lock()
+
+    def record(i: int):
+        nonlocal failures
+        latency, ok = one(i)
+        with lock:
+            if ok:
+                latencies.append(latency)
+            else:
+                failures += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(record, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {failures} failed, {elapsed:.2f}s")
+    print(f"QPS: {len(latencies) / elapsed:.1f}")
+    if latencies:
+        ms = np.array(latencies) * 1000
+        print(f"latency ms: p50 {np.percentile(ms, 50):.1f}  p90 {np.percentile(ms, 90):.1f}  "
+              f"p99 {np.percentile(ms, 99):.1f}  max {ms.max():.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""
+End-to-end benchmark that needs no real corpus and no OpenAI access. It runs these steps:
+
+1. Generate (or reuse) a synthetic corpus (see benchmarks/synthetic_corpus.py).
+2. Ingest it into a fresh working directory.
+3. Run the benchmark queries through SearchPipeline.
+4. Save the results as JSON.
+
+LLM requests (query expansion, summaries, the optional LLM reranker) go to the local
+stub server (benchmarks/llm_stub_server.py). It replies deterministically after
+--llm-latency seconds, and the response cache is disabled so every request reaches it.
+The pipeline gets its whole configuration from this script, so config.json is not needed.
+
+Measured:
+  ingestion      CSV rows/sec through ingest (parse, embed, write, refresh lexical indices)
+  query latency  mean/p50/p95 ms per stage (expand, bm25, tfidf, vector_search, fusion,
+                 fetch, rerank, summaries, total)
+  recall         recall@k of each query's planted target resumes
+  memory         peak RSS (high-water mark) after ingestion and after the queries
+  llm            requests served by the stub
+
+--embeddings hashing swaps the sentence-transformers model for a deterministic hashed
+bag-of-words encoder. At 100k-1M rows, ingestion then measures the pipeline rather than
+the model. With --reranker none or llm as well, PyTorch is not needed at all.
+
+--compare checks the run against an earlier results file. It prints each metric's relative
+change and exits with status 1 if any metric regressed by more than --tolerance.
+
+Run from the project root:
+    python -m benchmarks.offline_benchmark --rows 10k --queries 20 --llm-latency 0.05
+    python -m benchmarks.offline_benchmark --rows 1M --embeddings hashing --reranker none \\
+        --compare output/benchmarks/offline_1000000_<previous>.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import shutil
+import argparse
+import datetime
+import tempfile
+import subprocess
+
+import numpy as np
+
+from benchmarks.synthetic_corpus import parse_rows, generate_corpus, load_queries
+
+TOKEN_RE = re.compile(r"[a-z0-9#+]+")
+
+# Metrics where a larger value is better; every other compared metric is better when smaller
+HIGHER_IS_BETTER = ("rows_per_sec", "recall")
+
+
+class HashingEncoder:
+    """
+    Deterministic stand-in for the embedding model: signed hashed bag of words, L2-normalised.
+    Similar texts still get similar vectors, so recall stays meaningful, at a tiny fraction
+    of the model's cost.
+    """
+    backend = "hashing"
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+        self.model_name = f"hashing-{dimension}"
+        self.cache_key = self.model_name
+
+    def encode(self, texts: list, batch_size: int = 64) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dimension), dtype='float32')
+        for row, text in enumerate(texts):
+            hashes = np.fromiter((zlib.crc32(token.encode("utf-8")) for token in TOKEN_RE.findall(text.lower())),
+                                 dtype=np.uint32)
+            np.add.at(embeddings[row], hashes % self.dimension, np.where(hashes >> 31, 1.0, -1.0))
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+
+def peak_rss_mb() -> float:
+    """
+    The process's peak resident set size so far, in MB (None where unavailable).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def code_version() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latency_summary(samples: list) -> dict:
+    values = np.array(samples, dtype=np.float64)
+    return {"mean": round(float(values.mean()), 2), "p50": round(float(np.percentile(values, 50)), 2),
+            "p95": round(float(np.percentile(values, 95)), 2)}
+
+
+def flatten_metrics(results: dict) -> dict:
+    """
+    The comparable numbers of a results file as {"ingestion.rows_per_sec": ..., ...}.
+    """
+    metrics = {"ingestion.rows_per_sec": results["ingestion"]["rows_per_sec"],
+               "recall": results["recall"]["mean"]}
+    for stage, summary in results["query_latency_ms"].items():
+        for statistic in ("p50", "p95"):
+            metrics[f"query_latency_ms.{stage}.{statistic}"] = summary[statistic]
+    for phase, value in results["peak_rss_mb"].items():
+        if value is not None:
+            metrics[f"peak_rss_mb.{phase}"] = value
+    return metrics
+
+
+def compare_results(previous: dict, current: dict, tolerance: float) -> list:
+    """
+    Print the relative change of every metric present in both runs and return the names
+    of those that got worse by more than tolerance (a fraction).
+    """
+    before, after = flatten_metrics(previous), flatten_metrics(current)
+    regressions = []
+    print(f"\nCompared with {previous.get('version')} ({previous.get('timestamp')}):")
+    changed = {key: (value, current["params"].get(key)) for key, value in previous.get("params", {}).items()
+               if current["params"].get(key) != value}
+    if changed:
+        print(f"  Note: parameters differ (previous, current): {changed}")
+    for name in sorted(set(before) & set(after)):
+        old, new = before[name], after[name]
+        change = (new - old) / old if old else 0.0
+        worse = -change if any(key in name for key in HIGHER_IS_BETTER) else change
+        flag = ""
+        # Sub-millisecond stages are dominated by timer noise
+        if worse > tolerance and not (name.startswith("query_latency_ms") and max(old, new) < 1.0):
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"  {name:<40}{old:>12.2f}{new:>12.2f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, default="10k", help="10k, 100k, 1M or a number of rows")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--targets", type=int, default=5, help="Planted target resumes per query")
+    parser.add_argument("--k", type=int, default=10, help="Results per query (recall@k)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", help="Corpus CSV, generated if missing "
+                                         "(default: output/benchmarks/corpus_<rows>_seed<seed>.csv)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Stub LLM seconds per response")
+    parser.add_argument("--no-llm", action="store_true", help="Skip query expansion and summaries")
+    parser.add_argument("--embeddings", choices=("model", "hashing"), default="model",
+                        help="Configured embedding model, or the hashed bag-of-words stand-in")
+    parser.add_argument("--reranker", choices=("cross_encoder", "llm", "none"), default="cross_encoder")
+    parser.add_argument("--output", help="Results JSON (default: output/benchmarks/offline_<rows>_<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative regression (default 0.10)")
+    parser.add_argument("--keep-workdir", action="store_true", help="Keep the working directory with the built indices")
+    args = parser.parse_args(argv)
+
+    project_root = os.getcwd()
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    corpus = os.path.abspath(args.corpus or os.path.join(
+        "output", "benchmarks", f"corpus_{args.rows}_seed{args.seed}.csv"))
+    output = os.path.abspath(args.output or os.path.join("output", "benchmarks", f"offline_{args.rows}_{timestamp}.json"))
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+
+    if os.path.exists(corpus) and os.path.exists(corpus + ".queries.json"):
+        queries = load_queries(corpus)
+        print(f"Using corpus {corpus}")
+    else:
+        start = time.perf_counter()
+        queries = generate_corpus(corpus, args.rows, args.queries, args.targets, args.seed)
+        print(f"Generated {args.rows} resumes in {time.perf_counter() - start:.1f}s: {corpus}")
+    queries = queries[:args.queries]
+
+    from utils.logger import setup_logger
+    from utils.search_pipeline import SearchPipeline
+    from benchmarks.llm_stub_server import start_in_thread
+
+    use_llm = not args.no_llm
+    config = {"reranker": {"type": args.reranker}, "tracing": {"enabled": False}, "llm_cache": {"enabled": False}}
+    stub = None
+    if use_llm or args.reranker == "llm":
+        stub, base_url = start_in_thread(latency=args.llm_latency)
+        config.update(openai_base_url=base_url, openai_api_key="stub-key")
+
+    # Every index, cache and log lives in a fresh directory, so each run starts cold
+    workdir = tempfile.mkdtemp(prefix="resume_benchmark_")
+    os.symlink(os.path.join(project_root, "prompts"), os.path.join(workdir, "prompts"))
+    os.chdir(workdir)
+    pipeline = None
+    try:
+        encoder = HashingEncoder() if args.embeddings == "hashing" else None
+        pipeline = SearchPipeline(config, setup_logger(), encoder=encoder)
+        rss_start = peak_rss_mb()
+
+        ingest = pipeline.ingest(csv_path=corpus)
+        ingestion = {"rows": args.rows, "candidates": ingest["candidates"], "seconds": ingest["seconds"],
+                     "rows_per_sec": round(args.rows / ingest["seconds"], 1)}
+        rss_ingested = peak_rss_mb()
+        print(f"Ingested {args.rows} rows in {ingest['seconds']:.1f}s ({ingestion['rows_per_sec']:.0f} rows/sec)")
+
+        # Warm up every stage (models, the LLM client) outside the measured queries
+        pipeline.search(queries[0]["query"], expand=use_llm, summarize=use_llm, limit=args.k)
+        stage_samples, recalls = {}, []
+        for spec in queries:
+            result = pipeline.search(spec["query"], expand=use_llm, summarize=use_llm, limit=args.k)
+            for stage, ms in result["timings_ms"].items():
+                stage_samples.setdefault(stage, []).append(ms)
+            found = {candidate["CandidateID"] for candidate in result["candidates"]}
+            relevant = set(spec["relevant_ids"])
+            recalls.append(len(found & relevant) / len(relevant))
+        rss_queried = peak_rss_mb()
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        os.chdir(project_root)
+        if stub is not None:
+            stub.shutdown()
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "version": code_version(),
+        "timestamp": timestamp,
+        "python": sys.version.split()[0],
+        "params": {"rows": args.rows, "queries": len(queries), "targets": args.targets, "k": args.k,
+                   "seed": args.seed, "llm": use_llm, "llm_latency": args.llm_latency,
+                   "embeddings": args.embeddings, "reranker": args.reranker},
+        "ingestion": ingestion,
+        "query_latency_ms": {stage: latency_summary(samples) for stage, samples in stage_samples.items()},
+        "recall": {"k": args.k, "mean": round(float(np.mean(recalls)), 4), "min": round(float(np.min(recalls)), 4)},
+        "peak_rss_mb": {"start": rss_start, "after_ingest": rss_ingested, "after_queries": rss_queried},
+        "llm_requests": stub.state.requests if stub is not None else 0,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'stage':<16}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for stage, summary in results["query_latency_ms"].items():
+        print(f"{stage:<16}{summary['mean']:>10.2f}{summary['p50']:>10.2f}{summary['p95']:>10.2f}")
+    print(f"recall@{args.k}: mean {results['recall']['mean']:.3f}, min {results['recall']['min']:.3f}")
+    print(f"peak RSS (MB): {results['peak_rss_mb']}; stub LLM requests: {results['llm_requests']}")
+    if args.keep_workdir:
+        print(f"Working directory kept: {workdir}")
+    print(f"Results written to {output}")
+
+    if previous is not None and compare_results(previous, results, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
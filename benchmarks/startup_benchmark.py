@@ -0,0 +1,123 @@
+"""
+Measure the cold-start cost of each entry point.
+
+For every entry point, the module is imported in a fresh interpreter under `python -X
+importtime`. The benchmark reports three things:
+
+- its cumulative import time;
+- the slowest imports it pulls in;
+- which heavy dependencies end up loaded.
+
+It also reports the wall time of `python <script> --help`. The extraction worker row is
+what each document-extraction process imports: utils.extraction_pool, plus the entry point
+it was spawned from, which is re-imported as __mp_main__. Each figure is the median of
+--repeat runs. --json writes the results so cold-start time can be tracked across changes.
+
+Run from the project root:
+    python -m benchmarks.startup_benchmark [--repeat 5] [--top 8] [--json output/startup.json]
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+# (label, module imported, script run with --help or None)
+ENTRY_POINTS = [
+    ("main.py", "main", "main.py"),
+    ("ingest.py", "ingest", "ingest.py"),
+    ("server.py", "server", "server.py"),
+    ("batch_search.py", "batch_search", "batch_search.py"),
+    ("search pipeline", "utils.search_pipeline", None),
+    ("extraction worker", "utils.extraction_pool", None),
+]
+
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "onnxruntime", "faiss", "sklearn",
+                 "pandas", "numpy", "openai", "tiktoken", "PyPDF2", "docx")
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def import_profile(module: str) -> dict:
+    """
+    Import module in a fresh interpreter with -X importtime. Returns three things:
+    - its cumulative import time;
+    - the cumulative time (microseconds) of each top-level module imported on its behalf;
+    - the heavy modules that were loaded.
+    """
+    code = (f"import {module}; import sys, json; "
+            f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, env={**os.environ, "PYTHONWARNINGS": "ignore"})
+    if result.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+    # A module's line follows the lines of everything it imported, so the block of lines
+    # ending with the module's own unindented line is its import tree.
+    block, imports, total = [], {}, None
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, name = int(match[2]), match[3], match[4]
+        if indent:
+            block.append((len(indent), name, cumulative_us))
+            continue
+        if name == module:
+            total = cumulative_us
+            outermost = min((depth for depth, _, _ in block), default=0)
+            imports = {name: us for depth, name, us in block if depth == outermost}
+        block = []
+    return {"total_us": total, "imports": imports, "heavy": json.loads(result.stdout.strip().splitlines()[-1])}
+
+
+def help_seconds(script: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, script, "--help"], capture_output=True, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports listed per entry point")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for label, module, script in ENTRY_POINTS:
+        profiles = [import_profile(module) for _ in range(args.repeat)]
+        import_ms = statistics.median(profile["total_us"] for profile in profiles) / 1000
+        help_ms = statistics.median(help_seconds(script) for _ in range(args.repeat)) * 1000 if script else None
+        # Slowest direct imports by cumulative time, from the last run
+        imports = profiles[-1]["imports"]
+        slowest = sorted(imports, key=lambda name: -imports[name])[:args.top]
+        results.append({
+            "entry_point": label,
+            "module": module,
+            "import_ms": round(import_ms, 1),
+            "help_ms": round(help_ms, 1) if help_ms is not None else None,
+            "heavy_modules": profiles[-1]["heavy"],
+            "slowest_imports_ms": {name: round(imports[name] / 1000, 1) for name in slowest},
+        })
+
+    print(f"{'entry point':<20}{'import ms':>10}{'--help ms':>11}  heavy modules loaded")
+    for result in results:
+        help_ms = f"{result['help_ms']:.1f}" if result["help_ms"] is not None else "-"
+        print(f"{result['entry_point']:<20}{result['import_ms']:>10.1f}{help_ms:>11}  "
+              f"{', '.join(result['heavy_modules']) or '-'}")
+    for result in results:
+        slowest = ", ".join(f"{name} {ms:.1f}" for name, ms in result["slowest_imports_ms"].items())
+        print(f"\n{result['entry_point']} slowest imports (cumulative ms): {slowest}")
+
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Generate a synthetic resume CSV with the columns index_csv_resumes reads (skills, start_dates,
+end_dates, professional_company_names, educational_institution_name, degree_names,
+passing_years, positions, responsibilities), formatted like the real export (list-valued
+columns as "['...', '...']").
+
+Resumes are drawn from a set of role profiles, so queries have many plausible matches.
+For recall measurements each benchmark query also gets a few planted "target" resumes,
+scattered through the file. A target pairs the query's role with two niche skills that no
+other resume mentions. The queries and their targets' CandidateIDs are written next to the
+CSV (<output>.queries.json). The CandidateIDs are computed exactly as ingestion computes
+them, so recall can be checked against search results.
+
+Everything is derived from --seed, so the same arguments always produce the same files.
+The CSV is written in chunks, so memory stays flat at any scale.
+
+Run from the project root:
+    python -m benchmarks.synthetic_corpus --rows 100k --output output/benchmarks/corpus_100k.csv
+"""
+import os
+import json
+import random
+import argparse
+
+import pandas as pd
+
+from utils.resume_indexer import CSV_RESUME_COLUMNS, build_resume_texts, generate_candidate_id
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# role: (position titles, core skills, responsibility templates; {skill} is filled in)
+ROLES = {
+    "Data Scientist": (
+        ["Data Scientist", "Senior Data Scientist", "Machine Learning Scientist"],
+        ["Python", "machine learning", "pandas", "scikit-learn", "statistics", "SQL", "TensorFlow", "A/B testing"],
+        ["Built {skill} models to forecast customer churn.", "Ran experiments and analysis with {skill}.",
+         "Presented {skill} findings to product stakeholders."],
+    ),
+    "Backend Engineer": (
+        ["Backend Developer", "Java Developer", "Software Engineer"],
+        ["Java", "Spring Boot", "microservices", "REST APIs", "PostgreSQL", "Kafka", "Docker", "Redis"],
+        ["Designed {skill} services handling high request volumes.", "Migrated legacy modules to {skill}.",
+         "Improved latency of {skill} endpoints."],
+    ),
+    "DevOps Engineer": (
+        ["DevOps Engineer", "Site Reliability Engineer", "Cloud Engineer"],
+        ["Kubernetes", "Terraform", "AWS", "CI/CD", "Linux", "Ansible", "Prometheus", "Docker"],
+        ["Automated infrastructure provisioning with {skill}.", "Ran production clusters on {skill}.",
+         "Set up monitoring and alerting using {skill}."],
+    ),
+    "Frontend Engineer": (
+        ["Frontend Developer", "UI Engineer", "Web Developer"],
+        ["React", "TypeScript", "JavaScript", "CSS", "HTML", "Redux", "Next.js", "accessibility"],
+        ["Built responsive interfaces in {skill}.", "Led the move of the web app to {skill}.",
+         "Improved page load times with {skill}."],
+    ),
+    "Data Analyst": (
+        ["Data Analyst", "Business Intelligence Analyst", "Reporting Analyst"],
+        ["SQL", "Tableau", "Power BI", "Excel", "dashboards", "data visualization", "Python", "ETL"],
+        ["Maintained {skill} dashboards for the sales team.", "Wrote {skill} reports for management.",
+         "Cleaned and reconciled data using {skill}."],
+    ),
+    "Project Manager": (
+        ["Project Manager", "Scrum Master", "Program Manager"],
+        ["agile", "scrum", "stakeholder management", "Jira", "budgeting", "risk management", "roadmaps"],
+        ["Coordinated cross-functional teams using {skill}.", "Delivered projects on time through {skill}.",
+         "Introduced {skill} practices across departments."],
+    ),
+    "Accountant": (
+        ["Accountant", "Senior Accountant", "Financial Analyst"],
+        ["financial reporting", "audit", "IFRS", "GAAP", "tax", "reconciliation", "SAP", "Excel"],
+        ["Prepared monthly {skill} for the finance department.", "Supported the external {skill} process.",
+         "Streamlined {skill} procedures."],
+    ),
+    "Nurse": (
+        ["Registered Nurse", "Staff Nurse", "Clinical Nurse"],
+        ["patient care", "triage", "medication administration", "electronic health records", "BLS",
+         "wound care", "ICU"],
+        ["Provided {skill} in a busy hospital ward.", "Trained new staff in {skill}.",
+         "Documented {skill} according to protocol."],
+    ),
+}
+
+GENERAL_SKILLS = ["communication", "teamwork", "problem solving", "leadership", "English", "time management",
+                  "presentation", "mentoring", "Git", "documentation"]
+
+# Used only by planted target resumes, two per benchmark query
+NICHE_SKILLS = ["Erlang", "COBOL", "Fortran", "Haskell", "OCaml", "Elixir", "Clojure", "Prolog", "Ada",
+                "Common Lisp", "Julia", "Zig", "Nim", "Crystal", "F#", "Solidity", "VHDL", "Verilog", "ABAP",
+                "Smalltalk", "Delphi", "Tcl", "Racket", "Scheme", "Coq", "Idris", "Elm", "PureScript",
+                "ReasonML", "Apex", "SAS", "Stata", "LabVIEW", "Simulink", "Modelica", "Mathematica",
+                "Pony", "Chapel", "Hack", "Vala", "Ballerina", "Grails", "Mercury", "Eiffel", "Forth",
+                "APL", "Dylan", "Rexx"]
+
+COMPANY_PREFIXES = ["Blue", "North", "Bright", "Global", "Prime", "Silver", "Urban", "Nova", "Red", "Green",
+                    "Summit", "Pacific", "Atlas", "Vertex", "Pioneer", "Harbor", "Apex", "Orion", "Cedar", "Iron"]
+COMPANY_SUFFIXES = ["Systems", "Labs", "Solutions", "Group", "Technologies", "Partners", "Health", "Logistics",
+                    "Analytics", "Finance", "Retail", "Media", "Networks", "Industries", "Consulting"]
+INSTITUTIONS = ["State University", "Institute of Technology", "City College", "National University",
+                "University of Applied Sciences", "Technical University", "Metropolitan University", "Polytechnic"]
+DEGREES = ["B.Sc. Computer Science", "B.Sc. Mathematics", "M.Sc. Data Science", "B.A. Economics", "MBA",
+           "B.Eng. Software Engineering", "B.Sc. Nursing", "B.Com. Accounting", "M.Sc. Statistics"]
+
+
+def parse_rows(value: str) -> int:
+    """
+    Row count from "10k", "100k", "1M" or a plain number.
+    """
+    return SCALES.get(value.lower()) or int(value.replace("_", ""))
+
+
+def list_value(items) -> str:
+    return str(list(items))
+
+
+def benchmark_queries(count: int) -> list:
+    """
+    The benchmark queries: role i % len(ROLES) with niche skills 2i and 2i + 1.
+    """
+    if 2 * count > len(NICHE_SKILLS):
+        raise ValueError(f"At most {len(NICHE_SKILLS) // 2} benchmark queries are supported.")
+    roles = list(ROLES)
+    return [
+        {"role": roles[i % len(roles)], "niche_skills": NICHE_SKILLS[2 * i:2 * i + 2],
+         "query": f"{roles[i % len(roles)]} with {NICHE_SKILLS[2 * i]} and {NICHE_SKILLS[2 * i + 1]} experience"}
+        for i in range(count)
+    ]
+
+
+def resume_row(rng: random.Random, role: str, niche_skills: list = None) -> dict:
+    """
+    One resume row for role; niche_skills are added to the skills, the responsibilities and
+    (for the first job) the position title.
+    """
+    titles, core_skills, templates = ROLES[role]
+    skills = rng.sample(core_skills, rng.randint(3, min(6, len(core_skills)))) + rng.sample(GENERAL_SKILLS, rng.randint(0, 2))
+    jobs = rng.randint(1, 3)
+    end_year = rng.randint(2012, 2025)
+    start_dates, end_dates = [], []
+    for _ in range(jobs):
+        start_year = end_year - rng.randint(1, 5)
+        start_dates.append(str(start_year))
+        end_dates.append(str(end_year))
+        end_year = start_year
+    positions = [rng.choice(titles) for _ in range(jobs)]
+    responsibilities = [rng.choice(templates).format(skill=rng.choice(skills)) for _ in range(rng.randint(1, 4))]
+    if niche_skills:
+        skills = list(niche_skills) + skills
+        positions[0] = f"{positions[0]} ({niche_skills[0]})"
+        responsibilities.append(f"Built and maintained systems in {niche_skills[0]} and {niche_skills[1]}.")
+    graduation = int(start_dates[-1]) - rng.randint(0, 2)
+    return {
+        "skills": list_value(skills),
+        "start_dates": list_value(start_dates),
+        "end_dates": list_value(end_dates),
+        "professional_company_names": list_value(
+            f"{rng.choice(COMPANY_PREFIXES)} {rng.choice(COMPANY_SUFFIXES)}" for _ in range(jobs)),
+        "educational_institution_name": list_value([f"{rng.choice(COMPANY_PREFIXES)} {rng.choice(INSTITUTIONS)}"]),
+        "degree_names": list_value([rng.choice(DEGREES)]),
+        "passing_years": list_value([str(graduation)]),
+        "positions": list_value(positions),
+        "responsibilities": " ".join(responsibilities) + f" Reference {rng.getrandbits(32):08x}.",
+    }
+
+
+def generate_corpus(output: str, rows: int, queries: int = 20, targets_per_query: int = 5, seed: int = 0,
+                    chunk_rows: int = 50000) -> list:
+    """
+    Write rows synthetic resumes to the CSV output and the benchmark queries with their
+    target CandidateIDs to output + ".queries.json". Returns the queries.
+    """
+    rng = random.Random(seed)
+    query_specs = benchmark_queries(queries)
+    target_count = len(query_specs) * targets_per_query
+    if target_count > rows:
+        raise ValueError(f"{rows} rows cannot hold {target_count} target resumes.")
+    # Row position -> index of the query it is a target for
+    targets = {position: i // targets_per_query
+               for i, position in enumerate(rng.sample(range(rows), target_count))}
+    for spec in query_specs:
+        spec["relevant_ids"] = []
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    roles = list(ROLES)
+    for start in range(0, rows, chunk_rows):
+        records, target_rows = [], []
+        for position in range(start, min(start + chunk_rows, rows)):
+            query_index = targets.get(position)
+            if query_index is None:
+                records.append(resume_row(rng, rng.choice(roles)))
+            else:
+                spec = query_specs[query_index]
+                target_rows.append((len(records), query_index))
+                records.append(resume_row(rng, spec["role"], spec["niche_skills"]))
+        chunk = pd.DataFrame(records, columns=CSV_RESUME_COLUMNS)
+        if target_rows:
+            resume_texts = build_resume_texts(chunk)
+            for row, query_index in target_rows:
+                query_specs[query_index]["relevant_ids"].append(generate_candidate_id(resume_texts.iloc[row]))
+        chunk.to_csv(output, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+    with open(output + ".queries.json", "w", encoding="utf-8") as f:
+        json.dump({"rows": rows, "seed": seed, "queries": query_specs}, f, indent=2)
+    return query_specs
+
+
+def load_queries(output: str) -> list:
+    with open(output + ".queries.json", encoding="utf-8") as f:
+        return json.load(f)["queries"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=parse_rows, default="10k", help="10k, 100k, 1M or a number of rows")
+    parser.add_argument("--output", help="CSV path (default: output/benchmarks/corpus_<rows>_seed<seed>.csv)")
+    parser.add_argument("--queries", type=int, default=20, help="Benchmark queries with planted target resumes")
+    parser.add_argument("--targets", type=int, default=5, help="Target resumes per query")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    output = args.output or os.path.join("output", "benchmarks", f"corpus_{args.rows}_seed{args.seed}.csv")
+    generate_corpus(output, args.rows, args.queries, args.targets, args.seed)
+    print(f"Wrote {args.rows} resumes to {output} and {args.queries} queries to {output}.queries.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,40 @@
 import sqlite3
 import json
 
+# Opt-in connection settings for bulk ingestion. WAL lets readers run alongside the writer,
+# synchronous=NORMAL skips the fsync on every commit (still safe in WAL mode), and the larger
+# page cache and mmap window keep hot pages in memory.
+TUNED_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,     # negative values are KiB, i.e. 64 MiB
+    "mmap_size": 268435456,   # 256 MiB
+    "temp_store": "MEMORY",
+}
+
 class DBManager:
-    def __init__(self, db_path='resumes.db'):
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path='resumes.db', tuned: bool = False, pragmas: dict = None,
+                 check_same_thread: bool = True):
+        """
+        Open the SQLite database and create tables if needed.
+        tuned=True applies TUNED_PRAGMAS; pragmas can add or override individual settings.
+        check_same_thread=False lets several threads share the connection; the caller is then
+        responsible for not writing while other threads use it (see SearchPipeline).
+        """
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+        settings = dict(TUNED_PRAGMAS) if tuned else {}
+        settings.update(pragmas or {})
+        self.apply_pragmas(settings)
         self.create_tables()
 
+    def apply_pragmas(self, pragmas: dict):
+        """
+        Apply PRAGMA settings to the open connection.
+        """
+        cursor = self.conn.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+
     def create_tables(self):
         cursor = self.conn.cursor()
         # Candidates table: we store a minimal set of fields for CSV rows.
@@ -24,6 +53,22 @@ class DBManager:
         cursor.execute('SELECT 1 FROM candidates WHERE CandidateID = ?', (candidate_id,))
         return cursor.fetchone() is not None
 
+    def existing_ids(self, candidate_ids) -> set:
+        """
+        Returns the subset of candidate_ids that are already stored in the candidates table.
+        The IDs are passed as a single JSON array parameter, so the lookup is one query
+        no matter how many IDs are checked.
+        """
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids:
+            return set()
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT CandidateID FROM candidates WHERE CandidateID IN (SELECT value FROM json_each(?))',
+            (json.dumps(candidate_ids),)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
     def insert_candidate(self, candidate_data: dict):
         """
         Inserts candidate data into the candidates table.
@@ -41,6 +86,42 @@ class DBManager:
         ))
         self.conn.commit()
 
+    def insert_candidates_bulk(self, candidates: list):
+        """
+        Inserts many candidates in a single transaction using executemany.
+        Each element of candidates is a dictionary with keys CandidateID, Name, ResumeText.
+        """
+        rows = [
+            (
+                candidate_data.get("CandidateID"),
+                candidate_data.get("Name", ""),
+                candidate_data.get("ResumeText")
+            )
+            for candidate_data in candidates
+        ]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO candidates (CandidateID, Name, ResumeText)
+                VALUES (?, ?, ?)
+            ''', rows)
+
+    def delete_candidates(self, candidate_ids) -> int:
+        """
+        Deletes candidates by CandidateID in one transaction. Returns the number of rows deleted.
+        Pair with VectorIndex.remove so the database and the vector index stay in sync.
+        """
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids:
+            return 0
+        with self.conn:
+            cursor = self.conn.execute(
+                'DELETE FROM candidates WHERE CandidateID IN (SELECT value FROM json_each(?))',
+                (json.dumps(candidate_ids),)
+            )
+        return cursor.rowcount
+
     def get_all_candidates(self):
         """
         Returns a list of tuples (CandidateID, ResumeText) from the candidates table.
@@ -49,6 +130,54 @@ class DBManager:
         cursor.execute('SELECT CandidateID, ResumeText FROM candidates')
         return cursor.fetchall()
 
+    def get_all_candidate_ids(self) -> list:
+        """
+        Returns every CandidateID. Served from the primary key index, so no resume text is read.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT CandidateID FROM candidates')
+        return [row[0] for row in cursor.fetchall()]
+
+    def get_resume_text_pairs(self, candidate_ids) -> list:
+        """
+        Returns (CandidateID, ResumeText) pairs for the given CandidateIDs in one query, in the
+        order the IDs were given. Unknown IDs are skipped, so callers that need the texts
+        aligned with their IDs should use these pairs rather than get_resume_texts.
+        """
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids:
+            return []
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT CandidateID, ResumeText FROM candidates WHERE CandidateID IN (SELECT value FROM json_each(?))',
+            (json.dumps(candidate_ids),)
+        )
+        texts = dict(cursor.fetchall())
+        return [(cid, texts[cid]) for cid in candidate_ids if cid in texts]
+
+    def get_resume_texts(self, candidate_ids) -> list:
+        """
+        Returns the ResumeText of each given CandidateID in one query, in the order the IDs
+        were given. Unknown IDs are skipped.
+        """
+        return [text for _, text in self.get_resume_text_pairs(candidate_ids)]
+
+    def get_candidates_by_ids(self, candidate_ids) -> list:
+        """
+        Returns candidate dicts (CandidateID, Name, ResumeText) for the given IDs in one query,
+        in the order the IDs were given. Unknown IDs are skipped.
+        """
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids:
+            return []
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'SELECT CandidateID, Name, ResumeText FROM candidates WHERE CandidateID IN (SELECT value FROM json_each(?))',
+            (json.dumps(candidate_ids),)
+        )
+        rows = {row[0]: {"CandidateID": row[0], "Name": row[1], "ResumeText": row[2]} for row in cursor.fetchall()}
+        return [rows[cid] for cid in candidate_ids if cid in rows]
+
     def get_candidate_by_id(self, candidate_id: str):
         """
         Returns candidate information (CandidateID, Name, ResumeText) for a given CandidateID.
@@ -0,0 +1,112 @@
+"""
+Index resumes without running a query: new rows of the resume CSV and new or changed
+PDF/DOCX/TXT resumes are added to the database and vector index, and the BM25/TF–IDF
+indices are brought up to date. Sources recorded in the ingestion manifest and unchanged since are skipped. Documents
+are extracted in a process pool with a per-file timeout; files that fail go to the manifest's
+retry list and are attempted again on later runs.
+
+With --watch SECONDS the sources are polled until interrupted. A running query server
+(server.py --watch) can do the same in the background while it keeps serving searches.
+Writers take the ingest lock (config ingest_lock_path) in turn, and each reloads the vector
+index saved by the other before adding to it, so this script can run alongside the server.
+
+Run from the project root:
+    python ingest.py [--csv resumes/resume_data.csv] [--pdf-folder resumes/] [--watch 60] [--force]
+    python ingest.py --failures          # show the retry list
+    python ingest.py --reembed           # re-embed every resume, e.g. after changing the encoder backend
+"""
+import os
+import time
+import argparse
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", help="Resume CSV (default: config csv_path)")
+    parser.add_argument("--pdf-folder", help="Folder of PDF/DOCX/TXT resumes (default: config pdf_folder)")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="Keep polling the sources at this interval")
+    parser.add_argument("--force", action="store_true", help="Forget the manifest and re-read every source")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Retry every file on the retry list, even those out of attempts")
+    parser.add_argument("--failures", action="store_true", help="Print the retry list and exit")
+    parser.add_argument("--workers", type=int, help="Extraction processes (default: config extraction_workers or CPU count)")
+    parser.add_argument("--reembed", action="store_true",
+                        help="Rebuild the vector index from the stored resume texts with the configured encoder")
+    args = parser.parse_args()
+
+    # Imported after argument parsing so --help is instant and the extraction workers, which
+    # re-import this module, only load what document extraction needs.
+    from utils.config import load_config
+    from utils.logger import setup_logger
+    from utils.analyzer import get_analyzer
+    from utils.ingest_manifest import IngestManifest
+    from utils.ingest_lock import get_ingest_lock
+    from utils.resume_indexer import ingest_sources, extraction_options
+    from database.db_manager import DBManager
+    from vectordb.vector_index import VectorIndex
+    from vectordb.encoders import get_encoder
+    from vectordb.embedding_cache import EmbeddingCache
+    from vectordb.precomputed_filter import get_precomputed_indices
+
+    logger = setup_logger()
+    config = load_config()
+    csv_path = args.csv or config.get("csv_path", "resumes/resume_data.csv")
+    pdf_folder = args.pdf_folder or config.get("pdf_folder", "resumes/")
+
+    manifest = IngestManifest(config.get("ingest_manifest", "ingest_manifest.db"))
+    if args.failures:
+        for failure in manifest.failures():
+            print(f"{failure['Path']}\t{failure['Attempts']} attempt(s)\t{failure['Error']}")
+        return
+    if args.force:
+        manifest.forget()
+    elif args.retry_failed:
+        manifest.clear_failures()
+    extraction = extraction_options(config)
+    if args.workers is not None:
+        extraction["workers"] = args.workers
+
+    db_manager = DBManager(tuned=config.get("sqlite_tuned", False))
+    vector_index = VectorIndex(
+        index_type=config.get("vector_index_type", "flat"),
+        index_params=config.get("vector_index_params"),
+        nprobe=config.get("vector_nprobe", 16),
+        ef_search=config.get("vector_ef_search", 64),
+        max_deleted_ratio=config.get("vector_max_deleted_ratio", 0.2),
+        embedding_cache=EmbeddingCache(config.get("embedding_cache_dir", "embedding_cache")),
+        encoder=get_encoder(config),
+        on_encoder_change="reset" if args.reembed or config.get("reembed_on_encoder_change", False) else "error",
+    )
+    analyzer = get_analyzer(config)
+    ingest_lock = get_ingest_lock(config)
+
+    if args.reembed or vector_index.needs_reembed:
+        start = time.perf_counter()
+        with ingest_lock:
+            candidates = db_manager.get_all_candidates()
+            vector_index.reembed([cid for cid, _ in candidates], [text for _, text in candidates])
+        print(f"Re-embedded {len(candidates)} candidates with {vector_index.encoder.cache_key} "
+              f"({time.perf_counter() - start:.2f}s)")
+
+    while True:
+        start = time.perf_counter()
+        with ingest_lock:
+            # A query server may have ingested since the last pass
+            vector_index.reload_if_changed()
+            result = ingest_sources(csv_path, pdf_folder, db_manager, vector_index, logger,
+                                    manifest=manifest, extraction=extraction)
+            lexical_index = get_precomputed_indices(db_manager, logger, analyzer=analyzer)
+        print(f"Added {result['added_csv']} CSV and {result['added_pdf']} document candidates; "
+              f"{len(lexical_index)} indexed ({time.perf_counter() - start:.2f}s)")
+        if not args.watch:
+            break
+        try:
+            time.sleep(args.watch)
+        except KeyboardInterrupt:
+            break
+
+
+if __name__ == "__main__":
+    main()
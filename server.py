@@ -0,0 +1,217 @@
+"""
+Long-running query service. Loads the database, vector index, embedding model, lexical
+indices and reranker once and serves JSON requests over HTTP:
+
+    GET  /health   status and corpus size
+    GET  /metrics  per-stage latency histograms, LLM and candidate counters (Prometheus text format)
+    POST /search   {"query": "...", "expand": true, "summarize": true, "limit": 5, "include_resume": false}
+    POST /ingest   {"csv_path": "...", "pdf_folder": "..."}   (defaults from config.json)
+
+limit must be a positive integer up to "server_max_limit" (default 100). Ingestion paths must
+lie inside the configured csv_path's folder, the configured pdf_folder or one of the
+"server_ingest_roots" folders.
+
+Searches run concurrently; ingestion parses and embeds new resumes alongside them and only
+briefly blocks searches while the new rows, vectors and lexical indices are swapped in.
+With --watch SECONDS the configured sources are also re-ingested in the background.
+
+Run from the project root:
+    python server.py --host 127.0.0.1 --port 8080
+"""
+import os
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.tracing import TRACER
+
+os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+DEFAULT_MAX_LIMIT = 100
+
+
+class RequestError(Exception):
+    """A request the client must fix; answered with the given HTTP status."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_limit(value, max_limit: int = DEFAULT_MAX_LIMIT):
+    """
+    Validate a search limit: None (use the expanded query's count) or an integer in [1, max_limit].
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or not 1 <= value <= max_limit:
+        raise RequestError(f"'limit' must be an integer between 1 and {max_limit}")
+    return value
+
+
+def parse_flag(request: dict, name: str, default: bool) -> bool:
+    """
+    Validate an optional boolean request field.
+    """
+    value = request.get(name, default)
+    if not isinstance(value, bool):
+        raise RequestError(f"'{name}' must be true or false")
+    return value
+
+
+def ingest_roots(config: dict) -> list:
+    """
+    Folders the ingest endpoint may read: the configured CSV's folder, the configured
+    document folder and any "server_ingest_roots".
+    """
+    roots = [os.path.dirname(config.get("csv_path", "resumes/resume_data.csv")) or ".",
+             config.get("pdf_folder", "resumes/"), *config.get("server_ingest_roots", [])]
+    return [os.path.realpath(root) for root in roots]
+
+
+def check_ingest_path(name: str, path, roots: list) -> str:
+    """
+    Reject ingestion paths that are not strings or resolve outside the allowed folders.
+    None (skip this source) is allowed.
+    """
+    if path is None:
+        return None
+    if not isinstance(path, str) or not path:
+        raise RequestError(f"'{name}' must be a non-empty string or null")
+    resolved = os.path.realpath(path)
+    if not any(os.path.commonpath([resolved, root]) == root for root in roots):
+        raise RequestError(f"'{name}' is outside the configured resume folders", status=403)
+    return path
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, pipeline: "SearchPipeline", config: dict):
+        super().__init__(address, QueryHandler)
+        self.pipeline = pipeline
+        self.config = config
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        self.server.pipeline.logger.info("%s - %s" % (self.address_string(), format % args))
+
+    def _send_json(self, status: int, payload: dict):
+        self._send_body(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send_body(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/health":
+            pipeline = self.server.pipeline
+            self._send_json(200, {
+                "status": "ok",
+                "candidates": len(pipeline.lexical_index),
+                "vectors": len(pipeline.vector_index),
+                "index_type": pipeline.vector_index.index_type,
+            })
+        elif self.path == "/metrics":
+            self._send_body(200, TRACER.prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(request, dict):
+            self._send_json(400, {"error": "Request body must be a JSON object"})
+            return
+        try:
+            if self.path == "/search":
+                self._search(request)
+            elif self.path == "/ingest":
+                self._ingest(request)
+            else:
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+        except RequestError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except Exception:
+            # The details stay in the server log; they may expose paths or internals
+            self.server.pipeline.logger.exception(f"Request to {self.path} failed")
+            self._send_json(500, {"error": "Internal server error"})
+
+    def _search(self, request: dict):
+        query = request.get("query")
+        if not isinstance(query, str) or not query.strip():
+            self._send_json(400, {"error": "'query' must be a non-empty string"})
+            return
+        limit = parse_limit(request.get("limit"), self.server.config.get("server_max_limit", DEFAULT_MAX_LIMIT))
+        expand = parse_flag(request, "expand", True)
+        summarize = parse_flag(request, "summarize", True)
+        include_resume = parse_flag(request, "include_resume", False)
+        result = self.server.pipeline.search(query, expand=expand, summarize=summarize, limit=limit)
+        if not include_resume:
+            result["candidates"] = [
+                {key: value for key, value in candidate.items() if key != "ResumeText"}
+                for candidate in result["candidates"]
+            ]
+        self._send_json(200, result)
+
+    def _ingest(self, request: dict):
+        config = self.server.config
+        roots = ingest_roots(config)
+        result = self.server.pipeline.ingest(
+            csv_path=check_ingest_path(
+                "csv_path", request.get("csv_path", config.get("csv_path", "resumes/resume_data.csv")), roots),
+            pdf_folder=check_ingest_path(
+                "pdf_folder", request.get("pdf_folder", config.get("pdf_folder", "resumes/")), roots),
+        )
+        self._send_json(200, result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--watch", type=float, metavar="SECONDS",
+                        help="Poll the configured CSV and PDF folder for new resumes at this interval")
+    args = parser.parse_args()
+
+    # Imported after argument parsing so --help is instant and the extraction workers, which
+    # re-import this module, do not load the search stack.
+    from utils.config import load_config
+    from utils.logger import setup_logger
+    from utils.search_pipeline import SearchPipeline, IngestWatcher
+
+    logger = setup_logger()
+    config = load_config()
+    pipeline = SearchPipeline(config, logger, shared=True)
+    server = QueryServer((args.host, args.port), pipeline, config)
+    watcher = None
+    if args.watch:
+        watcher = IngestWatcher(pipeline, config.get("csv_path", "resumes/resume_data.csv"),
+                                config.get("pdf_folder", "resumes/"), interval=args.watch).start()
+    logger.info(f"Query server listening on http://{args.host}:{args.port}")
+    print(f"Query server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if watcher is not None:
+            watcher.stop()
+        server.server_close()
+        pipeline.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+# Tests import the project modules the way the entry points do, from the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class WordHashEncoder:
+    """Small deterministic stand-in for the embedding model: hashed bag of words."""
+
+    backend = "test"
+    model_name = cache_key = "word-hash-384"
+    dimension = 384  # VectorIndex default
+
+    def encode(self, texts, batch_size=64):
+        embeddings = np.zeros((len(texts), self.dimension), dtype='float32')
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[row, zlib.crc32(word.encode("utf-8")) % self.dimension] += 1.0
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+
+@pytest.fixture
+def encoder():
+    return WordHashEncoder()
+
+
+@pytest.fixture
+def make_pipeline(tmp_path, monkeypatch, encoder):
+    """Builds SearchPipelines whose databases and indices live in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    import logging
+    from utils.search_pipeline import SearchPipeline
+
+    def make(config=None, **kwargs):
+        config = {"reranker": {"type": "none"}, "tracing": {"enabled": False}, **(config or {})}
+        return SearchPipeline(config, logging.getLogger("test"), encoder=encoder, **kwargs)
+    return make
@@ -0,0 +1,37 @@
+import logging
+
+from utils.analyzer import Analyzer
+from vectordb.precomputed_filter import LexicalIndex, load_precomputed_indices, save_precomputed_indices
+
+
+def test_single_letter_skills_are_kept():
+    assert Analyzer()("Skills: R, C and Go") == ["skills", "r", "c", "go"]
+
+
+def test_other_single_characters_are_dropped():
+    assert Analyzer()("Plan B, grade x") == ["plan", "grade"]
+
+
+def test_version_suffixes_are_stripped():
+    analyzer = Analyzer()
+    assert analyzer("C++11, C++17 and C99") == ["c++", "c++", "c"]
+    assert analyzer("C#10 developer") == ["c#", "developer"]
+
+
+def test_short_terms_do_not_match_inside_words():
+    assert Analyzer()("Google, Golang, C3PO, crm") == ["google", "golang", "c3po", "crm"]
+
+
+def test_short_terms_are_configurable():
+    assert Analyzer(short_terms=[])("R and C") == []
+
+
+def test_index_from_older_analyzer_is_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / "precomputed_filter")
+    lexical_index = LexicalIndex()
+    lexical_index.add_documents(["id0"], ["python developer"])
+    save_precomputed_indices(lexical_index, logging.getLogger("test"), path=path)
+    assert load_precomputed_indices(logging.getLogger("test"), path=path) is not None
+
+    monkeypatch.setattr("utils.analyzer.ANALYZER_VERSION", 0)
+    assert load_precomputed_indices(logging.getLogger("test"), path=path) is None
@@ -0,0 +1,94 @@
+import logging
+
+import numpy as np
+import pytest
+from rank_bm25 import BM25Okapi
+
+from database.db_manager import DBManager
+from vectordb.precomputed_filter import (LexicalIndex, get_precomputed_indices, load_precomputed_indices,
+                                         save_precomputed_indices)
+
+LOGGER = logging.getLogger("test")
+
+DOCS = [
+    "python developer with django and python scripting",
+    "",  # empty document
+    "java engineer building spring services",
+    "senior python data scientist",
+    "registered nurse in the icu",
+    "project manager running agile teams",
+]
+# "experience" occurs in every document, so its BM25Okapi IDF is negative and floored
+DOCS = [f"{doc} experience" if doc else doc for doc in DOCS]
+ALL_TERM_DOCS = [doc for doc in DOCS if doc]
+QUERIES = ["python developer", "experience", "python python experience", "nurse icu", "unknown term", ""]
+
+
+def assert_bm25_parity(lexical_index, texts):
+    analyzer = lexical_index.analyzer
+    reference = BM25Okapi([analyzer(text) for text in texts])
+    for query in QUERIES:
+        np.testing.assert_allclose(lexical_index.bm25_scores(query), reference.get_scores(analyzer(query)),
+                                   rtol=1e-9, atol=1e-9, err_msg=query)
+
+
+def build(texts):
+    lexical_index = LexicalIndex()
+    lexical_index.add_documents([f"id{i}" for i in range(len(texts))], texts)
+    return lexical_index
+
+
+@pytest.mark.parametrize("texts", [DOCS, ALL_TERM_DOCS], ids=["with_empty_document", "term_in_every_document"])
+def test_scores_match_bm25okapi(texts):
+    assert_bm25_parity(build(texts), texts)
+
+
+def test_save_load_then_add_matches_bm25okapi(tmp_path):
+    path = str(tmp_path / "precomputed_filter")
+    save_precomputed_indices(build(DOCS[:3]), LOGGER, path=path)
+    loaded = load_precomputed_indices(LOGGER, path=path)
+    assert_bm25_parity(loaded, DOCS[:3])
+
+    loaded.add_documents([f"id{i}" for i in range(3, len(DOCS))], DOCS[3:])
+    assert_bm25_parity(loaded, DOCS)
+
+
+def test_incremental_add_and_remove_match_bm25okapi(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db_manager = DBManager(str(tmp_path / "resumes.db"))
+    rows = [{"CandidateID": f"id{i}", "Name": "", "ResumeText": text} for i, text in enumerate(DOCS)]
+    db_manager.insert_candidates_bulk(rows[:3])
+    get_precomputed_indices(db_manager, LOGGER)
+
+    db_manager.insert_candidates_bulk(rows[3:])
+    lexical_index = get_precomputed_indices(db_manager, LOGGER)
+    assert_bm25_parity(lexical_index, db_manager.get_resume_texts(lexical_index.doc_ids))
+
+    db_manager.delete_candidates(["id0", "id3"])
+    lexical_index = get_precomputed_indices(db_manager, LOGGER)
+    assert sorted(lexical_index.doc_ids) == ["id1", "id2", "id4", "id5"]
+    assert_bm25_parity(lexical_index, db_manager.get_resume_texts(lexical_index.doc_ids))
+
+
+@pytest.mark.filterwarnings("error")
+def test_corpus_of_empty_documents_scores_zero_without_warnings():
+    lexical_index = build(["", "the of and"])
+    np.testing.assert_array_equal(lexical_index.bm25_scores("python"), [0.0, 0.0])
+    np.testing.assert_array_equal(lexical_index.tfidf_scores("python"), [0.0, 0.0])
+
+
+def test_remove_documents_from_loaded_index_matches_bm25okapi(tmp_path):
+    path = str(tmp_path / "precomputed_filter")
+    save_precomputed_indices(build(DOCS), LOGGER, path=path)
+    loaded = load_precomputed_indices(LOGGER, path=path)
+
+    updated = loaded.copy()
+    updated.remove_documents(["id0", "id4", "unknown"])
+    assert updated.doc_ids == ["id1", "id2", "id3", "id5"]
+    assert_bm25_parity(updated, [DOCS[i] for i in (1, 2, 3, 5)])
+    # Terms only the removed documents used are gone; the original index is untouched
+    assert "icu" not in updated.terms.vocabulary
+    assert_bm25_parity(loaded, DOCS)
+
+    updated.add_documents(["id6"], ["nurse with python experience"])
+    assert_bm25_parity(updated, [DOCS[i] for i in (1, 2, 3, 5)] + ["nurse with python experience"])
@@ -0,0 +1,75 @@
+import logging
+
+import pandas as pd
+
+from database.db_manager import DBManager
+from utils.resume_indexer import CSV_RESUME_COLUMNS, generate_candidate_id, index_csv_resumes
+
+
+class RecordingIndex:
+    """Vector index stand-in that records the candidates it is given."""
+
+    def __init__(self):
+        self.ids = []
+
+    def encode_texts(self, texts, batch_size=256):
+        return None
+
+    def add_candidates(self, candidate_ids, texts, **kwargs):
+        self.ids.extend(candidate_ids)
+
+    def save(self):
+        pass
+
+
+def baseline_candidate_ids(csv_path):
+    """CandidateIDs as the original whole-file, per-row implementation computed them."""
+    df = pd.read_csv(csv_path)
+    df[CSV_RESUME_COLUMNS] = df[CSV_RESUME_COLUMNS].fillna("")
+    ids = []
+    for _, row in df.iterrows():
+        resume_text = "; ".join(f"{column}: {row[column]}" for column in CSV_RESUME_COLUMNS)
+        ids.append(generate_candidate_id(resume_text))
+    return ids
+
+
+def write_csv(path, rows):
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def ingest_ids(csv_path, tmp_path, chunksize):
+    vector_index = RecordingIndex()
+    db_manager = DBManager(str(tmp_path / "resumes.db"))
+    index_csv_resumes(str(csv_path), db_manager, vector_index, logging.getLogger("test"), chunksize=chunksize)
+    return vector_index.ids
+
+
+def test_export_format_ids_match_baseline(tmp_path):
+    csv_path = tmp_path / "resumes.csv"
+    rows = [{column: f"['{column} {i}']" for column in CSV_RESUME_COLUMNS} for i in range(5)]
+    rows[1]["degree_names"] = None
+    rows[3]["responsibilities"] = "Led a team; shipped v1.0"
+    write_csv(csv_path, rows)
+    assert ingest_ids(csv_path, tmp_path, chunksize=2) == baseline_candidate_ids(csv_path)
+
+
+def test_numeric_columns_keep_baseline_rendering(tmp_path):
+    csv_path = tmp_path / "resumes.csv"
+    lines = [",".join(CSV_RESUME_COLUMNS)]
+    for i in range(6):
+        values = {column: f"text {i}" for column in CSV_RESUME_COLUMNS}
+        # An integer column, and a float column (whole years with a missing value late in the file)
+        values["start_dates"] = str(2000 + i)
+        values["passing_years"] = "" if i == 5 else str(2010 + i)
+        lines.append(",".join(values[column] for column in CSV_RESUME_COLUMNS))
+    csv_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    assert ingest_ids(csv_path, tmp_path, chunksize=2) == baseline_candidate_ids(csv_path)
+
+
+def test_mixed_column_is_read_as_text(tmp_path):
+    csv_path = tmp_path / "resumes.csv"
+    rows = [{column: f"text {i}" for column in CSV_RESUME_COLUMNS} for i in range(4)]
+    for i, row in enumerate(rows):
+        row["passing_years"] = "unknown" if i == 3 else f"{2010 + i}.0"
+    write_csv(csv_path, rows)
+    assert ingest_ids(csv_path, tmp_path, chunksize=2) == baseline_candidate_ids(csv_path)
@@ -0,0 +1,37 @@
+import os
+
+import utils.resume_indexer as resume_indexer
+
+
+def write_documents(folder, texts):
+    folder.mkdir(exist_ok=True)
+    for name, text in texts.items():
+        (folder / f"{name}.txt").write_text(text)
+
+
+def test_touched_documents_are_skipped_before_extraction(make_pipeline, tmp_path, monkeypatch):
+    folder = tmp_path / "resumes"
+    write_documents(folder, {"ada": "python developer with sql", "bob": "registered nurse in icu"})
+    pipeline = make_pipeline({"extraction_workers": 1})
+    assert pipeline.ingest(pdf_folder=str(folder))["added_pdf"] == 2
+
+    extracted = []
+    extract_documents = resume_indexer.extract_documents
+
+    def recording_extract(paths, **kwargs):
+        paths = list(paths)
+        extracted.append(sorted(os.path.basename(path) for path in paths))
+        return extract_documents(paths, **kwargs)
+    monkeypatch.setattr(resume_indexer, "extract_documents", recording_extract)
+
+    for path in folder.iterdir():
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert pipeline.ingest(pdf_folder=str(folder))["added_pdf"] == 0
+    assert extracted == [[]]
+    # The new mtime was recorded, so the next run skips them with a stat alone
+    assert all(pipeline.manifest.is_unchanged(str(path)) for path in folder.iterdir())
+
+    write_documents(folder, {"bob": "registered nurse in icu and er"})
+    assert pipeline.ingest(pdf_folder=str(folder))["added_pdf"] == 1
+    assert extracted[-1] == ["bob.txt"]
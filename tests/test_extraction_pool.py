@@ -0,0 +1,55 @@
+import os
+import threading
+import time
+
+from utils.extraction_pool import extract_documents
+from utils.file_converter import convert_file_to_text
+
+
+# Converters run in spawned workers, so they must be top-level functions of an importable module
+
+def crash_on_bad(file_path):
+    if os.path.basename(file_path).startswith("bad"):
+        os._exit(1)
+    return convert_file_to_text(file_path)
+
+
+def hang_on_slow(file_path):
+    if os.path.basename(file_path).startswith("slow"):
+        time.sleep(30)
+    return convert_file_to_text(file_path)
+
+
+def write_files(folder, names):
+    paths = []
+    for name in names:
+        path = folder / f"{name}.txt"
+        path.write_text(f"{name} python developer")
+        paths.append(str(path))
+    return paths
+
+
+def test_only_the_file_that_kills_a_worker_fails(tmp_path):
+    paths = write_files(tmp_path, ["bad", *[f"ok{i}" for i in range(6)]])
+    results = {os.path.basename(path): error
+               for path, _, _, error in extract_documents(paths, workers=2, convert=crash_on_bad)}
+    assert len(results) == len(paths)
+    assert results.pop("bad.txt").startswith("worker process died")
+    assert set(results.values()) == {None}
+
+
+def test_timeout_applies_when_extracting_from_a_thread(tmp_path):
+    paths = write_files(tmp_path, ["slow", "ok"])
+    results = {}
+
+    def ingest():
+        for path, _, _, error in extract_documents(paths, workers=1, timeout=1, convert=hang_on_slow):
+            results[os.path.basename(path)] = error
+
+    started = time.monotonic()
+    thread = threading.Thread(target=ingest)
+    thread.start()
+    thread.join()
+    assert time.monotonic() - started < 20
+    assert results["slow.txt"] == "timed out after 1s"
+    assert results["ok.txt"] is None
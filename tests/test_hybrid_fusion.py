@@ -0,0 +1,62 @@
+import pytest
+
+from vectordb.hybrid_fusion import (fuse_rankings, hybrid_settings, normalise_scores, reciprocal_rank_fusion,
+                                    weighted_score_fusion)
+
+RANKINGS = {
+    "bm25": [("a", 12.0), ("b", 8.0), ("c", 2.0)],
+    "tfidf": [("b", 0.9), ("a", 0.5)],
+    "vector": [("d", -0.1), ("b", -0.4)],
+}
+
+
+def settings(**hybrid):
+    return hybrid_settings({"hybrid": hybrid})
+
+
+def test_rrf_sums_weighted_reciprocal_ranks():
+    fused = reciprocal_rank_fusion(RANKINGS, {"vector": 2.0}, k=10)
+    assert fused["b"] == pytest.approx(1 / 12 + 1 / 11 + 2 / 12)
+    assert fused["a"] == pytest.approx(1 / 11 + 1 / 12)
+    # Found by a single retriever: only that retriever's term
+    assert fused["c"] == pytest.approx(1 / 13)
+    assert fused["d"] == pytest.approx(2 / 11)
+
+
+def test_weighted_fusion_normalises_each_source():
+    assert normalise_scores([("a", 12.0), ("b", 8.0), ("c", 2.0)]) == {"a": 1.0, "b": 0.6, "c": 0.0}
+    assert normalise_scores([("a", 3.0), ("b", 3.0)]) == {"a": 1.0, "b": 1.0}
+    fused = weighted_score_fusion(RANKINGS, {"tfidf": 0.5})
+    assert fused == pytest.approx({"a": 1.0, "b": 0.6 + 0.5 + 0.0, "c": 0.0, "d": 1.0})
+
+
+@pytest.mark.parametrize("fusion", ["rrf", "weighted"])
+def test_weights_are_relative(fusion):
+    weights = {"bm25": 1.0, "tfidf": 0.5, "vector": 2.0}
+    scaled_weights = {source: 10 * weight for source, weight in weights.items()}
+    base = fuse_rankings(RANKINGS, settings(fusion=fusion, weights=weights, min_relative_score=0.5))
+    scaled = fuse_rankings(RANKINGS, settings(fusion=fusion, weights=scaled_weights, min_relative_score=0.5))
+    assert [candidate_id for candidate_id, _ in scaled] == [candidate_id for candidate_id, _ in base]
+    assert [score for _, score in scaled] == pytest.approx([10 * score for _, score in base])
+
+
+@pytest.mark.parametrize("fusion", ["rrf", "weighted"])
+def test_ties_keep_first_seen_order(fusion):
+    # x and y swap places between two equally weighted sources, so they tie
+    rankings = {"bm25": [("x", 2.0), ("y", 1.0)], "vector": [("y", 2.0), ("x", 1.0)]}
+    fused = fuse_rankings(rankings, settings(fusion=fusion, weights={"tfidf": 0.0}))
+    assert [candidate_id for candidate_id, _ in fused] == ["x", "y"]
+    assert fused[0][1] == pytest.approx(fused[1][1])
+
+
+def test_zero_weight_source_adds_nothing_and_cut_offs_apply():
+    fused = fuse_rankings(RANKINGS, settings(fusion="weighted", weights={"vector": 0.0}, max_candidates=3))
+    assert [candidate_id for candidate_id, _ in fused] == ["b", "a", "c"]
+    assert dict(fused)["b"] == pytest.approx(1.6)
+    relative = fuse_rankings(RANKINGS, settings(fusion="weighted", weights={"vector": 0.0}, min_relative_score=0.5))
+    assert [candidate_id for candidate_id, _ in relative] == ["b", "a"]
+
+
+def test_unknown_fusion_method_is_rejected():
+    with pytest.raises(ValueError):
+        settings(fusion="borda")
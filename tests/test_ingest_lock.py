@@ -0,0 +1,12 @@
+import pytest
+
+from utils.ingest_lock import IngestLock
+
+
+def test_second_writer_waits_for_the_lock(tmp_path):
+    path = str(tmp_path / "ingest.lock")
+    with IngestLock(path):
+        with pytest.raises(TimeoutError):
+            IngestLock(path, timeout=0.2).acquire()
+    with IngestLock(path, timeout=0.2):
+        pass
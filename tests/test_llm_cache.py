@@ -0,0 +1,73 @@
+import pytest
+
+import utils.llm_cache as llm_cache
+from utils.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the time the cache sees."""
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def make_cache(tmp_path, monkeypatch):
+    caches = []
+    monkeypatch.setattr(LLMResponseCache, "EVICT_EVERY", 1)  # evict on every write
+
+    def make(**kwargs):
+        cache = LLMResponseCache(str(tmp_path / "llm_cache.db"), **kwargs)
+        caches.append(cache)
+        return cache
+    yield make
+    for cache in caches:
+        cache.conn.close()
+
+
+def test_entries_expire_after_ttl(make_cache, clock):
+    cache = make_cache(ttl_seconds=60)
+    cache.set("a", {"answer": 1})
+    clock[0] += 59
+    assert cache.get("a") == {"answer": 1}
+    clock[0] += 2
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entries_are_evicted_beyond_max_entries(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.set("a", "first")
+    clock[0] += 1
+    cache.set("b", "second")
+    clock[0] += 1
+    assert cache.get("a") == "first"  # now b is the least recently used
+    clock[0] += 1
+    cache.set("c", "third")
+    assert cache.get("b") is None
+    assert cache.get("a") == "first" and cache.get("c") == "third"
+
+
+def test_least_recently_used_entries_are_evicted_beyond_max_bytes(make_cache, clock):
+    cache = make_cache(max_entries=0, max_bytes=250)
+    for key in "abc":
+        clock[0] += 1
+        cache.set(key, "x" * 100)  # 102 bytes of JSON each
+    assert cache.get("a") is None
+    assert cache.get("b") is not None and cache.get("c") is not None
+    assert cache.stats()["bytes"] <= 250
+
+
+def test_keys_separate_model_prompt_content_and_parameters():
+    base = ("gpt-4o-mini", "Summarise this resume", "python developer", {"temperature": 0})
+    variants = [
+        ("gpt-4o", *base[1:]),
+        (base[0], "Expand this query", *base[2:]),
+        (*base[:2], "registered nurse", base[3]),
+        (*base[:3], {"temperature": 0, "max_completion_tokens": 100}),
+    ]
+    key = LLMResponseCache.make_key(*base)
+    assert LLMResponseCache.make_key(*base) == key
+    assert len({key, *(LLMResponseCache.make_key(*variant) for variant in variants)}) == 1 + len(variants)
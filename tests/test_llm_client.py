@@ -0,0 +1,208 @@
+import os
+import re
+import asyncio
+import threading
+
+import pytest
+
+import utils.llm_utils as llm_utils
+from benchmarks.llm_stub_server import start_in_thread
+from utils.async_llm_client import AsyncLLMClient
+from utils.llm_cache import LLMResponseCache
+from utils.llm_utils import LLMSession, build_async_client
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(**options):
+        server, base_url = start_in_thread(**options)
+        servers.append(server)
+        return server.state, base_url
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def prompts(tmp_path, monkeypatch):
+    """load_prompt reads prompts/ from the working directory."""
+    monkeypatch.chdir(tmp_path)
+    os.symlink(os.path.join(PROJECT_ROOT, "prompts"), tmp_path / "prompts")
+
+
+def stub_config(base_url, **client):
+    return {"openai_base_url": base_url, "openai_api_key": "stub-key", "llm_cache": {"enabled": False},
+            "llm_client": {"backoff_base": 0.01, "backoff_max": 0.05, **client}}
+
+
+def test_retries_rate_limits_and_server_errors(stub, prompts):
+    state, base_url = stub(rate_limit_every=3, retry_after=0.01, error_rate=0.2, seed=7)
+    queries = [f"python developer {i}" for i in range(20)]
+
+    async def expand_all():
+        async with build_async_client(stub_config(base_url, max_retries=10)) as client:
+            results = await llm_utils.expand_queries_async(client, queries)
+            return results, client.retries
+    results, retries = asyncio.run(expand_all())
+
+    assert [result["expanded_query"] for result in results] == queries
+    assert state.rate_limited and state.errors
+    assert retries == state.rate_limited + state.errors
+    assert state.requests == len(queries) + retries
+
+
+def test_backoff_honours_retry_after_and_jitter_bound():
+    class Response:
+        def __init__(self, headers):
+            self.headers = headers
+
+    class Error(Exception):
+        def __init__(self, headers=None):
+            self.response = Response(headers) if headers is not None else None
+
+    client = AsyncLLMClient.__new__(AsyncLLMClient)
+    client.backoff_base, client.backoff_max = 0.5, 4.0
+    assert client._backoff(3, Error({"retry-after": "2.5"})) == 2.5
+    for attempt in range(8):
+        delays = [client._backoff(attempt, Error()) for _ in range(50)]
+        assert all(0 <= delay <= min(4.0, 0.5 * 2 ** attempt) for delay in delays)
+
+
+def test_response_cache_is_used_off_the_event_loop(stub, prompts, tmp_path):
+    state, base_url = stub()
+    threads = []
+
+    class RecordingCache(LLMResponseCache):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+        def set(self, key, response):
+            threads.append(threading.current_thread())
+            super().set(key, response)
+
+    async def expand_twice():
+        cache = RecordingCache(str(tmp_path / "cache.db"))
+        async with AsyncLLMClient("stub-key", base_url=base_url, cache=cache) as client:
+            first = await llm_utils.expand_query_async(client, "python developer")
+            second = await llm_utils.expand_query_async(client, "python developer")
+            return first, second, threading.current_thread()
+    first, second, loop_thread = asyncio.run(expand_twice())
+
+    assert first == second and state.requests == 1
+    assert len(threads) == 3  # miss, store, hit
+    assert loop_thread not in threads
+
+
+def test_session_limits_concurrency_across_threads(stub, prompts):
+    state, base_url = stub(latency=0.05)
+    session = LLMSession(stub_config(base_url, max_concurrency=3))
+    results = []
+
+    def expand(offset):
+        results.extend(session.expand_queries([f"query {offset + i}" for i in range(10)]))
+    try:
+        threads = [threading.Thread(target=expand, args=(offset,)) for offset in (0, 100)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        client = session.client
+        assert session.expand_query("one more")["expanded_query"] == "one more"
+        assert session.client is client
+    finally:
+        session.close()
+
+    assert len(results) == 20
+    assert state.requests == 21
+    assert 1 < state.max_in_flight <= 3
+
+
+def test_pipeline_searches_share_one_client(stub, prompts, make_pipeline, tmp_path, monkeypatch):
+    from tests.test_search_pipeline import ROLES, write_resumes
+    state, base_url = stub()
+    csv_path = str(tmp_path / "resumes.csv")
+    write_resumes(csv_path, ROLES)
+    pipeline = make_pipeline(stub_config(base_url))
+    pipeline.ingest(csv_path=csv_path)
+
+    def no_config_json():
+        raise AssertionError("the pipeline's config must be used, not config.json")
+    monkeypatch.setattr(llm_utils, "load_config", no_config_json)
+    try:
+        first = pipeline.search("python developer", limit=2)
+        client = pipeline.llm.client
+        second = pipeline.search("registered nurse", limit=2)
+        batch = pipeline.search_batch(["java engineer", "data analyst"], limit=2)
+        assert pipeline.llm.client is client
+    finally:
+        pipeline.close()
+
+    for result in [first, second, *batch["results"]]:
+        assert result["candidates"]
+        assert all(candidate["Summary"].startswith("Stub summary") for candidate in result["candidates"])
+    assert state.requests > 4  # one expansion per query plus the summaries
+
+
+class ScriptedClient:
+    """
+    Stands in for AsyncLLMClient in summary tests: batched requests are answered by
+    batch_reply(candidate IDs in the request), single ones with a summary of the resume text.
+    """
+
+    def __init__(self, batch_reply):
+        self.batch_reply = batch_reply
+        self.requests = []
+
+    async def send_request(self, content, prompt, file_type="text", temperature=0, max_completion_tokens=2048):
+        candidate_ids = re.findall(r"Candidate ID: (\S+)", content)
+        self.requests.append(candidate_ids or "single")
+        if candidate_ids:
+            return self.batch_reply(candidate_ids)
+        resume = content.split("Resume:\n", 1)[1].split("\n\nRecruiter Query:", 1)[0]
+        return {"ranked_candidates": [{"summary": f"Single summary of {resume}"}]}
+
+
+def summarise(client, n_candidates):
+    candidates = [{"CandidateID": f"c{i}", "Name": f"Candidate {i}", "ResumeText": f"resume {i}"}
+                  for i in range(n_candidates)]
+    asyncio.run(llm_utils.generate_summaries_async(candidates, "python developer", client=client,
+                                                   batching={"max_candidates": 10}, config={}))
+    return {candidate["CandidateID"]: candidate["Summary"] for candidate in candidates}
+
+
+def test_batched_summaries_are_mapped_back_by_candidate_id(prompts):
+    def reply(candidate_ids):
+        # Out of order, with padded IDs
+        return {"ranked_candidates": [{"candidate_id": f" {cid} ", "summary": f"Batch summary of {cid}"}
+                                      for cid in reversed(candidate_ids)]}
+    client = ScriptedClient(reply)
+    summaries = summarise(client, 4)
+    assert summaries == {f"c{i}": f"Batch summary of c{i}" for i in range(4)}
+    assert client.requests == [["c0", "c1", "c2", "c3"]]
+
+
+@pytest.mark.parametrize("reply, covered", [
+    # c1 is missing; an unknown ID, a duplicate and an empty summary are ignored
+    (lambda ids: {"ranked_candidates": [
+        {"candidate_id": "c0", "summary": "Batch summary of c0"},
+        {"candidate_id": "c9", "summary": "Batch summary of c9"},
+        {"candidate_id": "c0", "summary": "second summary of c0"},
+        {"candidate_id": "c2", "summary": " "},
+        "not an entry",
+    ]}, {"c0"}),
+    (lambda ids: {"error": "Failed to parse JSON response"}, set()),
+    (lambda ids: {"ranked_candidates": "not a list"}, set()),
+    (lambda ids: ["not", "a", "dict"], set()),
+])
+def test_candidates_missing_from_a_malformed_batch_are_summarised_alone(prompts, reply, covered):
+    client = ScriptedClient(reply)
+    summaries = summarise(client, 3)
+    assert summaries == {f"c{i}": f"Batch summary of c{i}" if f"c{i}" in covered
+                         else f"Single summary of resume {i}" for i in range(3)}
+    assert client.requests == [["c0", "c1", "c2"]] + ["single"] * (3 - len(covered))
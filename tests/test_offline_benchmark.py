@@ -0,0 +1,25 @@
+import os
+import json
+
+import utils.llm_utils as llm_utils
+from benchmarks import offline_benchmark
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_offline_benchmark_runs_without_config_json(tmp_path, monkeypatch):
+    def no_config_json():
+        raise AssertionError("the benchmark must not read config.json")
+    monkeypatch.setattr(llm_utils, "load_config", no_config_json)
+    monkeypatch.chdir(PROJECT_ROOT)  # the benchmark runs from the project root
+    output = tmp_path / "results.json"
+
+    offline_benchmark.main(["--rows", "300", "--queries", "3", "--k", "5", "--llm-latency", "0",
+                            "--embeddings", "hashing", "--reranker", "none",
+                            "--corpus", str(tmp_path / "corpus.csv"), "--output", str(output)])
+
+    results = json.loads(output.read_text())
+    assert results["ingestion"]["candidates"] == 300
+    assert results["llm_requests"] > 3
+    assert {"expand", "summaries", "total"} <= set(results["query_latency_ms"])
+    assert 0 <= results["recall"]["mean"] <= 1
@@ -0,0 +1,133 @@
+import logging
+
+import numpy as np
+import pytest
+
+from database.db_manager import DBManager
+from vectordb.precomputed_filter import (LexicalIndex, get_precomputed_indices, compute_indices,
+                                         update_precomputed_indices)
+
+LOGGER = logging.getLogger("test")
+
+
+class CountingDB(DBManager):
+    """DBManager that records which resume texts were read."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetched = []
+
+    def get_resume_text_pairs(self, candidate_ids):
+        candidate_ids = list(candidate_ids)
+        self.fetched.extend(candidate_ids)
+        return super().get_resume_text_pairs(candidate_ids)
+
+
+def insert(db_manager, texts):
+    db_manager.insert_candidates_bulk([{"CandidateID": f"id{i}", "Name": "", "ResumeText": text}
+                                       for i, text in texts.items()])
+
+
+def test_stored_index_loads_without_reading_texts(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db_manager = CountingDB(str(tmp_path / "resumes.db"))
+    insert(db_manager, {0: "python developer", 1: "java engineer", 2: "nurse"})
+    assert len(get_precomputed_indices(db_manager, LOGGER)) == 3
+    assert sorted(db_manager.fetched) == ["id0", "id1", "id2"]
+
+    db_manager.fetched.clear()
+    assert len(get_precomputed_indices(db_manager, LOGGER)) == 3
+    assert db_manager.fetched == []
+
+
+def test_only_new_texts_are_read_when_resumes_are_added(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db_manager = CountingDB(str(tmp_path / "resumes.db"))
+    insert(db_manager, {0: "python developer", 1: "java engineer"})
+    get_precomputed_indices(db_manager, LOGGER)
+
+    db_manager.fetched.clear()
+    insert(db_manager, {2: "python data scientist"})
+    lexical_index = get_precomputed_indices(db_manager, LOGGER)
+    assert db_manager.fetched == ["id2"]
+
+    rebuilt = compute_indices(lexical_index.doc_ids, db_manager.get_resume_texts(lexical_index.doc_ids), LOGGER)
+    np.testing.assert_allclose(lexical_index.bm25_scores("python"), rebuilt.bm25_scores("python"))
+
+
+def lexical_index_of(n_docs):
+    from vectordb.precomputed_filter import LexicalIndex
+    lexical_index = LexicalIndex()
+    lexical_index.add_documents([f"id{i}" for i in range(n_docs)],
+                                [f"resume {i} skill{i % 7} python" for i in range(n_docs)])
+    return lexical_index
+
+
+def test_texts_stay_aligned_when_added_candidates_are_missing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db_manager = CountingDB(str(tmp_path / "resumes.db"))
+    insert(db_manager, {0: "python developer", 2: "registered nurse", 3: "java engineer"})
+    lexical_index = compute_indices([], [], LOGGER)
+
+    # id1 was deleted before the index caught up; id2's text must not be filed under it
+    updated = update_precomputed_indices(lexical_index, db_manager, LOGGER, added_ids=["id0", "id1", "id2", "id3"],
+                                         save=False)
+    assert updated.doc_ids == ["id0", "id2", "id3"]
+    assert updated.doc_ids[int(np.argmax(updated.bm25_scores("nurse")))] == "id2"
+
+    with pytest.raises(ValueError):
+        LexicalIndex().add_documents(["id0", "id1"], ["python developer"])
+
+
+def test_concurrent_saves_and_loads_see_whole_versions(tmp_path):
+    import threading
+    from vectordb.precomputed_filter import load_precomputed_indices, save_precomputed_indices
+    path = str(tmp_path / "precomputed_filter")
+    save_precomputed_indices(lexical_index_of(1), LOGGER, path=path)
+    errors, loaded = [], []
+
+    def save(offset):
+        try:
+            for n_docs in range(offset, offset + 10):
+                save_precomputed_indices(lexical_index_of(n_docs), LOGGER, path=path)
+        except Exception as e:
+            errors.append(e)
+
+    def load():
+        try:
+            for _ in range(40):
+                loaded.append(load_precomputed_indices(LOGGER, path=path))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(offset,)) for offset in (2, 20)]
+    threads += [threading.Thread(target=load) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    for lexical_index in loaded:
+        # Arrays and document IDs always come from the same version
+        n_docs = len(lexical_index)
+        assert lexical_index is not None and len(lexical_index.terms.doc_lengths) == n_docs
+        assert lexical_index.bm25_scores("python").shape == (n_docs,)
+
+
+def test_old_versions_are_removed_and_legacy_layout_loads(tmp_path, monkeypatch):
+    import os
+    import vectordb.precomputed_filter as precomputed_filter
+    path = tmp_path / "precomputed_filter"
+    precomputed_filter.save_precomputed_indices(lexical_index_of(3), LOGGER, path=str(path))
+    # Directories written before versioned saves hold the files directly
+    version = (path / precomputed_filter.PRECOMPUTED_POINTER).read_text()
+    legacy = tmp_path / "legacy"
+    os.rename(path / version, legacy)
+    assert len(precomputed_filter.load_precomputed_indices(LOGGER, path=str(legacy))) == 3
+
+    monkeypatch.setattr(precomputed_filter, "STALE_VERSION_SECONDS", -1)
+    for n_docs in (4, 5, 6):
+        precomputed_filter.save_precomputed_indices(lexical_index_of(n_docs), LOGGER, path=str(legacy))
+    assert precomputed_filter.PRECOMPUTED_POINTER in os.listdir(legacy)
+    assert len(os.listdir(legacy)) == 3  # the pointer, the published and the previous version
+    assert len(precomputed_filter.load_precomputed_indices(LOGGER, path=str(legacy))) == 6
@@ -0,0 +1,74 @@
+import pytest
+
+from utils.reranker import CompositeReranker, CrossEncoderReranker, LLMReranker, Reranker
+
+
+class WordOverlapModel:
+    """Stands in for a CrossEncoder: scores a pair by the query words found in the resume."""
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        return [len(set(query.split()) & set(resume.split())) for query, resume in pairs]
+
+
+class NoCompaction:
+    def compact(self, text, query, token_budget, candidate_id=None):
+        return text
+
+
+class ReversingSession:
+    """Stands in for LLMSession: ranks the candidates it is sent in reverse order."""
+
+    def __init__(self):
+        self.requests = []
+
+    def rerank_results(self, query, resume_ids, resumes=None, compactor=None, token_budget=None):
+        self.requests.append(list(resume_ids))
+        return list(reversed(resume_ids))
+
+
+def cross_encoder():
+    reranker = CrossEncoderReranker.__new__(CrossEncoderReranker)
+    reranker.model, reranker.batch_size, reranker.token_budget = WordOverlapModel(), 32, 400
+    reranker.compactor = NoCompaction()
+    return reranker
+
+
+def make_candidates(*texts):
+    return [{"CandidateID": f"c{i}", "Name": f"Candidate {i}", "ResumeText": text} for i, text in enumerate(texts)]
+
+
+def ids(candidates):
+    return [candidate["CandidateID"] for candidate in candidates]
+
+
+def test_reranker_requires_rerank():
+    class Incomplete(Reranker):
+        pass
+    with pytest.raises(TypeError):
+        Reranker()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_cross_encoder_reorders_by_score_keeping_ties_in_order():
+    candidates = make_candidates("java engineer", "python developer", "registered nurse", "python sql developer")
+    reranked = cross_encoder().rerank("python sql developer", candidates)
+    assert ids(reranked) == ["c3", "c1", "c0", "c2"]
+    assert [candidate["RerankScore"] for candidate in reranked] == [3.0, 2.0, 0.0, 0.0]
+
+
+def test_llm_pass_only_reorders_the_top_k():
+    session = ReversingSession()
+    candidates = make_candidates(*[f"resume {i}" for i in range(6)])
+    reranked = LLMReranker(top_k=3, session=session).rerank("python", candidates)
+    assert session.requests == [["c0", "c1", "c2"]]
+    assert ids(reranked) == ["c2", "c1", "c0", "c3", "c4", "c5"]
+
+
+def test_composite_applies_stages_in_order():
+    session = ReversingSession()
+    candidates = make_candidates("nurse", "python", "python developer", "java")
+    reranker = CompositeReranker([cross_encoder(), LLMReranker(top_k=2, session=session)])
+    reranked = reranker.rerank("python developer", candidates)
+    assert session.requests == [["c2", "c1"]]
+    assert ids(reranked) == ["c1", "c2", "c0", "c3"]
@@ -0,0 +1,109 @@
+import logging
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from utils.resume_indexer import CSV_RESUME_COLUMNS
+from vectordb.precomputed_filter import compute_indices
+
+ROLES = ["python developer", "java engineer", "registered nurse", "data analyst with sql", "python data scientist"]
+
+
+def write_resumes(path, roles):
+    pd.DataFrame([{column: f"{role} {column}" for column in CSV_RESUME_COLUMNS} for role in roles]).to_csv(
+        path, index=False)
+
+
+def record_calls(monkeypatch, obj, name, calls):
+    method = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append((name, [list(arg) for arg in args]))
+        return method(*args, **kwargs)
+    monkeypatch.setattr(obj, name, wrapper)
+
+
+def test_ingest_refreshes_with_only_the_new_resumes(make_pipeline, tmp_path, monkeypatch):
+    csv_path = str(tmp_path / "resumes.csv")
+    write_resumes(csv_path, ROLES[:3])
+    pipeline = make_pipeline()
+    assert pipeline.ingest(csv_path=csv_path)["candidates"] == 3
+
+    calls = []
+    for name in ("get_all_candidates", "get_all_candidate_ids", "get_resume_text_pairs"):
+        record_calls(monkeypatch, pipeline.db_manager, name, calls)
+    write_resumes(csv_path, ROLES)
+    result = pipeline.ingest(csv_path=csv_path)
+    assert result["added_csv"] == 2 and result["candidates"] == 5
+    assert [name for name, _ in calls] == ["get_resume_text_pairs"]
+    assert len(calls[0][1][0]) == 2
+
+    lexical_index = pipeline.lexical_index
+    rebuilt = compute_indices(lexical_index.doc_ids, pipeline.db_manager.get_resume_texts(lexical_index.doc_ids),
+                              logging.getLogger("test"), pipeline.analyzer)
+    for query in ("python", "sql nurse"):
+        np.testing.assert_allclose(lexical_index.bm25_scores(query), rebuilt.bm25_scores(query))
+        np.testing.assert_allclose(lexical_index.tfidf_scores(query), rebuilt.tfidf_scores(query))
+
+
+def test_remove_drops_resumes_from_every_index(make_pipeline, tmp_path):
+    csv_path = str(tmp_path / "resumes.csv")
+    write_resumes(csv_path, ROLES)
+    pipeline = make_pipeline()
+    pipeline.ingest(csv_path=csv_path)
+    found = pipeline.search("python", expand=False, summarize=False, limit=5)["candidates"]
+    removed = found[0]["CandidateID"]
+
+    assert pipeline.remove([removed]) == 1
+    assert removed not in pipeline.lexical_index.doc_ids
+    assert removed not in pipeline.vector_index
+    remaining = pipeline.search("python", expand=False, summarize=False, limit=5)["candidates"]
+    assert removed not in {candidate["CandidateID"] for candidate in remaining}
+
+    # A restarted pipeline loads the saved indices as they are
+    assert make_pipeline().lexical_index.doc_ids == pipeline.lexical_index.doc_ids
+
+
+def test_ingest_picks_up_another_writers_resumes(make_pipeline, tmp_path):
+    first_csv, second_csv = str(tmp_path / "first.csv"), str(tmp_path / "second.csv")
+    write_resumes(first_csv, ROLES[:3])
+    write_resumes(second_csv, ROLES[3:])
+    server, ingester = make_pipeline(), make_pipeline()  # e.g. server.py and ingest.py
+    server.ingest(csv_path=first_csv)
+    ingester.ingest(csv_path=second_csv)
+
+    write_resumes(first_csv, ROLES[:3] + ["registered nurse manager"])
+    assert server.ingest(csv_path=first_csv)["candidates"] == 6
+    assert len(server.vector_index) == 6
+    assert ingester.vector_index.reload_if_changed() and len(ingester.vector_index) == 6
+    found = server.search("data analyst sql", expand=False, summarize=False, limit=1)["candidates"]
+    assert "data analyst with sql" in found[0]["ResumeText"]
+
+
+def test_pipeline_reembeds_after_an_encoder_change(make_pipeline, tmp_path, encoder, monkeypatch):
+    csv_path = str(tmp_path / "resumes.csv")
+    write_resumes(csv_path, ROLES)
+    make_pipeline().ingest(csv_path=csv_path)
+
+    monkeypatch.setattr(encoder, "dimension", 768)
+    monkeypatch.setattr(encoder, "cache_key", "word-hash-768")
+    pipeline = make_pipeline({"reembed_on_encoder_change": True})
+    assert pipeline.vector_index.index.d == 768 and len(pipeline.vector_index) == len(ROLES)
+    found = pipeline.search("registered nurse", expand=False, summarize=False, limit=1)["candidates"]
+    assert "registered nurse" in found[0]["ResumeText"]
+
+
+def test_startup_does_not_save_indices_while_another_writer_holds_the_lock(make_pipeline, tmp_path):
+    from utils.ingest_lock import IngestLock
+    csv_path = str(tmp_path / "resumes.csv")
+    write_resumes(csv_path, ROLES)
+    make_pipeline().ingest(csv_path=csv_path)
+    shutil.rmtree(tmp_path / "precomputed_filter")
+
+    with IngestLock(str(tmp_path / "ingest.lock")):  # e.g. ingest.py is running
+        pipeline = make_pipeline()
+        assert len(pipeline.lexical_index) == len(ROLES)
+        assert not (tmp_path / "precomputed_filter").exists()
+    make_pipeline()
+    assert (tmp_path / "precomputed_filter" / "CURRENT").exists()
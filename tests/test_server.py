@@ -0,0 +1,84 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from server import QueryServer
+from tests.test_search_pipeline import ROLES, write_resumes
+
+
+@pytest.fixture
+def served_pipeline(make_pipeline, tmp_path):
+    """Yields (base URL, pipeline) of a running QueryServer."""
+    (tmp_path / "resumes").mkdir()
+    csv_path = str(tmp_path / "resumes" / "resumes.csv")
+    write_resumes(csv_path, ROLES)
+    config = {"csv_path": csv_path, "pdf_folder": str(tmp_path / "resumes"), "server_max_limit": 10}
+    pipeline = make_pipeline(config, shared=True)  # as server.py builds it
+    pipeline.ingest(csv_path=csv_path)
+    server = QueryServer(("127.0.0.1", 0), pipeline, config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", pipeline
+    server.shutdown()
+    server.server_close()
+    pipeline.close()
+
+
+@pytest.fixture
+def server(served_pipeline):
+    return served_pipeline[0]
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, json.dumps(payload).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.mark.parametrize("limit", [0, -1, 11, 2.5, "3", True, [1]])
+def test_search_rejects_invalid_limits(server, limit):
+    status, body = post(f"{server}/search", {"query": "python", "expand": False, "summarize": False,
+                                              "limit": limit})
+    assert status == 400 and "limit" in body["error"]
+
+
+def test_search_rejects_non_boolean_flags(server):
+    for field in ("expand", "summarize", "include_resume"):
+        for value in ("false", 0, None, [False]):
+            status, body = post(f"{server}/search", {"query": "python", "expand": False, "summarize": False,
+                                                      field: value})
+            assert status == 400 and field in body["error"], (field, value)
+
+
+def test_unexpected_errors_are_logged_but_not_returned(served_pipeline, monkeypatch, caplog):
+    server, pipeline = served_pipeline
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database is at /secret/path/resumes.db")
+    monkeypatch.setattr(pipeline, "search", fail)
+    status, body = post(f"{server}/search", {"query": "python"})
+    assert status == 500 and body == {"error": "Internal server error"}
+    assert "/secret/path" in caplog.text
+
+
+def test_search_accepts_valid_limit(server):
+    status, body = post(f"{server}/search", {"query": "python", "expand": False, "summarize": False, "limit": 2})
+    assert status == 200 and len(body["candidates"]) == 2
+
+
+def test_ingest_is_restricted_to_configured_folders(server, tmp_path):
+    outside = tmp_path / "elsewhere.csv"
+    write_resumes(str(outside), ROLES)
+    for payload in ({"csv_path": str(outside)}, {"pdf_folder": "/"},
+                    {"pdf_folder": str(tmp_path / "resumes" / ".." / "..")}):
+        status, body = post(f"{server}/ingest", payload)
+        assert status == 403, payload
+    assert post(f"{server}/ingest", {"csv_path": 3})[0] == 400
+    status, body = post(f"{server}/ingest", {"pdf_folder": None})
+    assert status == 200 and body["candidates"] == len(ROLES)
@@ -0,0 +1,16 @@
+from utils.tracing import Tracer
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer(enabled=False)
+    with tracer.span("search"):
+        pass
+    tracer.increment("llm_requests_total")
+    tracer.observe("llm_request_seconds", 0.2)
+    assert tracer.prometheus().strip() == ""
+
+
+def test_enabled_tracer_records_histograms():
+    tracer = Tracer()
+    tracer.observe("llm_request_seconds", 0.2)
+    assert "llm_request_seconds_count 1" in tracer.prometheus()
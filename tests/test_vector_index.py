@@ -0,0 +1,158 @@
+import json
+import sqlite3
+
+import faiss
+import numpy as np
+import pytest
+
+from tests.conftest import WordHashEncoder
+from vectordb.vector_index import EncoderMismatchError, VectorIndex, vector_id
+
+
+@pytest.fixture
+def make_index(tmp_path, encoder):
+    def make(**kwargs):
+        kwargs.setdefault("encoder", encoder)
+        return VectorIndex(index_path=str(tmp_path / "faiss.index"), mapping_path=str(tmp_path / "vector_ids.db"),
+                           **kwargs)
+    return make
+
+
+def mapping_size(vector_index):
+    return vector_index.mapping.execute('SELECT COUNT(*) FROM vector_ids').fetchone()[0]
+
+
+def test_duplicate_ids_in_one_batch_keep_the_last_vector(make_index, encoder):
+    vector_index = make_index()
+    vector_index.add_candidates(["a", "b", "a"], ["python developer", "java engineer", "registered nurse"])
+    assert len(vector_index) == mapping_size(vector_index) == 2
+    nearest = vector_index.search_scored("registered nurse", top_n=1)
+    assert nearest[0][0] == "a"
+
+
+def test_failed_faiss_add_leaves_index_and_mapping_unchanged(make_index):
+    vector_index = make_index()
+    vector_index.add_candidates(["a"], ["python developer"])
+    with pytest.raises(AssertionError):
+        vector_index.add_candidates(["b", "c"], ["x", "y"], embeddings=np.zeros((2, 8), dtype='float32'))
+    assert len(vector_index) == mapping_size(vector_index) == 1
+    assert "b" not in vector_index
+
+
+def test_failed_mapping_insert_does_not_touch_faiss(make_index):
+    vector_index = make_index()
+    vector_index.add_candidates(["a"], ["python developer"])
+    # Another CandidateID already holds "b"'s vector ID
+    with vector_index.mapping:
+        vector_index.mapping.execute('INSERT INTO vector_ids VALUES (?, ?)', (vector_id("b"), "other"))
+    with pytest.raises(sqlite3.IntegrityError):
+        vector_index.add_candidates(["b"], ["java engineer"])
+    assert len(vector_index) == 1
+    assert mapping_size(vector_index) == 2
+
+
+def test_legacy_index_is_migrated_from_its_own_directory(tmp_path, monkeypatch, encoder):
+    index_dir = tmp_path / "data"
+    index_dir.mkdir()
+    legacy = faiss.IndexFlatL2(encoder.dimension)
+    legacy.add(encoder.encode(["python developer", "java engineer"]))
+    faiss.write_index(legacy, str(index_dir / "faiss.index"))
+    (index_dir / "candidate_ids.json").write_text(json.dumps(["a", "b"]))
+    monkeypatch.chdir(tmp_path)
+
+    vector_index = VectorIndex(index_path=str(index_dir / "faiss.index"),
+                               mapping_path=str(index_dir / "vector_ids.db"), encoder=encoder)
+    assert len(vector_index) == 2
+    assert vector_index.known_ids(["a", "b"]) == {"a", "b"}
+
+
+@pytest.mark.parametrize("top_n, n_allowed", [(10, 40), (10, 5), (3, 3)])
+def test_filtered_hnsw_search_returns_enough_results(make_index, top_n, n_allowed):
+    vector_index = make_index(index_type="hnsw", ef_search=4, exact_subset_limit=2)
+    texts = [f"resume {i} skill{i % 17} area{i % 5}" for i in range(2000)]
+    candidate_ids = [f"id{i}" for i in range(len(texts))]
+    vector_index.add_candidates(candidate_ids, texts)
+    vector_index.rebuild()
+    assert type(faiss.downcast_index(faiss.downcast_index(vector_index.index).index)).__name__ == "IndexHNSWFlat"
+
+    allowed_ids = candidate_ids[::len(texts) // n_allowed][:n_allowed]
+    results = vector_index.search_scored("skill3 area2", top_n=top_n, allowed_ids=allowed_ids)
+    assert len(results) == min(top_n, len(allowed_ids))
+    assert {candidate_id for candidate_id, _ in results} <= set(allowed_ids)
+    distances = [distance for _, distance in results]
+    assert distances == sorted(distances)
+
+    vector_index.exact_subset_limit = len(texts)
+    exact = vector_index.search_scored("skill3 area2", top_n=top_n, allowed_ids=allowed_ids)
+    np.testing.assert_allclose(distances, [distance for _, distance in exact], rtol=1e-4, atol=1e-5)
+
+
+def test_save_refuses_to_overwrite_another_writers_index(make_index):
+    server, ingester = make_index(), make_index()
+    ingester.add_candidates(["a", "b"], ["python developer", "java engineer"])
+    server.add_candidates(["c"], ["registered nurse"], persist=False)
+    with pytest.raises(RuntimeError):
+        server.save()
+
+    assert server.reload_if_changed()
+    assert len(server) == 2 and not server.reload_if_changed()
+    server.add_candidates(["c"], ["registered nurse"])
+    assert ingester.reload_if_changed()
+    assert len(ingester) == 3
+    assert ingester.search_scored("registered nurse", top_n=1)[0][0] == "c"
+
+
+class Hash768Encoder(WordHashEncoder):
+    model_name = cache_key = "word-hash-768"
+    dimension = 768
+
+
+def test_dimension_comes_from_the_encoder(make_index):
+    vector_index = make_index(encoder=Hash768Encoder())
+    vector_index.add_candidates(["a", "b"], ["python developer", "java engineer"])
+    assert vector_index.index.d == 768
+    assert vector_index.search_scored("java engineer", top_n=1)[0][0] == "b"
+
+
+def test_index_built_with_another_encoder_is_refused_or_reembedded(make_index):
+    make_index().add_candidates(["a", "b"], ["python developer", "java engineer"])
+    with pytest.raises(EncoderMismatchError):
+        make_index(encoder=Hash768Encoder())
+
+    vector_index = make_index(encoder=Hash768Encoder(), on_encoder_change="reset")
+    assert vector_index.needs_reembed and len(vector_index) == mapping_size(vector_index) == 0
+    vector_index.reembed(["a", "b"], ["python developer", "java engineer"])
+    assert vector_index.stored_encoder() == "word-hash-768" and len(vector_index) == 2
+    assert not make_index(encoder=Hash768Encoder()).needs_reembed
+
+
+def test_hnsw_removals_are_tombstoned_until_compaction(make_index):
+    vector_index = make_index(index_type="hnsw", max_deleted_ratio=0.2)
+    texts = [f"resume {i} skill{i % 17} area{i % 5}" for i in range(200)]
+    candidate_ids = [f"id{i}" for i in range(len(texts))]
+    vector_index.add_candidates(candidate_ids, texts)
+    vector_index.rebuild()
+    graph = vector_index.index
+
+    # Upserts and removals relabel graph nodes instead of rebuilding the graph
+    vector_index.upsert("id0", "registered nurse")
+    vector_index.remove(["id1", "id2"])
+    assert vector_index.index is graph
+    assert len(vector_index) == mapping_size(vector_index) == 198
+    assert vector_index.search("registered nurse", top_n=1) == ["id0"]
+    results = vector_index.search("resume 1 skill1 area1", top_n=50)
+    assert len(results) == 50 and not {"id1", "id2"} & set(results)
+    assert vector_index.search_scored_batch(vector_index.encode_queries(["skill2 area2"]), top_n=5)[0]
+    assert "id2" not in [cid for cid, _ in vector_index.search_scored_batch(
+        vector_index.encode_queries(["resume 2 skill2 area2"]), top_n=5)[0]]
+
+    # Tombstones survive a reload
+    reloaded = make_index(index_type="hnsw", max_deleted_ratio=0.2)
+    assert len(reloaded) == 198
+    assert not {"id1", "id2"} & set(reloaded.search("skill1 area1", top_n=len(texts)))
+
+    # Past max_deleted_ratio of the nodes the graph is rebuilt from the live vectors
+    vector_index.remove(candidate_ids[3:45])
+    assert vector_index.index is not graph
+    assert vector_index.index.ntotal == len(vector_index) == mapping_size(vector_index) == 156
+    assert not set(candidate_ids[1:45]) & set(vector_index.search("skill1 area1", top_n=len(texts)))
@@ -0,0 +1,130 @@
+import re
+
+# Bump when the tokenization rules change so persisted lexical indices are rebuilt.
+ANALYZER_VERSION = 2
+
+# Multi-word skills that are indexed as a single term ("machine learning" -> "machine_learning").
+SKILL_PHRASES = [
+    "machine learning", "deep learning", "reinforcement learning", "transfer learning",
+    "natural language processing", "computer vision", "neural networks", "data science",
+    "data analysis", "data analytics", "data engineering", "data mining", "data visualization",
+    "big data", "business intelligence", "artificial intelligence", "software engineering",
+    "software development", "project management", "product management", "quality assurance",
+    "unit testing", "continuous integration", "continuous delivery", "power bi", "sql server",
+    "google cloud", "amazon web services", "spring boot", "ruby on rails", "react native",
+    "full stack", "front end", "back end", "supply chain", "customer service", "digital marketing",
+]
+
+# Terms whose punctuation is significant and must survive tokenization.
+SYMBOL_TERMS = [
+    "c++", "c#", "f#", ".net", "asp.net", "node.js", "vue.js", "react.js", "next.js", "d3.js",
+    "objective-c", "ci/cd", "tcp/ip", "pl/sql", "t-sql", "a/b",
+]
+
+# Skill names too short to survive the single-character filter on their own.
+SHORT_TERMS = ["r", "c", "c#", "c++", "go"]
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below
+between both but by can could did do does doing down during each few for from further had has have
+having he her here hers herself him himself his how i if in into is it its itself just me more most
+my myself no nor not now of off on once only or other our ours ourselves out over own same she should
+so some such than that the their theirs them themselves then there these they this those through to
+too under until up very was we were what when where which while who whom why will with would you your
+yours yourself yourselves
+""".split())
+
+
+class Analyzer:
+    """
+    Shared text analyzer for BM25, TF–IDF and query text.
+    Lowercases, keeps skill phrases and symbol terms (C++, .NET, CI/CD) as single tokens,
+    strips version suffixes from symbol and short terms (C++11 -> c++), strips remaining
+    punctuation, drops single-character tokens other than short skill terms (R, C), and
+    optionally removes stopwords and applies Porter stemming (requires nltk).
+    """
+
+    def __init__(self, remove_stopwords: bool = True, stem: bool = False,
+                 phrases: list = None, symbol_terms: list = None, short_terms: list = None):
+        self.remove_stopwords = remove_stopwords
+        self.stem = stem
+        self.phrases = sorted(phrases if phrases is not None else SKILL_PHRASES, key=len, reverse=True)
+        self.symbol_terms = sorted(symbol_terms if symbol_terms is not None else SYMBOL_TERMS, key=len, reverse=True)
+        self.short_terms = sorted(short_terms if short_terms is not None else SHORT_TERMS, key=len, reverse=True)
+        self._short_terms = frozenset(self.short_terms)
+
+        # Phrase words may be separated by whitespace, hyphens or underscores in the source text
+        phrase_patterns = [r"[\s\-_]+".join(map(re.escape, phrase.split())) for phrase in self.phrases]
+        self._phrase_re = re.compile(r"(?<!\w)(" + "|".join(phrase_patterns) + r")(?!\w)") if phrase_patterns else None
+        # Symbol and short terms match whole words only, optionally followed by a version
+        # number that is dropped ("c++11", "c99"); anything else falls through to \w+
+        symbol_patterns = [re.escape(term) for term in
+                           sorted(set(self.symbol_terms) | self._short_terms, key=len, reverse=True)]
+        self._token_re = re.compile(
+            (r"(?<![\w.#+])(" + "|".join(symbol_patterns) + r")(?:\d+(?:\.\d+)*)?(?![\w#+])|" if symbol_patterns else "")
+            + r"(\w+)"
+        )
+        self._stemmer = None
+        if stem:
+            from nltk.stem import PorterStemmer
+            self._stemmer = PorterStemmer()
+
+    @property
+    def settings(self) -> dict:
+        """
+        Constructor arguments that recreate this analyzer.
+        """
+        return {
+            "remove_stopwords": self.remove_stopwords,
+            "stem": self.stem,
+            "phrases": self.phrases,
+            "symbol_terms": self.symbol_terms,
+            "short_terms": self.short_terms,
+        }
+
+    @property
+    def signature(self) -> str:
+        """
+        Identifies the analyzer settings; indices built with a different signature are stale.
+        """
+        return (f"v{ANALYZER_VERSION};stopwords={self.remove_stopwords};stem={self.stem};"
+                f"phrases={'|'.join(self.phrases)};symbols={'|'.join(self.symbol_terms)};"
+                f"short={'|'.join(self.short_terms)}")
+
+    def __call__(self, text: str) -> list:
+        return self.analyze(text)
+
+    def analyze(self, text: str) -> list:
+        """
+        Convert text to a list of normalised terms.
+        """
+        text = text.lower()
+        if self._phrase_re is not None:
+            text = self._phrase_re.sub(lambda m: "_".join(re.split(r"[\s\-_]+", m.group(0))), text)
+        tokens = []
+        for symbol, word in self._token_re.findall(text):
+            token = symbol or word.strip("_")
+            if token in self._short_terms:
+                tokens.append(token)
+                continue
+            if len(token) < 2 or (self.remove_stopwords and token in STOPWORDS):
+                continue
+            if self._stemmer is not None and token.isalpha():
+                token = self._stemmer.stem(token)
+            tokens.append(token)
+        return tokens
+
+
+def get_analyzer(config: dict = None) -> Analyzer:
+    """
+    Build the analyzer from the "analyzer" section of config.json, e.g.
+    {"analyzer": {"remove_stopwords": true, "stem": false}}.
+    """
+    settings = (config or {}).get("analyzer", {})
+    return Analyzer(
+        remove_stopwords=settings.get("remove_stopwords", True),
+        stem=settings.get("stem", False),
+        phrases=settings.get("phrases"),
+        symbol_terms=settings.get("symbol_terms"),
+        short_terms=settings.get("short_terms"),
+    )
@@ -0,0 +1,147 @@
+import time
+import random
+import asyncio
+import logging
+
+from utils.llm_client import DEFAULT_MODEL, build_messages, cache_key_for, parse_completion
+from utils.tracing import TRACER
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class TokenBucket:
+    """
+    Asyncio token bucket: acquire() waits until a token is available. Tokens refill at `rate`
+    per second up to `capacity`, so short bursts are allowed but the sustained request rate
+    never exceeds `rate`.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def retry_after_seconds(error) -> float:
+    """
+    The delay requested by the server's Retry-After header, if any.
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class AsyncLLMClient:
+    """
+    Asyncio counterpart of send_openai_request built on one shared AsyncOpenAI client (and so
+    one HTTP connection pool). Requests are limited to max_concurrency in flight and, if
+    requests_per_second is set, by a token bucket. 429, 5xx, timeouts and connection errors
+    are retried with exponential backoff and full jitter, honouring Retry-After when the
+    server sends it. Responses have the same shape as send_openai_request and go through
+    the same response cache, which is read and written in worker threads.
+    """
+
+    def __init__(self, api_key, base_url=None, model=DEFAULT_MODEL, cache=None, max_concurrency: int = 8,
+                 requests_per_second: float = None, burst: float = None, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0, timeout: float = 60.0):
+        from openai import AsyncOpenAI  # deferred like the sync client's import
+        # Retries are handled here, with jitter and the shared rate limit, not by the SDK
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout)
+        self.model = model
+        self.cache = cache
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.bucket = TokenBucket(requests_per_second, burst) if requests_per_second else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retries = 0
+
+    def _backoff(self, attempt: int, error) -> float:
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        return delay
+
+    @staticmethod
+    def _retryable(error) -> bool:
+        from openai import APIConnectionError, APIStatusError, APITimeoutError
+        if isinstance(error, (APIConnectionError, APITimeoutError)):
+            return True
+        return isinstance(error, APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+    async def send_request(self, content, prompt, file_type="text", temperature=0, max_completion_tokens=2048):
+        """
+        Send one chat completion request and return the parsed response dict.
+        """
+        with TRACER.span("llm_request", file_type=file_type, model=self.model) as request_span:
+            cache_key = cache_key_for(self.cache, self.model, content, prompt, file_type, temperature,
+                                      max_completion_tokens)
+            if cache_key is not None:
+                # The cache is synchronous SQLite: keep its disk I/O off the event loop
+                cached = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached is not None:
+                    logging.info(f"OpenAI response served from cache for file_type: {file_type}")
+                    TRACER.record_llm_request(request_span, cache_hit=True)
+                    return cached
+
+            messages = build_messages(content, prompt, file_type)
+            attempt = 0
+            while True:
+                try:
+                    if self.bucket is not None:
+                        await self.bucket.acquire()
+                    async with self.semaphore:
+                        response = await self.client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            response_format={"type": "json_object"},
+                            temperature=temperature,
+                            max_completion_tokens=max_completion_tokens
+                        )
+                    break
+                except Exception as e:
+                    if attempt >= self.max_retries or not self._retryable(e):
+                        logging.error(f"Failed to send OpenAI request: {e}")
+                        request_span.set(retries=attempt)
+                        TRACER.record_llm_request(request_span, error=str(e))
+                        return {"error": str(e)}
+                    delay = self._backoff(attempt, e)
+                    attempt += 1
+                    self.retries += 1
+                    TRACER.increment("llm_retries_total")
+                    logging.warning(f"OpenAI request failed ({e}); retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+
+            parsed_content = parse_completion(response)
+            request_span.set(retries=attempt)
+            TRACER.record_llm_request(request_span, response,
+                                      error=parsed_content.get("error") if isinstance(parsed_content, dict) else None)
+            if cache_key is not None and "error" not in parsed_content:
+                await asyncio.to_thread(self.cache.set, cache_key, parsed_content)
+            return parsed_content
+
+    async def close(self):
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
@@ -1,11 +1,19 @@
 import json
 import os
+import threading
+
+_config = None
+_config_lock = threading.Lock()
 
 def load_config() -> dict:
     """
-    Load configuration settings from config.json.
+    Load configuration settings from config.json. The file is read on the first call and the
+    same dict is returned afterwards, so callers must not modify it.
     """
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
-    with open(config_path, 'r', encoding='utf-8') as file:
-        config = json.load(file)
-    return config
+    global _config
+    with _config_lock:
+        if _config is None:
+            config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
+            with open(config_path, 'r', encoding='utf-8') as file:
+                _config = json.load(file)
+    return _config
@@ -0,0 +1,135 @@
+import os
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.text_cleaner import clean_text
+from utils.file_converter import convert_file_to_text
+from utils.ingest_manifest import file_hash
+
+# Resume file types picked up from the resume folder.
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _alarm_available() -> bool:
+    """
+    True if SIGALRM timeouts work here: on POSIX, in the process's main thread.
+    """
+    return hasattr(signal, "SIGALRM") and threading.current_thread() is threading.main_thread()
+
+
+def extract_document(file_path: str, timeout: float = None, convert=convert_file_to_text):
+    """
+    Convert one resume file to cleaned text with convert (a picklable top-level function).
+    Returns (file_path, text, content_hash, error); error is None on success, otherwise text and
+    content_hash are None. The timeout is enforced with SIGALRM, so it only applies on POSIX and
+    when called from a process's main thread (always the case in pool workers).
+    """
+    use_alarm = timeout and _alarm_available()
+    if use_alarm:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        content_hash = file_hash(file_path)
+        text = clean_text(convert(file_path))
+        if not text:
+            return file_path, None, None, "no text could be extracted"
+        return file_path, text, content_hash, None
+    except ExtractionTimeout:
+        return file_path, None, None, f"timed out after {timeout}s"
+    except Exception as e:
+        return file_path, None, None, f"{type(e).__name__}: {e}"
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+
+def _extract_isolated(paths, timeout: float, context, convert):
+    """
+    Extract paths one at a time in a single-worker pool, yielding extract_document results.
+    A file that kills the worker is reported as failed and the pool is replaced for the next.
+    """
+    executor = None
+    try:
+        for path in paths:
+            if executor is None:
+                executor = ProcessPoolExecutor(max_workers=1, mp_context=context)
+            try:
+                result = executor.submit(extract_document, path, timeout, convert).result()
+            except BrokenProcessPool as e:
+                executor.shutdown(wait=False)
+                executor = None
+                result = path, None, None, f"worker process died: {e}"
+            yield result
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_documents(paths, workers: int = None, timeout: float = 60.0, max_pending: int = None,
+                      convert=convert_file_to_text):
+    """
+    Extract text from many resume files in a process pool, yielding extract_document results
+    in completion order. At most max_pending files (default 4 per worker) are in flight, so
+    results never pile up faster than the caller consumes them. Each file gets timeout seconds.
+    If a worker process dies, the pool fails every file in flight; those files are retried one
+    at a time in a fresh single-worker pool, so only a file that kills a worker on its own is
+    reported as failed, and a new pool is started for the rest.
+    workers <= 1 extracts in this process when the timeout can be enforced there with SIGALRM;
+    otherwise (on Windows, or when called from a thread such as the query server's ingest
+    thread) a single worker process is used so the timeout still applies.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 and (not timeout or _alarm_available()):
+        for path in paths:
+            yield extract_document(path, timeout, convert)
+        return
+
+    workers = max(workers, 1)
+    max_pending = max_pending or workers * 4
+    paths = iter(paths)
+    # spawn rather than fork: ingestion may run in a thread of a process holding model and SQLite state
+    context = multiprocessing.get_context("spawn")
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    pending = {}
+    try:
+        while True:
+            while len(pending) < max_pending:
+                path = next(paths, None)
+                if path is None:
+                    break
+                pending[executor.submit(extract_document, path, timeout, convert)] = path
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                # The whole pool is gone: collect everything that was in flight
+                done, _ = wait(pending)
+            suspects = []
+            for future in done:
+                path = pending.pop(future)
+                if isinstance(future.exception(), BrokenProcessPool):
+                    suspects.append(path)
+                else:
+                    yield future.result()
+            if suspects:
+                executor.shutdown(wait=False)
+                # We cannot tell which file killed the worker, so try each on its own
+                yield from _extract_isolated(suspects, timeout, context, convert)
+                executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -1,6 +1,4 @@
 import os
-import PyPDF2
-import docx
 
 def convert_file_to_text(file_path: str) -> str:
     """
@@ -19,19 +17,17 @@ def pdf_to_text(file_path: str) -> str:
     """
     Extract text from a PDF file.
     """
-    text = ""
+    import PyPDF2
     with open(file_path, 'rb') as file:
         reader = PyPDF2.PdfReader(file)
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text
+        page_texts = [page.extract_text() for page in reader.pages]
+    return "".join(page_text + "\n" for page_text in page_texts if page_text)
 
 def docx_to_text(file_path: str) -> str:
     """
     Extract text from a DOCX file.
     """
+    import docx
     doc = docx.Document(file_path)
     text = "\n".join([para.text for para in doc.paragraphs])
     return text
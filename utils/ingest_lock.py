@@ -0,0 +1,81 @@
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class IngestLock:
+    """
+    Inter-process lock that lets one writer at a time (ingest.py, the query server's ingest
+    endpoint or watcher) change the database, vector index and lexical indices. The lock is
+    an OS-level lock on a file, so it is released if the holding process dies.
+
+    timeout is the number of seconds to wait for another writer (None waits indefinitely);
+    acquire raises TimeoutError when it runs out.
+    """
+
+    def __init__(self, path: str = 'ingest.lock', timeout: float = None, poll_interval: float = 0.1):
+        self.path = path
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._file = None
+
+    def _try_lock(self) -> bool:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, blocking: bool = True):
+        """
+        Take the lock, waiting up to timeout. With blocking=False, return None at once
+        instead of waiting if another writer holds it.
+        """
+        self._file = open(self.path, 'a+')
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not self._try_lock():
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                self._file.close()
+                self._file = None
+                if not blocking:
+                    return None
+                raise TimeoutError(f"Another process is ingesting ({self.path} is locked).")
+            time.sleep(self.poll_interval)
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(str(os.getpid()))
+        self._file.flush()
+        return self
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def get_ingest_lock(config: dict) -> IngestLock:
+    """
+    Build the ingestion lock from config ("ingest_lock_path", "ingest_lock_timeout").
+    """
+    return IngestLock(config.get("ingest_lock_path", "ingest.lock"), timeout=config.get("ingest_lock_timeout"))
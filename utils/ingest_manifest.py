@@ -0,0 +1,159 @@
+import os
+import time
+import sqlite3
+import hashlib
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's contents, read in blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Records every ingested source file (path, size, mtime, content hash) in SQLite so later
+    ingestion runs can skip unchanged files. A file whose size and mtime match its record
+    is skipped with a single stat; if only the mtime changed (e.g. the file was copied or
+    touched) the content hash decides.
+
+    Files that could not be extracted are kept in a separate failures table (the retry list)
+    with their error and attempt count; they are retried on later runs until max_attempts is
+    reached, or straight away if the file changes.
+    """
+
+    def __init__(self, path: str = 'ingest_manifest.db', check_same_thread: bool = True):
+        self.conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS sources (
+                Path TEXT PRIMARY KEY,
+                Size INTEGER NOT NULL,
+                MTimeNs INTEGER NOT NULL,
+                ContentHash TEXT NOT NULL,
+                Candidates INTEGER NOT NULL,
+                IngestedAt REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS failures (
+                Path TEXT PRIMARY KEY,
+                Size INTEGER NOT NULL,
+                MTimeNs INTEGER NOT NULL,
+                Error TEXT NOT NULL,
+                Attempts INTEGER NOT NULL,
+                FailedAt REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    def is_unchanged(self, path: str, content_hash: str = None) -> bool:
+        """
+        True if the file was ingested before and has not changed since.
+        Without content_hash only size and mtime are compared (no file read).
+        """
+        row = self.conn.execute(
+            'SELECT Size, MTimeNs, ContentHash FROM sources WHERE Path = ?', (self._key(path),)
+        ).fetchone()
+        if row is None:
+            return False
+        if content_hash is not None:
+            return row[2] == content_hash
+        stat = os.stat(path)
+        return row[0] == stat.st_size and row[1] == stat.st_mtime_ns
+
+    def record(self, path: str, content_hash: str, candidates: int = 0):
+        """
+        Mark the file as ingested in its current state.
+        """
+        stat = os.stat(path)
+        with self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO sources (Path, Size, MTimeNs, ContentHash, Candidates, IngestedAt) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (self._key(path), stat.st_size, stat.st_mtime_ns, content_hash, candidates, time.time())
+            )
+            self.conn.execute('DELETE FROM failures WHERE Path = ?', (self._key(path),))
+
+    def needs_ingest(self, path: str, content_hash: str = None):
+        """
+        Decide whether a file must be (re)ingested. Returns (needed, content_hash); content_hash
+        is None when the stat check alone showed the file is unchanged. Files whose content is
+        unchanged despite a new mtime are re-recorded and reported as not needed.
+        Pass content_hash if it is already known to avoid reading the file again.
+        """
+        if self.is_unchanged(path):
+            return False, None
+        content_hash = content_hash or file_hash(path)
+        if self.is_unchanged(path, content_hash):
+            stat = os.stat(path)
+            with self.conn:
+                self.conn.execute('UPDATE sources SET Size = ?, MTimeNs = ? WHERE Path = ?',
+                                  (stat.st_size, stat.st_mtime_ns, self._key(path)))
+            return False, content_hash
+        return True, content_hash
+
+    def record_failure(self, path: str, error: str):
+        """
+        Add the file to the retry list, or bump its attempt count if it failed before in the
+        same state.
+        """
+        stat = os.stat(path)
+        key = self._key(path)
+        with self.conn:
+            row = self.conn.execute(
+                'SELECT Size, MTimeNs, Attempts FROM failures WHERE Path = ?', (key,)
+            ).fetchone()
+            attempts = row[2] + 1 if row and row[:2] == (stat.st_size, stat.st_mtime_ns) else 1
+            self.conn.execute(
+                'INSERT OR REPLACE INTO failures (Path, Size, MTimeNs, Error, Attempts, FailedAt) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, stat.st_size, stat.st_mtime_ns, error, attempts, time.time())
+            )
+
+    def should_retry(self, path: str, max_attempts: int = 3) -> bool:
+        """
+        False only for files that already failed max_attempts times and have not changed since.
+        """
+        row = self.conn.execute(
+            'SELECT Size, MTimeNs, Attempts FROM failures WHERE Path = ?', (self._key(path),)
+        ).fetchone()
+        if row is None or row[2] < max_attempts:
+            return True
+        stat = os.stat(path)
+        return row[:2] != (stat.st_size, stat.st_mtime_ns)
+
+    def failures(self) -> list:
+        """
+        The retry list: dicts with Path, Error, Attempts and FailedAt, most recent first.
+        """
+        rows = self.conn.execute(
+            'SELECT Path, Error, Attempts, FailedAt FROM failures ORDER BY FailedAt DESC'
+        ).fetchall()
+        return [dict(zip(("Path", "Error", "Attempts", "FailedAt"), row)) for row in rows]
+
+    def clear_failures(self):
+        """
+        Reset the retry list so every failed file is attempted again.
+        """
+        with self.conn:
+            self.conn.execute('DELETE FROM failures')
+
+    def forget(self, path: str = None):
+        """
+        Drop the record of one file, or of every file, so it is ingested again.
+        """
+        with self.conn:
+            if path is None:
+                self.conn.execute('DELETE FROM sources')
+                self.conn.execute('DELETE FROM failures')
+            else:
+                self.conn.execute('DELETE FROM sources WHERE Path = ?', (self._key(path),))
+                self.conn.execute('DELETE FROM failures WHERE Path = ?', (self._key(path),))
@@ -0,0 +1,131 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Persistent request/response cache for OpenAI calls, backed by SQLite.
+    Entries are keyed by (model, prompt hash, content hash, request parameters), expire after
+    ttl_seconds, and the least recently used entries are evicted once the cache holds more
+    than max_entries rows or max_bytes of responses. hits/misses count lookups.
+    """
+
+    # Evict at most once per this many writes; counting rows on every write is wasteful
+    EVICT_EVERY = 50
+
+    def __init__(self, path: str = 'llm_cache.db', ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 50000, max_bytes: int = 200 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                Key TEXT PRIMARY KEY,
+                Response TEXT NOT NULL,
+                CreatedAt REAL NOT NULL,
+                LastAccess REAL NOT NULL,
+                Size INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (LastAccess)')
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, content: str, params: dict) -> str:
+        """
+        Cache key for a request: hashes of the prompt and content plus model and parameters.
+        """
+        key = {
+            "model": model,
+            "prompt": _sha256(prompt),
+            "content": _sha256(content),
+            "params": params,
+        }
+        return _sha256(json.dumps(key, sort_keys=True))
+
+    def get(self, key: str):
+        """
+        Return the cached response for key, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute('SELECT Response, CreatedAt FROM responses WHERE Key = ?', (key,)).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                if row is not None:
+                    with self.conn:
+                        self.conn.execute('DELETE FROM responses WHERE Key = ?', (key,))
+                self.misses += 1
+                return None
+            with self.conn:
+                self.conn.execute('UPDATE responses SET LastAccess = ? WHERE Key = ?', (now, key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, response):
+        """
+        Store a JSON-serialisable response under key.
+        """
+        payload = json.dumps(response)
+        now = time.time()
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO responses (Key, Response, CreatedAt, LastAccess, Size) VALUES (?, ?, ?, ?, ?)',
+                    (key, payload, now, now, len(payload))
+                )
+            self._writes += 1
+            if (self._writes - 1) % self.EVICT_EVERY == 0:
+                self._evict(now)
+
+    def _evict(self, now: float):
+        """
+        Drop expired entries, then least recently used ones beyond max_entries / max_bytes.
+        """
+        with self.conn:
+            if self.ttl_seconds:
+                self.conn.execute('DELETE FROM responses WHERE CreatedAt < ?', (now - self.ttl_seconds,))
+            if self.max_entries:
+                self.conn.execute('''
+                    DELETE FROM responses WHERE Key IN (
+                        SELECT Key FROM responses ORDER BY LastAccess DESC LIMIT -1 OFFSET ?
+                    )
+                ''', (self.max_entries,))
+            if self.max_bytes:
+                total = self.conn.execute('SELECT COALESCE(SUM(Size), 0) FROM responses').fetchone()[0]
+                if total > self.max_bytes:
+                    excess = total - self.max_bytes
+                    victims = []
+                    for key, size in self.conn.execute('SELECT Key, Size FROM responses ORDER BY LastAccess'):
+                        victims.append((key,))
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    self.conn.executemany('DELETE FROM responses WHERE Key = ?', victims)
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters for this process and the number of stored entries.
+        """
+        with self._lock:
+            entries, size = self.conn.execute('SELECT COUNT(*), COALESCE(SUM(Size), 0) FROM responses').fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
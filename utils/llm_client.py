@@ -1,53 +1,112 @@
 import json
 import logging
-from openai import OpenAI
+from utils.tracing import TRACER
 
 logging.basicConfig(level=logging.INFO)
 
-def send_openai_request(content, prompt, api_key, file_type="text"):
+DEFAULT_MODEL = "gpt-4o"  # or "gpt-4o-mini" if preferred
+
+# One client (and HTTP connection pool) per API key and endpoint, reused across calls
+_clients = {}
+
+def get_client(api_key, base_url=None):
+    """
+    Return the shared OpenAI client for api_key, creating it on first use.
+    base_url points the client at an OpenAI-compatible endpoint (e.g. the local stub server).
+    """
+    client = _clients.get((api_key, base_url))
+    if client is None:
+        from openai import OpenAI  # the SDK takes a while to import; only load it when a request is made
+        client = _clients[(api_key, base_url)] = OpenAI(api_key=api_key, base_url=base_url)
+    return client
+
+def build_messages(content, prompt, file_type="text"):
+    """
+    Build the chat messages for a prompt and its content.
+    """
+    if file_type == "pdf":
+        return [
+            {
+                "role": "user",
+                "content": prompt + f"\n\nHere is the PDF content from the specified pages:\n{content}"
+            }
+        ]
+    return [
+        {
+            "role": "user",
+            "content": prompt + f"\n\nHere is the data:\n{content}"
+        }
+    ]
+
+def cache_key_for(cache, model, content, prompt, file_type, temperature, max_completion_tokens):
+    """
+    Return the response-cache key for a request, or None if the request should not be cached
+    (no cache configured, or a non-deterministic temperature).
+    """
+    if cache is None or temperature != 0:
+        return None
+    params = {
+        "file_type": file_type,
+        "temperature": temperature,
+        "max_completion_tokens": max_completion_tokens,
+        "response_format": "json_object",
+    }
+    return cache.make_key(model, prompt, str(content), params)
+
+def parse_completion(response):
+    """
+    Parse a chat completion into a dict: the JSON content, {"content": raw text} if it is not
+    valid JSON, or {"error": ...} if the response has no content.
+    """
+    if response and hasattr(response, 'choices') and len(response.choices) > 0:
+        gpt_content = response.choices[0].message.content
+        try:
+            parsed_content = json.loads(gpt_content)
+            logging.info("Successfully parsed OpenAI response.")
+            return parsed_content
+        except json.JSONDecodeError:
+            logging.warning("Failed to parse OpenAI response as JSON.")
+            return {"content": gpt_content}
+    logging.error("No content in OpenAI response.")
+    return {"error": "No content in OpenAI response"}
+
+def send_openai_request(content, prompt, api_key, file_type="text", cache=None, model=DEFAULT_MODEL,
+                        temperature=0, max_completion_tokens=2048, base_url=None):
     """
     Sends a request to the OpenAI ChatCompletion API and returns the parsed response.
+    If cache (an LLMResponseCache) is given and temperature is 0, identical requests are
+    answered from the cache. Error responses are never cached.
     """
-    try:
-        logging.info(f"Sending request to OpenAI for file_type: {file_type}")
-        client = OpenAI(api_key=api_key)
-        # Debug output
-        if file_type == "pdf":
-            messages = [
-                {
-                    "role": "user",
-                    "content": prompt + f"\n\nHere is the PDF content from the specified pages:\n{content}"
-                }
-            ]
-        else:
-            messages = [
-                {
-                    "role": "user",
-                    "content": prompt + f"\n\nHere is the data:\n{content}"
-                }
-            ]
-
-        response = client.chat.completions.create(
-            model="gpt-4o",  # or "gpt-4o-mini" if preferred
-            messages=messages,
-            response_format={"type": "json_object"},
-            temperature=0,
-            max_completion_tokens=2048
-        )
-
-        if response and hasattr(response, 'choices') and len(response.choices) > 0:
-            gpt_content = response.choices[0].message.content
-            try:
-                parsed_content = json.loads(gpt_content)
-                logging.info("Successfully parsed OpenAI response.")
-                return parsed_content
-            except json.JSONDecodeError:
-                logging.warning("Failed to parse OpenAI response as JSON.")
-                return {"content": gpt_content}
-        else:
-            logging.error("No content in OpenAI response.")
-            return {"error": "No content in OpenAI response"}
-
-    except Exception as e:
-        logging.error(f"Failed to send OpenAI request: {e}")
-        return {"error": str(e)}
+    with TRACER.span("llm_request", file_type=file_type, model=model) as request_span:
+        cache_key = cache_key_for(cache, model, content, prompt, file_type, temperature, max_completion_tokens)
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                logging.info(f"OpenAI response served from cache for file_type: {file_type}")
+                TRACER.record_llm_request(request_span, cache_hit=True)
+                return cached
+
+        try:
+            logging.info(f"Sending request to OpenAI for file_type: {file_type}")
+            client = get_client(api_key, base_url)
+            messages = build_messages(content, prompt, file_type)
+
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                response_format={"type": "json_object"},
+                temperature=temperature,
+                max_completion_tokens=max_completion_tokens
+            )
+
+            parsed_content = parse_completion(response)
+            TRACER.record_llm_request(request_span, response,
+                                      error=parsed_content.get("error") if isinstance(parsed_content, dict) else None)
+            if cache_key is not None and "error" not in parsed_content:
+                cache.set(cache_key, parsed_content)
+            return parsed_content
+
+        except Exception as e:
+            logging.error(f"Failed to send OpenAI request: {e}")
+            TRACER.record_llm_request(request_span, error=str(e))
+            return {"error": str(e)}
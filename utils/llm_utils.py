@@ -1,10 +1,113 @@
+import sys
+import json
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
 from utils.llm_client import send_openai_request
+from utils.async_llm_client import AsyncLLMClient
+from utils.llm_cache import LLMResponseCache
+from utils.token_budget import ResumeCompactor, count_tokens
 from utils.prompt_loader import load_prompt
 from utils.config import load_config
 
-# Load API key from configuration
-config = load_config()
-API_KEY = config.get("openai_api_key")
+def build_response_cache(config: dict):
+    """
+    Create the LLM response cache from the "llm_cache" config section, or None if disabled.
+    """
+    settings = config.get("llm_cache", {})
+    if not settings.get("enabled", True):
+        return None
+    return LLMResponseCache(
+        path=settings.get("path", "llm_cache.db"),
+        ttl_seconds=settings.get("ttl_seconds", 7 * 24 * 3600),
+        max_entries=settings.get("max_entries", 50000),
+        max_bytes=settings.get("max_bytes", 200 * 1024 * 1024),
+    )
+
+_response_caches = {}  # cache settings -> the LLMResponseCache shared by every caller using them
+_response_caches_lock = threading.Lock()
+
+def shared_response_cache(config: dict):
+    """
+    The response cache described by config (see build_response_cache), opened once per
+    distinct "llm_cache" section and shared afterwards.
+    """
+    key = json.dumps(config.get("llm_cache", {}), sort_keys=True)
+    with _response_caches_lock:
+        if key not in _response_caches:
+            _response_caches[key] = build_response_cache(config)
+        return _response_caches[key]
+
+# Module settings and how each is read from a config dict.
+_CONFIG_SETTINGS = {
+    "API_KEY": lambda config: config.get("openai_api_key"),
+    # optional OpenAI-compatible endpoint, e.g. the stub server
+    "BASE_URL": lambda config: config.get("openai_base_url"),
+    "RESPONSE_CACHE": shared_response_cache,
+    # Resumes are compacted to this many tokens before they are sent to the LLM
+    "RESUME_TOKEN_BUDGET": lambda config: config.get("resume_token_budget", 1500),
+    # Per-resume budget when several resumes share one re-ranking request
+    "RERANK_TOKEN_BUDGET": lambda config: config.get("rerank_token_budget", 300),
+}
+
+# Without an explicit config the settings are created from config.json on first use rather
+# than at import, so importing this module (and anything that imports it) neither reads the
+# config nor opens the cache. Assigning one of them (e.g. llm_utils.BASE_URL = ...)
+# overrides the configured value everywhere, including for callers that pass a config.
+_LAZY_SETTINGS = {
+    **{name: (lambda read=read: read(load_config())) for name, read in _CONFIG_SETTINGS.items()},
+    # Used when the caller does not pass a compactor built on the search's lexical index
+    "DEFAULT_COMPACTOR": ResumeCompactor,
+}
+_lazy_values = {}
+_settings_lock = threading.Lock()
+
+def __getattr__(name):
+    if name not in _LAZY_SETTINGS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _settings_lock:
+        if name not in _lazy_values:
+            _lazy_values[name] = _LAZY_SETTINGS[name]()
+    return _lazy_values[name]
+
+def _setting(name: str, config: dict = None):
+    """
+    The current value of a module setting: an assigned override, else the value read from
+    config if one is given, else the lazily loaded config.json value (see _LAZY_SETTINGS).
+    """
+    if name in globals():
+        return globals()[name]
+    if config is not None and name in _CONFIG_SETTINGS:
+        return _CONFIG_SETTINGS[name](config)
+    return getattr(sys.modules[__name__], name)
+
+def _send_request(content: str, prompt: str, config: dict = None):
+    """
+    send_openai_request with the configured API key, endpoint and response cache.
+    """
+    return send_openai_request(content, prompt, _setting("API_KEY", config),
+                               cache=_setting("RESPONSE_CACHE", config), base_url=_setting("BASE_URL", config))
+
+def build_async_client(config: dict, cache=None) -> AsyncLLMClient:
+    """
+    Create an AsyncLLMClient from config: the API key, endpoint and response cache settings
+    and the "llm_client" section. cache, if given, is used instead of building one.
+    Must be called inside the event loop that will use it.
+    """
+    settings = config.get("llm_client", {})
+    return AsyncLLMClient(
+        _setting("API_KEY", config),
+        base_url=_setting("BASE_URL", config),
+        cache=cache if cache is not None else _setting("RESPONSE_CACHE", config),
+        max_concurrency=settings.get("max_concurrency", 8),
+        requests_per_second=settings.get("requests_per_second"),
+        burst=settings.get("burst"),
+        max_retries=settings.get("max_retries", 5),
+        backoff_base=settings.get("backoff_base", 0.5),
+        backoff_max=settings.get("backoff_max", 20.0),
+        timeout=settings.get("timeout", 60.0),
+    )
 
 def extract_candidate_info(text: str) -> dict:
     """
@@ -12,7 +115,7 @@ def extract_candidate_info(text: str) -> dict:
     Loads a detailed prompt that instructs the model to extract data following a relational database schema.
     """
     prompt = load_prompt("extract_candidate_info")
-    response = send_openai_request(text, prompt, API_KEY)
+    response = _send_request(text, prompt)
     return response
 
 def expand_query(query: str) -> dict:
@@ -23,8 +126,13 @@ def expand_query(query: str) -> dict:
       - "total_resume": the number of resumes required.
     """
     prompt = load_prompt("expand_query")
-    response = send_openai_request(query, prompt, API_KEY)
-    
+    response = _send_request(query, prompt)
+    return expanded_query_from_response(response, query)
+
+def expanded_query_from_response(response, query: str) -> dict:
+    """
+    Read the expand_query response, falling back to the original query and 5 resumes.
+    """
     if isinstance(response, dict) and ("expanded_query" in response or "total_resume" in response):
         return response
     
@@ -35,35 +143,100 @@ def expand_query(query: str) -> dict:
         # Fallback: return a default dictionary if parsing fails.
         return {"expanded_query": query, "total_resume": 5}
 
-def rerank_results(query: str, resume_ids: list) -> list:
+async def expand_query_async(client: AsyncLLMClient, query: str) -> dict:
+    """
+    Async version of expand_query using a shared AsyncLLMClient.
+    """
+    response = await client.send_request(query, load_prompt("expand_query"))
+    return expanded_query_from_response(response, query)
+
+async def expand_queries_async(client: AsyncLLMClient, queries: list) -> list:
+    """
+    Expand many queries concurrently over one client. Returns the expand_query result for
+    each query, in order.
+    """
+    return await asyncio.gather(*(expand_query_async(client, query) for query in queries))
+
+def expand_queries(queries: list, config: dict = None) -> list:
+    """
+    Expand many queries concurrently over one async client built from config (config.json by
+    default), so they share its concurrency and rate limits. Returns the expand_query result
+    for each query, in order. Long-lived processes should use an LLMSession instead.
+    """
+    async def expand_all():
+        async with build_async_client(config if config is not None else load_config()) as client:
+            return await expand_queries_async(client, queries)
+    return asyncio.run(expand_all())
+
+def rerank_results(query: str, resume_ids: list, resumes: list = None, compactor: ResumeCompactor = None,
+                   token_budget: int = None, config: dict = None) -> list:
     """
     Re-rank resume IDs based on semantic relevance using OpenAI.
-    Loads a detailed prompt with placeholders that are replaced with actual values.
+    resumes, if given, is a list of candidate dicts (CandidateID, Name, ResumeText); each resume is
+    compacted to token_budget tokens (RERANK_TOKEN_BUDGET by default) and sent with the query
+    in the JSON input format the prompt describes. Returns the IDs in the model's order; IDs the
+    model drops keep their original relative order at the end, and unknown IDs are ignored.
+    config, if given, is used instead of config.json for the API settings and budget.
     """
+    response = _send_request(rerank_content(query, resume_ids, resumes, compactor, token_budget, config),
+                             load_prompt("rerank_results"), config)
+    return reranked_from_response(response, resume_ids)
 
-    base_prompt = load_prompt("rerank_results")
-    formatted_prompt = base_prompt.replace("{query}", query).replace("{resume_ids}", ", ".join(resume_ids))
-    response = send_openai_request(query, formatted_prompt, API_KEY)
-    try:
-        ranked = response.get("content", resume_ids)
-        if isinstance(ranked, list):
-            return ranked
-        else:
-            return resume_ids
-    except Exception:
-        return resume_ids
+async def rerank_results_async(client: AsyncLLMClient, query: str, resume_ids: list, resumes: list = None,
+                               compactor: ResumeCompactor = None, token_budget: int = None,
+                               config: dict = None) -> list:
+    """
+    Async version of rerank_results using a shared AsyncLLMClient.
+    """
+    response = await client.send_request(rerank_content(query, resume_ids, resumes, compactor, token_budget, config),
+                                         load_prompt("rerank_results"))
+    return reranked_from_response(response, resume_ids)
 
-def generate_summary(resume_text: str, query: str) -> str:
+def rerank_content(query: str, resume_ids: list, resumes: list = None, compactor: ResumeCompactor = None,
+                   token_budget: int = None, config: dict = None) -> str:
     """
-    Generate a concise AI summary for a resume based on the recruiter query using OpenAI.
-    The function appends the recruiter query to the candidate's resume text and sends the combined
-    content along with the prompt to OpenAI. It then extracts and returns the summary.
+    Build the rerank_results request: the query and the compacted resumes as JSON.
+    """
+    by_id = {candidate["CandidateID"]: candidate for candidate in resumes or []}
+    payload = {
+        "query": query,
+        "resumes": [
+            {
+                "CandidateID": cid,
+                "Name": by_id[cid].get("Name", ""),
+                "ResumeText": compact_resume(by_id[cid]["ResumeText"], query, cid, compactor,
+                                             token_budget or _setting("RERANK_TOKEN_BUDGET", config)),
+            } if cid in by_id else {"CandidateID": cid}
+            for cid in resume_ids
+        ],
+    }
+    return json.dumps(payload)
+
+def reranked_from_response(response, resume_ids: list) -> list:
+    """
+    Read the rerank_results response: known IDs in the model's order, then the rest.
+    """
+    ranked = response.get("ranked_candidates") if isinstance(response, dict) else None
+    if not isinstance(ranked, list):
+        return list(resume_ids)
+    known = set(resume_ids)
+    ordered = []
+    for cid in ranked:
+        cid = str(cid).strip()
+        if cid in known and cid not in ordered:
+            ordered.append(cid)
+    return ordered + [cid for cid in resume_ids if cid not in ordered]
+
+def summary_prompt_content(resume_text: str, query: str) -> str:
+    """
+    Combine the resume text with the recruiter query for context.
+    """
+    return f"Resume:\n{resume_text}\n\nRecruiter Query:\n{query}"
+
+def summary_from_response(response) -> str:
+    """
+    Extract the summary text from a generate_summary response.
     """
-    prompt = load_prompt("generate_summary")
-    # Combine the resume text with the recruiter query for context.
-    combined_content = f"Resume:\n{resume_text}\n\nRecruiter Query:\n{query}"
-    response = send_openai_request(combined_content, prompt, API_KEY)
-    
     # If the response contains 'ranked_candidates', extract the summary from the first candidate.
     if isinstance(response, dict) and "ranked_candidates" in response:
         ranked_list = response["ranked_candidates"]
@@ -71,4 +244,276 @@ def generate_summary(resume_text: str, query: str) -> str:
             return ranked_list[0].get("summary", "No summary available.")
     
     # Fallback to using the 'content' field if available.
-    return response.get("content", "No summary available.")
\ No newline at end of file
+    return response.get("content", "No summary available.")
+
+def compact_resume(resume_text: str, query: str, candidate_id: str = None, compactor: ResumeCompactor = None,
+                   token_budget: int = None) -> str:
+    """
+    Trim a resume to the most query-relevant sections within the token budget
+    (RESUME_TOKEN_BUDGET by default). Cached per (candidate, query, budget).
+    """
+    compactor = compactor or _setting("DEFAULT_COMPACTOR")
+    return compactor.compact(resume_text, query, token_budget or _setting("RESUME_TOKEN_BUDGET"),
+                             candidate_id=candidate_id)
+
+def generate_summary(resume_text: str, query: str, candidate_id: str = None, compactor: ResumeCompactor = None) -> str:
+    """
+    Generate a concise AI summary for a resume based on the recruiter query using OpenAI.
+    The function appends the recruiter query to the candidate's resume text and sends the combined
+    content along with the prompt to OpenAI. It then extracts and returns the summary.
+    The resume is first compacted to the resume token budget.
+    """
+    prompt = load_prompt("generate_summary")
+    resume_text = compact_resume(resume_text, query, candidate_id, compactor)
+    response = _send_request(summary_prompt_content(resume_text, query), prompt)
+    return summary_from_response(response)
+
+async def generate_summary_async(client: AsyncLLMClient, resume_text: str, query: str) -> str:
+    """
+    Async version of generate_summary using a shared AsyncLLMClient.
+    """
+    prompt = load_prompt("generate_summary")
+    response = await client.send_request(summary_prompt_content(resume_text, query), prompt)
+    return summary_from_response(response)
+
+def batch_summary_prompt_content(candidates: list, query: str) -> str:
+    """
+    Combine several resumes, each labelled with its CandidateID, with one copy of the recruiter query.
+    """
+    resumes = "\n\n".join(
+        f"Candidate ID: {candidate['CandidateID']}\nResume:\n{candidate['ResumeText']}" for candidate in candidates
+    )
+    return (f"{resumes}\n\nRecruiter Query:\n{query}\n\n"
+            f"Return one entry in ranked_candidates for each of the {len(candidates)} Candidate IDs above.")
+
+def pack_summary_batches(candidates: list, query: str, prompt: str, token_budget: int, max_candidates: int) -> list:
+    """
+    Greedily pack candidates, in order, into batches whose estimated request size (prompt, query
+    and resumes) stays within token_budget, with at most max_candidates per batch. A candidate
+    that does not fit the budget on its own gets a batch to itself.
+    """
+    overhead = count_tokens(prompt) + count_tokens(query) + 32
+    batches, current, used = [], [], overhead
+    for candidate in candidates:
+        cost = count_tokens(candidate["ResumeText"]) + 16  # resume plus its "Candidate ID" header
+        if current and (used + cost > token_budget or len(current) >= max_candidates):
+            batches.append(current)
+            current, used = [], overhead
+        current.append(candidate)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def summaries_by_candidate(response, candidate_ids) -> dict:
+    """
+    Map the ranked_candidates entries of a batched summary response back to {CandidateID: summary}.
+    Entries for unknown IDs, duplicates and empty summaries are ignored.
+    """
+    wanted = {str(cid) for cid in candidate_ids}
+    summaries = {}
+    ranked_list = response.get("ranked_candidates") if isinstance(response, dict) else None
+    if not isinstance(ranked_list, list):
+        return summaries
+    for entry in ranked_list:
+        if not isinstance(entry, dict):
+            continue
+        cid = str(entry.get("candidate_id", "")).strip()
+        summary = entry.get("summary")
+        if cid in wanted and cid not in summaries and isinstance(summary, str) and summary.strip():
+            summaries[cid] = summary
+    return summaries
+
+async def generate_batch_summaries_async(client: AsyncLLMClient, candidates: list, query: str,
+                                         max_completion_tokens: int = 4096) -> dict:
+    """
+    Summarise several candidates in one request. Returns {CandidateID: summary} for the
+    candidates the response covered; callers fall back to single requests for the rest.
+    """
+    prompt = load_prompt("generate_summary")
+    response = await client.send_request(batch_summary_prompt_content(candidates, query), prompt,
+                                         max_completion_tokens=max_completion_tokens)
+    return summaries_by_candidate(response, [candidate["CandidateID"] for candidate in candidates])
+
+async def _summarise(client: AsyncLLMClient, candidates: list, query: str, batching: dict,
+                     compactor: ResumeCompactor, token_budget: int = None) -> list:
+    # Summaries are generated from the compacted resumes; the caller's dicts keep the full text
+    candidates = [
+        dict(candidate, ResumeText=compact_resume(candidate["ResumeText"], query, candidate["CandidateID"], compactor,
+                                                  token_budget))
+        for candidate in candidates
+    ]
+    if not batching.get("enabled", True) or len(candidates) < 2:
+        return await asyncio.gather(
+            *(generate_summary_async(client, candidate["ResumeText"], query) for candidate in candidates)
+        )
+
+    batches = pack_summary_batches(candidates, query, load_prompt("generate_summary"),
+                                   batching.get("token_budget", 12000), batching.get("max_candidates", 10))
+    multi = [batch for batch in batches if len(batch) > 1]
+    results = await asyncio.gather(*(
+        generate_batch_summaries_async(client, batch, query, batching.get("max_completion_tokens", 4096))
+        for batch in multi
+    ))
+    summaries = {}
+    for result in results:
+        summaries.update(result)
+
+    # Candidates packed alone, or missing from their batch's response, get their own request
+    missing = [candidate for candidate in candidates if str(candidate["CandidateID"]) not in summaries]
+    singles = await asyncio.gather(
+        *(generate_summary_async(client, candidate["ResumeText"], query) for candidate in missing)
+    )
+    summaries.update(zip((str(candidate["CandidateID"]) for candidate in missing), singles))
+    return [summaries[str(candidate["CandidateID"])] for candidate in candidates]
+
+async def generate_summaries_async(candidates: list, query: str, client: AsyncLLMClient = None,
+                                   batching: dict = None, compactor: ResumeCompactor = None,
+                                   config: dict = None) -> list:
+    """
+    Generate summaries for all candidates concurrently and store each in candidate["Summary"].
+    Candidates are dicts with keys CandidateID, Name, ResumeText. Unless batching is disabled
+    (the "summary_batching" config section, or the batching argument), candidates are packed
+    into multi-candidate requests within a token budget, and any candidate the batched
+    response does not cover is summarised on its own. Resumes are compacted to the resume
+    token budget first; pass a compactor built on the search's lexical index to rank resume
+    sections by the query's BM25 term weights. Settings not passed in (the client, batching
+    and the token budget) come from config, or config.json if it is not given; a client
+    built here is closed afterwards.
+    """
+    config = config if config is not None else load_config()
+    if batching is None:
+        batching = config.get("summary_batching", {})
+    owns_client = client is None
+    if owns_client:
+        client = build_async_client(config)
+    try:
+        summaries = await _summarise(client, candidates, query, batching, compactor,
+                                     _setting("RESUME_TOKEN_BUDGET", config))
+    finally:
+        if owns_client:
+            await client.close()
+    for candidate, summary in zip(candidates, summaries):
+        candidate["Summary"] = summary
+    return candidates
+
+def generate_summaries(candidates: list, query: str, compactor: ResumeCompactor = None,
+                       config: dict = None) -> list:
+    """
+    Synchronous entry point for generate_summaries_async. Long-lived processes should use
+    an LLMSession instead.
+    """
+    return asyncio.run(generate_summaries_async(candidates, query, compactor=compactor, config=config))
+
+async def generate_summaries_for_queries_async(client: AsyncLLMClient, jobs: list, compactor: ResumeCompactor = None,
+                                               config: dict = None) -> list:
+    """
+    Summarise the candidates of many queries over one client: jobs is a list of
+    (candidates, query) pairs. Returns the candidate lists with "Summary" set.
+    """
+    config = config if config is not None else load_config()
+    return await asyncio.gather(*(
+        generate_summaries_async(candidates, query, client=client, compactor=compactor, config=config)
+        for candidates, query in jobs
+    ))
+
+def generate_summaries_for_queries(jobs: list, compactor: ResumeCompactor = None, config: dict = None) -> list:
+    """
+    Summarise the candidates of many queries at once: jobs is a list of (candidates, query)
+    pairs, and every query's requests go through one async client with shared concurrency
+    and rate limits. Returns the candidate lists with "Summary" set.
+    """
+    config = config if config is not None else load_config()
+
+    async def summarise_all():
+        async with build_async_client(config) as client:
+            return await generate_summaries_for_queries_async(client, jobs, compactor, config)
+    return asyncio.run(summarise_all())
+
+
+class LLMSession:
+    """
+    One AsyncLLMClient for every LLM request of a long-lived process (the query server, a
+    batch run), so all of them share its HTTP connection pool, concurrency limit and rate
+    limiter. The client runs on an event loop in a background thread, started on first use;
+    callers on any thread submit work to it and wait for the result. Settings come from the
+    given config instead of config.json. Call close() to shut the loop down.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.client = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-session", daemon=True)
+                thread.start()
+
+                async def build():
+                    return build_async_client(self.config)
+                self.client = asyncio.run_coroutine_threadsafe(build(), loop).result()
+                self._loop, self._thread = loop, thread
+        return self._loop
+
+    def run(self, function, *args, **kwargs):
+        """
+        Run the coroutine function(client, *args, **kwargs) on the session's loop and return
+        its result. The coroutine runs in a copy of the caller's context, so its tracing
+        spans nest under the caller's open span.
+        """
+        loop = self._start()
+        context = contextvars.copy_context()
+        done = concurrent.futures.Future()
+
+        def finish(task):
+            if task.cancelled():
+                done.cancel()
+            elif task.exception() is not None:
+                done.set_exception(task.exception())
+            else:
+                done.set_result(task.result())
+
+        def submit():
+            # Tasks copy the current context when they are created
+            task = context.run(loop.create_task, function(self.client, *args, **kwargs))
+            task.add_done_callback(finish)
+        loop.call_soon_threadsafe(submit)
+        return done.result()
+
+    def expand_query(self, query: str) -> dict:
+        return self.run(expand_query_async, query)
+
+    def expand_queries(self, queries: list) -> list:
+        return self.run(expand_queries_async, queries)
+
+    def rerank_results(self, query: str, resume_ids: list, resumes: list = None, compactor: ResumeCompactor = None,
+                       token_budget: int = None) -> list:
+        return self.run(rerank_results_async, query, resume_ids, resumes, compactor, token_budget, self.config)
+
+    def generate_summaries(self, candidates: list, query: str, compactor: ResumeCompactor = None) -> list:
+        async def summarise(client):
+            return await generate_summaries_async(candidates, query, client=client, compactor=compactor,
+                                                  config=self.config)
+        return self.run(summarise)
+
+    def generate_summaries_for_queries(self, jobs: list, compactor: ResumeCompactor = None) -> list:
+        return self.run(generate_summaries_for_queries_async, jobs, compactor, self.config)
+
+    def close(self):
+        """
+        Close the client and stop the event loop. A later request starts a new one.
+        """
+        with self._lock:
+            loop, thread, client = self._loop, self._thread, self.client
+            self._loop = self._thread = self.client = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(client.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,138 @@
+import logging
+from abc import ABC, abstractmethod
+
+from utils.token_budget import ResumeCompactor
+from utils.llm_utils import LLMSession, rerank_results
+from utils.tracing import span
+
+DEFAULT_CROSS_ENCODER = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class Reranker(ABC):
+    """
+    Reorders the shortlisted candidates for a query.
+    Candidates are dicts with keys CandidateID, Name, ResumeText; rerank returns the same
+    dicts, best first. Implementations may add a "RerankScore" key.
+    """
+
+    @abstractmethod
+    def rerank(self, query: str, candidates: list) -> list:
+        ...
+
+
+class CrossEncoderReranker(Reranker):
+    """
+    Scores (query, resume) pairs with a local sentence-transformers CrossEncoder, in batches
+    on CPU. Resumes are compacted to token_budget first; the cross-encoder only reads its
+    first max_length word pieces anyway, so this keeps the most query-relevant sections
+    within that window.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_CROSS_ENCODER, batch_size: int = 32, max_length: int = 512,
+                 token_budget: int = 400, compactor: ResumeCompactor = None):
+        try:
+            from sentence_transformers import CrossEncoder  # pulls in torch; only load it when this reranker is used
+        except ImportError as e:
+            raise ImportError('The cross_encoder reranker needs sentence_transformers (pip install '
+                              'sentence-transformers); set "reranker": {"type": "llm"} or "none" '
+                              'to run without it.') from e
+        self.model = CrossEncoder(model_name, max_length=max_length)
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.compactor = compactor or ResumeCompactor()
+
+    def rerank(self, query: str, candidates: list) -> list:
+        if not candidates:
+            return []
+        pairs = [
+            (query, self.compactor.compact(candidate["ResumeText"], query, self.token_budget,
+                                           candidate_id=candidate["CandidateID"]))
+            for candidate in candidates
+        ]
+        scores = self.model.predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        for candidate, score in zip(candidates, scores):
+            candidate["RerankScore"] = float(score)
+        # sorted is stable, so ties keep the retrieval order
+        return sorted(candidates, key=lambda candidate: -candidate["RerankScore"])
+
+
+class LLMReranker(Reranker):
+    """
+    Re-ranks the top_k candidates with the rerank_results prompt (one OpenAI request with the
+    compacted resumes); candidates below top_k keep their order. Intended as an optional
+    final pass after a cheaper reranker.
+    """
+
+    def __init__(self, top_k: int = 5, token_budget: int = None, compactor: ResumeCompactor = None,
+                 config: dict = None, session: LLMSession = None):
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.compactor = compactor
+        self.config = config  # API settings; config.json if None
+        self.session = session  # shared client of the pipeline; a one-off request if None
+
+    def rerank(self, query: str, candidates: list) -> list:
+        head, tail = candidates[:self.top_k], candidates[self.top_k:]
+        if len(head) < 2:
+            return list(candidates)
+        by_id = {candidate["CandidateID"]: candidate for candidate in head}
+        if self.session is not None:
+            ranked_ids = self.session.rerank_results(query, list(by_id), resumes=head, compactor=self.compactor,
+                                                     token_budget=self.token_budget)
+        else:
+            ranked_ids = rerank_results(query, list(by_id), resumes=head, compactor=self.compactor,
+                                        token_budget=self.token_budget, config=self.config)
+        return [by_id[cid] for cid in ranked_ids] + tail
+
+
+class CompositeReranker(Reranker):
+    """
+    Applies rerankers in sequence, e.g. a cross-encoder over the whole shortlist followed by
+    an LLM pass over its top few results.
+    """
+
+    def __init__(self, stages: list, logger: logging.Logger = None):
+        self.stages = stages
+        self.logger = logger
+
+    def rerank(self, query: str, candidates: list) -> list:
+        for stage in self.stages:
+            with span(f"rerank.{type(stage).__name__}", candidates_in=len(candidates)) as stage_span:
+                candidates = stage.rerank(query, candidates)
+                stage_span.set(candidates_out=len(candidates))
+            if self.logger is not None:
+                self.logger.info(f"{type(stage).__name__} re-ranked {len(candidates)} candidates "
+                                 f"in {stage_span.duration_ms:.1f} ms")
+        return candidates
+
+
+def get_reranker(config: dict, compactor: ResumeCompactor = None, logger: logging.Logger = None,
+                 llm_session: LLMSession = None) -> Reranker:
+    """
+    Build the reranker described by the "reranker" config section:
+        "type": "cross_encoder" (default), "llm" or "none"
+        "model", "batch_size", "max_length", "token_budget": cross-encoder settings
+        "llm_final_pass": also re-rank the top "llm_top_k" results with the LLM (cross_encoder only)
+    LLM re-ranking goes through llm_session when given.
+    """
+    settings = config.get("reranker", {})
+    reranker_type = settings.get("type", "cross_encoder")
+    llm_stage = LLMReranker(top_k=settings.get("llm_top_k", 5), compactor=compactor, config=config,
+                             session=llm_session)
+    if reranker_type == "none":
+        stages = []
+    elif reranker_type == "llm":
+        stages = [llm_stage]
+    elif reranker_type == "cross_encoder":
+        stages = [CrossEncoderReranker(
+            model_name=settings.get("model", DEFAULT_CROSS_ENCODER),
+            batch_size=settings.get("batch_size", 32),
+            max_length=settings.get("max_length", 512),
+            token_budget=settings.get("token_budget", 400),
+            compactor=compactor,
+        )]
+        if settings.get("llm_final_pass", False):
+            stages.append(llm_stage)
+    else:
+        raise ValueError(f"Unknown reranker type {reranker_type!r}; expected 'cross_encoder', 'llm' or 'none'.")
+    return CompositeReranker(stages, logger)
@@ -1,10 +1,11 @@
 import os
 import hashlib
-import pandas as pd
 from database.db_manager import DBManager
 from vectordb.vector_index import VectorIndex
-from utils.resume_parser import parse_resume  # This function handles PDF conversion and LLM extraction
+from utils.extraction_pool import SUPPORTED_EXTENSIONS, extract_documents  # File conversion and cleaning in worker processes
 import logging
+from contextlib import nullcontext
+from utils.ingest_manifest import IngestManifest
 
 def generate_candidate_id(text: str) -> str:
     """
@@ -12,82 +13,267 @@ def generate_candidate_id(text: str) -> str:
     """
     return hashlib.sha256(text.encode('utf-8')).hexdigest()
 
-def index_csv_resumes(csv_path: str, db_manager: DBManager, vector_index: VectorIndex, logger: logging.Logger):
+# Columns of the resume CSV that make up the labelled resume text, in order.
+CSV_RESUME_COLUMNS = [
+    "skills", "start_dates", "end_dates", "professional_company_names",
+    "educational_institution_name", "degree_names", "passing_years",
+    "positions", "responsibilities"
+]
+
+def build_resume_texts(df: "pd.DataFrame") -> "pd.Series":
+    """
+    Build the labelled resume text ("skills: ...; start_dates: ...; ...") for every row
+    of the DataFrame using column-wise string operations instead of a per-row loop.
+    """
+    resume_text = None
+    for column in CSV_RESUME_COLUMNS:
+        labelled = f"{column}: " + df[column]
+        resume_text = labelled if resume_text is None else resume_text + "; " + labelled
+    return resume_text
+
+def legacy_numeric_columns(csv_path: str, chunksize: int = 10000) -> dict:
+    """
+    Find the resume columns that earlier versions read as numbers.
+    Those versions parsed the whole CSV with pandas' type inference, so a column holding only
+    numbers was rendered as "2018" (integers) or "2018.0" (floats, e.g. when some cells are
+    empty), and that rendering went into the CandidateID hash. Returns {column: "int" or
+    "float"} so chunked reads can render those columns the same way and keep existing IDs.
+    Only columns that look numeric in the first chunk are scanned through the whole file.
+    """
+    import pandas as pd
+
+    first = pd.read_csv(csv_path, usecols=CSV_RESUME_COLUMNS, nrows=chunksize)
+    candidates = [column for column in CSV_RESUME_COLUMNS
+                  if pd.api.types.is_numeric_dtype(first[column]) and not pd.api.types.is_bool_dtype(first[column])]
+    if not candidates:
+        return {}
+    kinds = {}
+    for chunk in pd.read_csv(csv_path, usecols=candidates, chunksize=chunksize):
+        for column in candidates:
+            dtype = chunk[column].dtype
+            if pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype):
+                kind = "object"
+            else:
+                kind = "int" if pd.api.types.is_integer_dtype(dtype) else "float"
+            previous = kinds.get(column, kind)
+            # Any text makes the whole column text; any float (or missing value) makes it float
+            kinds[column] = next(k for k in ("object", "float", "int") if k in (previous, kind))
+    return {column: kind for column, kind in kinds.items() if kind != "object"}
+
+def index_csv_resumes(csv_path: str, db_manager: DBManager, vector_index: VectorIndex, logger: logging.Logger,
+                      batch_size: int = 256, checkpoint_every: int = 10000, chunksize: int = 10000,
+                      manifest: IngestManifest = None, write_lock=None, added_ids: list = None):
     """
     Process and index resumes from a CSV file.
     Select specific columns, create a concatenated resume text, and insert into the database.
     Only new rows (determined by unique candidate IDs) are processed.
+    The CSV is streamed chunksize rows at a time so memory stays flat regardless of file size.
+    For each chunk the resume texts and IDs are built column-wise, already-known IDs are found
+    with a single lookup, and only new rows are written to the database and vector index.
+    If a manifest is given and the file is unchanged since it was last ingested, nothing is read.
+    write_lock, if given, is a context manager factory held only while each chunk is written
+    (new rows are embedded before it is taken), so concurrent searches keep running.
+    The new CandidateIDs are appended to added_ids if given.
+    Returns the number of new candidates.
     """
+    write_lock = write_lock or nullcontext
+    if manifest is not None:
+        needed, content_hash = manifest.needs_ingest(csv_path)
+        if not needed:
+            logger.info(f"CSV {csv_path} is unchanged since the last ingestion; skipping.")
+            return 0
     logger.info("Starting CSV resume indexing.")
-    # Read CSV file
-    df = pd.read_csv(csv_path)
-    
-    # Define the columns to select
-    selected_columns = [
-        "skills", "start_dates", "end_dates", "professional_company_names",
-        "educational_institution_name", "degree_names", "passing_years",
-        "positions", "responsibilities"
-    ]
-    
-    # Fill missing values with empty strings
-    df[selected_columns] = df[selected_columns].fillna("")
-    
-    for index, row in df.iterrows():
-        # Construct resume text by concatenating selected columns with labels
-        resume_text = (
-            f"skills: {row['skills']}; "
-            f"start_dates: {row['start_dates']}; "
-            f"end_dates: {row['end_dates']}; "
-            f"professional_company_names: {row['professional_company_names']}; "
-            f"educational_institution_name: {row['educational_institution_name']}; "
-            f"degree_names: {row['degree_names']}; "
-            f"passing_years: {row['passing_years']}; "
-            f"positions: {row['positions']}; "
-            f"responsibilities: {row['responsibilities']}"
-        )
-        candidate_id = generate_candidate_id(resume_text)
-        
-        # Check if candidate already exists
-        if not db_manager.candidate_exists(candidate_id):
-            candidate_data = {
-                "CandidateID": candidate_id,
-                "Name": "",  # Name not provided in CSV
-                "ResumeText": resume_text
-            }
-            db_manager.insert_candidate(candidate_data)
-            vector_index.add_candidate(candidate_id, resume_text)
-            logger.info(f"Indexed CSV candidate: {candidate_id}")
-        else:
-            logger.info(f"CSV candidate already exists: {candidate_id}")
+    total_rows = 0
+    total_new = 0
+
+    import pandas as pd  # deferred so that importing this module (e.g. for a query server) stays cheap
+
+    # Read every column as text so values are formatted the same way in every chunk,
+    # except that purely numeric columns keep the rendering earlier versions hashed
+    numeric_columns = legacy_numeric_columns(csv_path, chunksize)
+    reader = pd.read_csv(csv_path, usecols=CSV_RESUME_COLUMNS, dtype=str, chunksize=chunksize)
+    for chunk in reader:
+        # Fill missing values with empty strings
+        chunk = chunk.fillna("")
+        for column, kind in numeric_columns.items():
+            cast = int if kind == "int" else float
+            chunk[column] = chunk[column].map(lambda value: str(cast(value)) if value else value)
+        resume_texts = build_resume_texts(chunk)
+        candidate_ids = resume_texts.map(generate_candidate_id)
+
+        # Drop rows repeated within the chunk, then rows already in the database
+        unique_mask = ~candidate_ids.duplicated()
+        resume_texts = resume_texts[unique_mask]
+        candidate_ids = candidate_ids[unique_mask]
+        known_ids = db_manager.existing_ids(candidate_ids.tolist())
+        new_mask = ~candidate_ids.isin(known_ids)
+        new_ids = candidate_ids[new_mask].tolist()
+        new_texts = resume_texts[new_mask].tolist()
+
+        embeddings = vector_index.encode_texts(new_texts, batch_size=batch_size) if new_ids else None
+        with write_lock():
+            db_manager.insert_candidates_bulk([
+                {
+                    "CandidateID": candidate_id,
+                    "Name": "",  # Name not provided in CSV
+                    "ResumeText": resume_text
+                }
+                for candidate_id, resume_text in zip(new_ids, new_texts)
+            ])
+            vector_index.add_candidates(new_ids, new_texts, batch_size=batch_size,
+                                        checkpoint_every=checkpoint_every, persist=False, embeddings=embeddings)
+
+        if added_ids is not None:
+            added_ids.extend(new_ids)
+        total_rows += len(chunk)
+        total_new += len(new_ids)
+        logger.info(f"Processed {total_rows} CSV rows; {len(new_ids)} new candidates in this chunk.")
+
+    if total_new:
+        with write_lock():
+            vector_index.save()
+    if manifest is not None:
+        manifest.record(csv_path, content_hash, total_new)
+    logger.info(f"Added {total_new} CSV candidates to the vector index.")
     logger.info("Finished indexing CSV resumes.")
+    return total_new
 
 
-def index_pdf_resumes(pdf_folder: str, db_manager: DBManager, vector_index: VectorIndex, logger: logging.Logger):
+def extraction_options(config: dict) -> dict:
     """
-    Process and index resumes from PDF files in a folder.
-    For each PDF, extract all text using PyPDF2, clean it, and then generate candidate info.
-    Only new candidates (by unique CandidateID) are processed.
+    Document extraction settings for ingest_sources, read from config.json.
     """
-    logger.info("Starting PDF resume indexing.")
-    for filename in os.listdir(pdf_folder):
-        if filename.lower().endswith(".pdf"):
-            file_path = os.path.join(pdf_folder, filename)
-            try:
-                # Parse resume using file conversion and text cleaning only
-                resume_data = parse_resume(file_path)
-                # Generate candidate ID from the extracted text
-                candidate_id = generate_candidate_id(resume_data["text"])
-                if not db_manager.candidate_exists(candidate_id):
-                    candidate_data = {
-                        "CandidateID": candidate_id,
-                        "Name": os.path.splitext(filename)[0],  # Use the filename (without extension) as the candidate name
-                        "ResumeText": resume_data["text"]
-                    }
-                    db_manager.insert_candidate(candidate_data)
-                    vector_index.add_candidate(candidate_id, resume_data["text"])
-                    logger.info(f"Indexed PDF candidate: {filename} as {candidate_id}")
-                else:
-                    logger.info(f"PDF candidate already exists: {candidate_id}")
-            except Exception as e:
-                logger.error(f"Failed to process PDF {filename}: {e}")
-    logger.info("Finished indexing PDF resumes.")
\ No newline at end of file
+    return {
+        "workers": config.get("extraction_workers"),
+        "timeout": config.get("extraction_timeout", 60.0),
+        "max_attempts": config.get("extraction_max_attempts", 3),
+    }
+
+
+def index_document_resumes(folder: str, db_manager: DBManager, vector_index: VectorIndex, logger: logging.Logger,
+                           batch_size: int = 256, checkpoint_every: int = 10000,
+                           manifest: IngestManifest = None, write_lock=None,
+                           workers: int = None, timeout: float = 60.0, max_attempts: int = 3,
+                           added_ids: list = None):
+    """
+    Process and index resumes from the PDF, DOCX and TXT files in a folder.
+    Text is extracted and cleaned in a pool of worker processes (workers, default one per CPU)
+    with a per-file timeout; parsed resumes are streamed back and written in batches of
+    batch_size, each batch embedded before write_lock (if given) is taken.
+    Only new candidates (by unique CandidateID) are indexed, and the vector index is persisted
+    once at the end.
+    If a manifest is given, files unchanged since they were last ingested are not parsed again
+    (a stat, or a content hash for files whose mtime changed, decides before extraction),
+    and files that fail are added to its retry list instead of being recorded as ingested;
+    a file is retried on later runs until it has failed max_attempts times unchanged.
+    The new CandidateIDs are appended to added_ids if given.
+    Returns the number of new candidates.
+    """
+    write_lock = write_lock or nullcontext
+    logger.info("Starting document resume indexing.")
+    paths = []
+    skipped = 0
+    for filename in sorted(os.listdir(folder)):
+        if os.path.splitext(filename)[1].lower() not in SUPPORTED_EXTENSIONS:
+            continue
+        file_path = os.path.join(folder, filename)
+        # Touched but identical files are hashed and re-recorded here, before any parsing
+        if manifest is not None and (not manifest.should_retry(file_path, max_attempts)
+                                     or not manifest.needs_ingest(file_path)[0]):
+            skipped += 1
+            continue
+        paths.append(file_path)
+    if skipped:
+        logger.info(f"Skipped {skipped} documents unchanged since the last ingestion or out of retries.")
+
+    batch = {}  # CandidateID -> candidate data, in completion order
+    batch_files = []  # (path, content hash, CandidateID) to record in the manifest
+    total_new = failed = 0
+
+    def flush():
+        nonlocal total_new
+        # One lookup and one transaction per batch
+        known_ids = db_manager.existing_ids(batch.keys())
+        new_candidates = [data for candidate_id, data in batch.items() if candidate_id not in known_ids]
+        for candidate_id in known_ids:
+            logger.info(f"Document candidate already exists: {candidate_id}")
+
+        new_ids = [data["CandidateID"] for data in new_candidates]
+        new_texts = [data["ResumeText"] for data in new_candidates]
+        embeddings = vector_index.encode_texts(new_texts, batch_size=batch_size) if new_ids else None
+        with write_lock():
+            db_manager.insert_candidates_bulk(new_candidates)
+            vector_index.add_candidates(new_ids, new_texts, batch_size=batch_size,
+                                        checkpoint_every=checkpoint_every, persist=False, embeddings=embeddings)
+        for data in new_candidates:
+            logger.info(f"Indexed document candidate: {data['Name']} as {data['CandidateID']}")
+        if added_ids is not None:
+            added_ids.extend(new_ids)
+
+        if manifest is not None:
+            new_id_set = set(new_ids)
+            for file_path, content_hash, candidate_id in batch_files:
+                manifest.record(file_path, content_hash, int(candidate_id in new_id_set))
+        total_new += len(new_candidates)
+        batch.clear()
+        batch_files.clear()
+
+    for file_path, text, content_hash, error in extract_documents(paths, workers=workers, timeout=timeout):
+        if error is not None:
+            failed += 1
+            logger.error(f"Failed to process {file_path}: {error}")
+            if manifest is not None:
+                manifest.record_failure(file_path, error)
+            continue
+        # Generate candidate ID from the extracted text
+        candidate_id = generate_candidate_id(text)
+        batch.setdefault(candidate_id, {
+            "CandidateID": candidate_id,
+            "Name": os.path.splitext(os.path.basename(file_path))[0],  # Use the filename (without extension) as the candidate name
+            "ResumeText": text
+        })
+        batch_files.append((file_path, content_hash, candidate_id))
+        if len(batch) >= batch_size:
+            flush()
+    if batch_files:
+        flush()
+
+    if total_new:
+        with write_lock():
+            vector_index.save()
+    if failed:
+        logger.info(f"{failed} documents failed and were added to the retry list.")
+    logger.info(f"Added {total_new} document candidates to the vector index.")
+    logger.info("Finished indexing document resumes.")
+    return total_new
+
+
+def ingest_sources(csv_path: str, pdf_folder: str, db_manager: DBManager, vector_index: VectorIndex,
+                   logger: logging.Logger, manifest: IngestManifest = None, write_lock=None,
+                   extraction: dict = None, added_ids: list = None) -> dict:
+    """
+    Index new resumes from a CSV file and a folder of PDF/DOCX/TXT resumes (either may be None
+    or missing), then retrain the vector index if it has grown enough for the configured index
+    type. extraction holds index_document_resumes options (see extraction_options).
+    The new CandidateIDs are appended to added_ids if given.
+    Returns the number of candidates added from each source.
+    """
+    write_lock = write_lock or nullcontext
+    added_csv = added_pdf = 0
+    if csv_path and os.path.exists(csv_path):
+        added_csv = index_csv_resumes(csv_path, db_manager, vector_index, logger,
+                                      manifest=manifest, write_lock=write_lock, added_ids=added_ids)
+    if pdf_folder and os.path.isdir(pdf_folder):
+        added_pdf = index_document_resumes(pdf_folder, db_manager, vector_index, logger,
+                                           manifest=manifest, write_lock=write_lock, added_ids=added_ids,
+                                           **(extraction or {}))
+
+    # Train and switch to the configured ANN index once there are enough vectors
+    if vector_index.needs_rebuild():
+        logger.info(f"Rebuilding vector index as {vector_index.index_type}.")
+        if vector_index.index_type == "ivf_pq":
+            logger.warning("ivf_pq stores compressed vectors and loses recall; measure it on this corpus with "
+                           "benchmarks/ann_benchmark.py --from-index and tune pq_m and nprobe.")
+        with write_lock():
+            vector_index.rebuild()
+    return {"added_csv": added_csv, "added_pdf": added_pdf}
@@ -0,0 +1,430 @@
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+
+from utils.analyzer import get_analyzer
+from utils.token_budget import ResumeCompactor
+from database.db_manager import DBManager
+from vectordb.vector_index import VectorIndex
+from vectordb.encoders import get_encoder
+from vectordb.embedding_cache import EmbeddingCache
+from utils.ingest_manifest import IngestManifest
+from utils.ingest_lock import get_ingest_lock
+from utils.resume_indexer import ingest_sources, extraction_options
+from utils.llm_utils import LLMSession
+from utils.reranker import get_reranker
+from utils.tracing import TRACER, span
+from vectordb.precomputed_filter import (get_precomputed_indices, update_precomputed_indices, bm25_ranked_batch,
+                                         tfidf_ranked_batch)
+from vectordb.hybrid_fusion import hybrid_settings, fuse_rankings
+
+
+class ReadWriteLock:
+    """
+    Any number of readers or a single writer. Once a writer is waiting, new readers wait
+    too, so ingestion is not starved by a steady stream of searches.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class SearchPipeline:
+    """
+    The query pipeline with its state loaded once: database, vector index (and embedding
+    model), lexical indices, resume compactor, reranker and the LLM session whose one async
+    client serves every query expansion and summary request. search() runs one recruiter query
+    end to end; ingest() adds new resumes and refreshes the indices in place.
+
+    With shared=True the pipeline may be used from several threads (the query server):
+    searches run concurrently under a read lock and ingestion takes the write lock only to
+    write new rows and vectors and to swap in the refreshed lexical indices, so a search
+    always sees a consistent snapshot of the database and indices.
+
+    Writes also take the inter-process ingest lock (see utils/ingest_lock.py) and first pick
+    up whatever another writer, such as ingest.py, has saved since: the vector index is
+    reloaded and the lexical indices are refreshed from the database.
+
+    encoder, if given, replaces the embedding encoder built from the "encoder" config
+    section (see vectordb/encoders.py).
+    """
+
+    def __init__(self, config: dict, logger: logging.Logger, shared: bool = False, encoder=None):
+        self.config = config
+        self.logger = logger
+        TRACER.configure(config)
+        check_same_thread = not shared
+        self.db_manager = DBManager(tuned=config.get("sqlite_tuned", False), check_same_thread=check_same_thread)
+        self.vector_index = VectorIndex(
+            index_type=config.get("vector_index_type", "flat"),
+            index_params=config.get("vector_index_params"),
+            nprobe=config.get("vector_nprobe", 16),
+            ef_search=config.get("vector_ef_search", 64),
+            max_deleted_ratio=config.get("vector_max_deleted_ratio", 0.2),
+            embedding_cache=EmbeddingCache(config.get("embedding_cache_dir", "embedding_cache"),
+                                           check_same_thread=check_same_thread),
+            check_same_thread=check_same_thread,
+            encoder=encoder or get_encoder(config),
+            on_encoder_change="reset" if config.get("reembed_on_encoder_change", False) else "error",
+        )
+        self.manifest = IngestManifest(config.get("ingest_manifest", "ingest_manifest.db"),
+                                       check_same_thread=check_same_thread)
+        self.analyzer = get_analyzer(config)
+        self.hybrid = hybrid_settings(config)
+        self.lock = ReadWriteLock()
+        self._ingest_lock = threading.Lock()  # one ingestion at a time (server endpoint and watcher)
+        self._writer_lock = get_ingest_lock(config)  # ... and one writer across processes
+        # SQLite builds that are not compiled in serialized mode cannot run queries on one
+        # connection from several threads at once, so searches are serialised there.
+        self._search_lock = threading.Lock() if shared and sqlite3.threadsafety < 3 else None
+
+        self.lexical_index = None
+        # Resumes are trimmed to their most query-relevant sections, ranked with the lexical index's term weights.
+        self.compactor = ResumeCompactor()
+        # Started on the first LLM request, so searches without expansion or summaries never open it
+        self.llm = LLMSession(config)
+        self.reranker = get_reranker(config, self.compactor, logger, llm_session=self.llm)
+        if self.vector_index.needs_reembed:
+            self._reembed()
+        # Saving a rebuilt lexical index needs the ingest lock; while another process holds
+        # it (e.g. ingest.py) the index is built in memory only and that writer saves its own
+        if self._writer_lock.acquire(blocking=False):
+            try:
+                self.refresh()
+            finally:
+                self._writer_lock.release()
+        else:
+            self.logger.info("Another process is ingesting; loading the lexical indices without saving them.")
+            self.refresh(save=False)
+
+    def refresh(self, added_ids: list = None, removed_ids: list = None, save: bool = True):
+        """
+        Update the BM25 and TF–IDF indices. With added_ids and/or removed_ids only those
+        resumes are applied to the current indices (reading just the added texts); without
+        them the indices are reloaded from the database (appending new resumes or rebuilding
+        if needed). The new indices are built first and then swapped in, so searches keep
+        using the previous snapshot until they are ready. Updated indices are saved unless
+        save is False; callers that save must hold the ingest lock.
+        """
+        with span("refresh_lexical_index") as refresh_span:
+            if self.lexical_index is None or (added_ids is None and removed_ids is None):
+                lexical_index = get_precomputed_indices(self.db_manager, self.logger, analyzer=self.analyzer,
+                                                        save=save)
+            else:
+                lexical_index = update_precomputed_indices(self.lexical_index, self.db_manager, self.logger,
+                                                           added_ids or [], removed_ids or [], save=save)
+            refresh_span.set(candidates=len(lexical_index))
+        with self.lock.write():
+            self.lexical_index = lexical_index
+            self.compactor.reset(lexical_index)
+
+    def ingest(self, csv_path: str = None, pdf_folder: str = None) -> dict:
+        """
+        Index new resumes from a CSV file and/or a folder of PDF/DOCX/TXT resumes, retrain the vector index if it
+        has grown enough, and refresh the lexical indices. Sources unchanged since the last
+        run are skipped via the ingestion manifest. Parsing and embedding happen outside the
+        write lock; searches only wait while new rows and vectors are written. New resumes
+        become searchable once the lexical indices are refreshed at the end.
+        """
+        with self._ingest_lock, self._writer_lock, \
+                span("ingest", csv_path=csv_path, pdf_folder=pdf_folder) as ingest_span:
+            start = time.perf_counter()
+            reloaded = self._reload_if_changed()
+            added_ids = []
+            result = ingest_sources(csv_path, pdf_folder, self.db_manager, self.vector_index, self.logger,
+                                    manifest=self.manifest, write_lock=self.lock.write,
+                                    extraction=extraction_options(self.config), added_ids=added_ids)
+            if reloaded:
+                self.refresh()
+            elif added_ids:
+                self.refresh(added_ids=added_ids)
+            result["candidates"] = len(self.lexical_index)
+            result["seconds"] = round(time.perf_counter() - start, 3)
+            ingest_span.set(**result)
+            return result
+
+    def remove(self, candidate_ids: list) -> int:
+        """
+        Remove resumes from the database, the vector index and the lexical indices.
+        Returns the number of resumes removed from the database.
+        """
+        with self._ingest_lock, self._writer_lock, span("remove", candidates=len(candidate_ids)):
+            reloaded = self._reload_if_changed()
+            with self.lock.write():
+                removed = self.db_manager.delete_candidates(candidate_ids)
+                self.vector_index.remove(candidate_ids)
+            if reloaded:
+                self.refresh()
+            else:
+                self.refresh(removed_ids=candidate_ids)
+            return removed
+
+    def _reembed(self):
+        """
+        Re-embed every stored resume after the configured encoder changed
+        ("reembed_on_encoder_change": true).
+        """
+        with self._ingest_lock, self._writer_lock, span("reembed") as reembed_span:
+            candidates = self.db_manager.get_all_candidates()
+            self.vector_index.reembed([cid for cid, _ in candidates], [text for _, text in candidates])
+            reembed_span.set(candidates=len(candidates))
+            self.logger.info(f"Re-embedded {len(candidates)} candidates with {self.vector_index.encoder.cache_key}")
+
+    def _reload_if_changed(self) -> bool:
+        """
+        Reload the vector index if another process saved it since this pipeline last did.
+        Must be called with the ingest locks held; the caller then refreshes the lexical
+        indices in full, as the database gained that process's resumes too.
+        """
+        with self.lock.write():
+            reloaded = self.vector_index.reload_if_changed()
+        if reloaded:
+            self.logger.info(f"Reloaded {self.vector_index.index_path} written by another process "
+                             f"({len(self.vector_index)} vectors)")
+        return reloaded
+
+    def close(self):
+        """
+        Close the LLM session (its client and event loop thread).
+        """
+        self.llm.close()
+
+    @contextmanager
+    def _reading(self):
+        with self.lock.read():
+            if self._search_lock is None:
+                yield
+            else:
+                with self._search_lock:
+                    yield
+
+    @contextmanager
+    def _stage(self, timings: dict, name: str, **attributes):
+        """
+        A span for one pipeline stage whose duration is also recorded in timings (ms).
+        """
+        with span(name, **attributes) as stage_span:
+            yield stage_span
+        timings[name] = round(stage_span.duration_ms, 2)
+
+    def _retrieve(self, queries: list, limits: list, timings: dict) -> list:
+        """
+        Hybrid retrieval for one or more (expanded) queries at once: BM25 and TF–IDF scores
+        from batched sparse products, vector scores from one encode call, one exact scoring
+        pass over every query's lexical hits and one multi-row nearest-neighbour search, then
+        per-query fusion into a shortlist (see vectordb/hybrid_fusion.py) and one database
+        fetch. Returns one list of candidate dicts (with RetrievalScore) per query; each
+        shortlist is at least limits[i] long when enough candidates match.
+        """
+        with self._reading():
+            lexical_index = self.lexical_index
+            total_docs = len(lexical_index)
+            doc_ids = lexical_index.doc_ids
+            lexical_depth = self.hybrid["lexical_depth"]
+            # Score candidates with BM25, TF–IDF and the vector index, then fuse the rankings
+            with self._stage(timings, "bm25", candidates_in=total_docs * len(queries)) as stage_span:
+                bm25_rankings = [[(doc_ids[i], score) for i, score in ranked] for ranked in
+                                 bm25_ranked_batch(queries, lexical_index, lexical_depth, self.logger)]
+                stage_span.set(candidates_out=sum(map(len, bm25_rankings)))
+            with self._stage(timings, "tfidf", candidates_in=total_docs * len(queries)) as stage_span:
+                tfidf_rankings = [[(doc_ids[i], score) for i, score in ranked] for ranked in
+                                  tfidf_ranked_batch(queries, lexical_index, lexical_depth, self.logger)]
+                stage_span.set(candidates_out=sum(map(len, tfidf_rankings)))
+            lexical_ids = [list(dict.fromkeys(candidate_id for candidate_id, _ in bm25 + tfidf))
+                           for bm25, tfidf in zip(bm25_rankings, tfidf_rankings)]
+
+            # Vector-score every lexical hit exactly and add the nearest neighbours from the
+            # whole index so semantic-only matches are not lost
+            with self._stage(timings, "vector_search", candidates_in=sum(map(len, lexical_ids))) as stage_span:
+                query_embeddings = self.vector_index.encode_queries(queries)
+                scored = self.vector_index.score_candidates_batch(query_embeddings, lexical_ids)
+                nearest = self.vector_index.search_scored_batch(query_embeddings, top_n=self.hybrid["vector_depth"])
+                vector_rankings = []
+                for lexical_scored, global_nearest in zip(scored, nearest):
+                    distances = dict(lexical_scored)
+                    for candidate_id, distance in global_nearest:
+                        distances.setdefault(candidate_id, distance)
+                    vector_rankings.append(sorted(((candidate_id, -distance) for candidate_id, distance in distances.items()),
+                                                  key=lambda item: -item[1]))
+                stage_span.set(candidates_out=sum(map(len, vector_rankings)))
+
+            with self._stage(timings, "fusion", method=self.hybrid["fusion"]) as stage_span:
+                shortlists = []
+                for bm25, tfidf, vector, limit in zip(bm25_rankings, tfidf_rankings, vector_rankings, limits):
+                    # The shortlist is never shorter than the number of resumes asked for
+                    settings = dict(self.hybrid, max_candidates=max(self.hybrid["max_candidates"], limit))
+                    shortlists.append(fuse_rankings({"bm25": bm25, "tfidf": tfidf, "vector": vector}, settings))
+                stage_span.set(candidates_out=sum(map(len, shortlists)))
+            for query, shortlist in zip(queries, shortlists):
+                self.logger.info(f"Hybrid shortlist for '{query}' ({self.hybrid['fusion']}): "
+                                 f"{[candidate_id for candidate_id, _ in shortlist]}")
+
+            with self._stage(timings, "fetch"):
+                wanted = dict.fromkeys(candidate_id for shortlist in shortlists for candidate_id, _ in shortlist)
+                rows = {candidate["CandidateID"]: candidate for candidate in self.db_manager.get_candidates_by_ids(wanted)}
+        # Copies, so a candidate shortlisted for several queries gets separate scores and summaries
+        return [[dict(rows[candidate_id], RetrievalScore=score) for candidate_id, score in shortlist
+                 if candidate_id in rows]
+                for shortlist in shortlists]
+
+    def _rerank(self, query: str, candidates: list, limit: int) -> list:
+        # Re-rank the shortlist (local cross-encoder by default, optionally followed by an LLM pass)
+        ranked_candidates = self.reranker.rerank(query, candidates)[:limit]
+        self.logger.info(f"Final ranked CandidateIDs after limiting to {limit}: "
+                         f"{[candidate['CandidateID'] for candidate in ranked_candidates]}")
+        return ranked_candidates
+
+    def search(self, query: str, expand: bool = True, summarize: bool = True, limit: int = None) -> dict:
+        """
+        Run a recruiter query: expand it with the LLM, score candidates with BM25, TF–IDF and
+        vector search, fuse the three rankings into a short list (see vectordb/hybrid_fusion.py),
+        rerank it, and optionally summarise the top results.
+        limit overrides the number of resumes requested by the expanded query.
+        Returns the query details, the ranked candidates (dicts with CandidateID, Name,
+        ResumeText, RetrievalScore and, if produced, RerankScore and Summary), per-stage timings
+        in ms and the trace ID of the spans recorded for the query (see utils/tracing.py).
+        """
+        timings = {}
+        with span("search", query=query, expand=expand, summarize=summarize) as search_span:
+            self.logger.info(f"Received query: {query}")
+            with self._stage(timings, "expand"):
+                if expand:
+                    # Expected output example: {"expanded_query": "<expanded query>", "total_resume": 5}
+                    expanded_query_output = self.llm.expand_query(query)
+                    self.logger.info(f"Expanded query output: {expanded_query_output}")
+                else:
+                    expanded_query_output = {}
+                expanded_query_value = expanded_query_output.get("expanded_query", query)
+                total_resume_required = limit or expanded_query_output.get("total_resume", 5)
+
+            [candidates_data] = self._retrieve([expanded_query_value], [total_resume_required], timings)
+
+            with self._stage(timings, "rerank", candidates_in=len(candidates_data)) as stage_span:
+                ranked_candidates = self._rerank(query, candidates_data, total_resume_required)
+                stage_span.set(candidates_out=len(ranked_candidates))
+
+            if summarize and ranked_candidates:
+                # Generate all summaries concurrently over the shared async client (I/O-bound, so no processes needed).
+                with self._stage(timings, "summaries", candidates_in=len(ranked_candidates)):
+                    ranked_candidates = self.llm.generate_summaries(ranked_candidates, query, compactor=self.compactor)
+
+        timings["total"] = round(search_span.duration_ms, 2)
+        self.logger.info(f"Query timings (ms): {timings}")
+        return {
+            "query": query,
+            "expanded_query": expanded_query_value,
+            "total_resume": total_resume_required,
+            "candidates": ranked_candidates,
+            "timings_ms": timings,
+            "trace_id": search_span.trace_id,
+        }
+
+    def search_batch(self, queries: list, expand: bool = True, summarize: bool = True, limit: int = None) -> dict:
+        """
+        Run many recruiter queries in one pass. Expansion and summary requests for all queries
+        share one async client (and so its concurrency and rate limits), and retrieval is
+        batched across queries (see _retrieve); only reranking runs per query.
+        limit is either one number for every query or a list with one entry (or None) per query.
+        Returns {"results": [one search()-style dict per query, without timings], "timings_ms":
+        per-stage timings of the whole batch, "trace_id": ...}.
+        """
+        queries = list(queries)
+        limits = limit if isinstance(limit, (list, tuple)) else [limit] * len(queries)
+        timings = {}
+        with span("search_batch", queries=len(queries), expand=expand, summarize=summarize) as batch_span:
+            with self._stage(timings, "expand", queries=len(queries)):
+                expanded_outputs = self.llm.expand_queries(queries) if expand and queries else [{} for _ in queries]
+                expanded_values = [output.get("expanded_query", query)
+                                   for output, query in zip(expanded_outputs, queries)]
+                totals = [query_limit or output.get("total_resume", 5)
+                          for query_limit, output in zip(limits, expanded_outputs)]
+
+            shortlists = self._retrieve(expanded_values, totals, timings) if queries else []
+
+            with self._stage(timings, "rerank", candidates_in=sum(map(len, shortlists))) as stage_span:
+                ranked_lists = [self._rerank(query, candidates, total)
+                                for query, candidates, total in zip(queries, shortlists, totals)]
+                stage_span.set(candidates_out=sum(map(len, ranked_lists)))
+
+            if summarize and any(ranked_lists):
+                with self._stage(timings, "summaries", candidates_in=sum(map(len, ranked_lists))):
+                    ranked_lists = self.llm.generate_summaries_for_queries(list(zip(ranked_lists, queries)),
+                                                                           compactor=self.compactor)
+
+        timings["total"] = round(batch_span.duration_ms, 2)
+        self.logger.info(f"Batch of {len(queries)} queries, timings (ms): {timings}")
+        return {
+            "results": [
+                {"query": query, "expanded_query": expanded, "total_resume": total, "candidates": candidates}
+                for query, expanded, total, candidates in zip(queries, expanded_values, totals, ranked_lists)
+            ],
+            "timings_ms": timings,
+            "trace_id": batch_span.trace_id,
+        }
+
+
+class IngestWatcher:
+    """
+    Background thread that re-runs pipeline.ingest every interval seconds, so new resume
+    files are indexed while the pipeline keeps serving searches. Unchanged sources cost one
+    stat each thanks to the ingestion manifest.
+    """
+
+    def __init__(self, pipeline: SearchPipeline, csv_path: str, pdf_folder: str, interval: float = 60.0):
+        self.pipeline = pipeline
+        self.csv_path = csv_path
+        self.pdf_folder = pdf_folder
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ingest-watcher", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                result = self.pipeline.ingest(self.csv_path, self.pdf_folder)
+                if result["added_csv"] or result["added_pdf"]:
+                    self.pipeline.logger.info(f"Background ingestion: {result}")
+            except Exception:
+                self.pipeline.logger.exception("Background ingestion failed")
@@ -0,0 +1,240 @@
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+from utils.analyzer import Analyzer
+from utils.llm_client import DEFAULT_MODEL
+
+try:
+    import tiktoken
+except ImportError:  # optional; fall back to a character-based estimate
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4
+_encodings = {}
+
+def _encoding(model: str):
+    if model not in _encodings:
+        encoding = None
+        if tiktoken is not None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except Exception:  # unknown model, or the encoding files cannot be fetched offline
+                encoding = None
+        _encodings[model] = encoding
+    return _encodings[model]
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """
+    Number of tokens in text for the given model: exact with tiktoken, otherwise estimated
+    at about four characters per token.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+# Relative weight of resume sections when the budget forces a choice. CSV resumes use the
+# column names as labels; free-text (PDF) headings are mapped onto the same labels.
+SECTION_PRIORITY = {
+    "skills": 3.0,
+    "positions": 2.5,
+    "responsibilities": 2.0,
+    "summary": 1.5,
+    "professional_company_names": 1.5,
+    "degree_names": 1.0,
+    "educational_institution_name": 0.8,
+    "start_dates": 0.6,
+    "end_dates": 0.6,
+    "passing_years": 0.4,
+}
+DEFAULT_SECTION_PRIORITY = 1.0
+
+HEADING_ALIASES = {
+    "skills": "skills", "technical skills": "skills", "key skills": "skills", "core competencies": "skills",
+    "competencies": "skills", "technologies": "skills", "tools": "skills",
+    "experience": "positions", "work experience": "positions", "professional experience": "positions",
+    "employment": "positions", "employment history": "positions", "work history": "positions",
+    "career history": "positions",
+    "responsibilities": "responsibilities", "duties": "responsibilities", "achievements": "responsibilities",
+    "projects": "responsibilities", "key projects": "responsibilities",
+    "summary": "summary", "profile": "summary", "professional summary": "summary", "objective": "summary",
+    "about me": "summary",
+    "education": "degree_names", "qualifications": "degree_names", "certifications": "degree_names",
+}
+
+# "skills: ...; start_dates: ...; ..." as built by resume_indexer.build_resume_texts
+LABELLED_FIELD_RE = re.compile(r"(?:^|; )(" + "|".join(re.escape(label) for label in SECTION_PRIORITY) + r"): ")
+UNIT_SPLIT_RE = re.compile(r"(?<=[.!?;\n])\s+|(?<=,)\s+")
+
+def split_sections(text: str):
+    """
+    Split a resume into (label, body) sections and report whether it is a labelled CSV resume.
+    """
+    matches = list(LABELLED_FIELD_RE.finditer(text))
+    if len(matches) >= 2 and matches[0].start() == 0:
+        sections = []
+        for match, following in zip(matches, matches[1:] + [None]):
+            end = following.start() if following is not None else len(text)
+            sections.append((match.group(1), text[match.end():end]))
+        return sections, True
+
+    sections, label, lines = [], "", []
+    for line in text.splitlines():
+        heading = HEADING_ALIASES.get(line.strip().rstrip(':').lower()) if len(line.strip()) <= 40 else None
+        if heading is not None:
+            if any(l.strip() for l in lines):
+                sections.append((label, "\n".join(lines)))
+            label, lines = heading, [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((label, "\n".join(lines)))
+    return sections, False
+
+def chunk_text(body: str, chunk_chars: int) -> list:
+    """
+    Split a section body into consecutive chunks of at most about chunk_chars characters,
+    breaking at sentence, line or list-item boundaries.
+    """
+    chunks, current = [], ""
+    for unit in UNIT_SPLIT_RE.split(body):
+        if not unit:
+            continue
+        if current and len(current) + len(unit) + 1 > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {unit}" if current else unit
+        while len(current) > chunk_chars * 2:  # a single very long unit
+            chunks.append(current[:chunk_chars])
+            current = current[chunk_chars:]
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class ResumeCompactor:
+    """
+    Shrinks resumes to a token budget before they are sent to the LLM.
+    Each resume is split into sections (CSV fields or free-text headings) and small chunks;
+    chunks are scored by the BM25 IDF of the query terms they contain (from the lexical
+    index the search already built) times a section priority that favours skills, positions
+    and responsibilities. The best chunks that fit the budget are kept in their original
+    order, with "..." marking omitted text. Results are cached per (candidate, query, budget).
+    """
+
+    def __init__(self, lexical_index=None, analyzer: Analyzer = None, chunk_tokens: int = 60,
+                 cache_size: int = 4096, model: str = DEFAULT_MODEL):
+        self.lexical_index = lexical_index
+        self.analyzer = analyzer or (lexical_index.analyzer if lexical_index is not None else Analyzer())
+        self.chunk_tokens = chunk_tokens
+        self.cache_size = cache_size
+        self.model = model
+        self._cache = OrderedDict()
+        self._query_weights = OrderedDict()
+        self._lock = threading.Lock()  # the caches are shared by concurrent searches in server mode
+
+    def reset(self, lexical_index=None):
+        """
+        Switch to a new lexical index (e.g. after ingestion) and drop cached results.
+        """
+        with self._lock:
+            self.lexical_index = lexical_index
+            if lexical_index is not None:
+                self.analyzer = lexical_index.analyzer
+            self._cache.clear()
+            self._query_weights.clear()
+
+    def query_weights(self, query: str) -> dict:
+        """
+        {analyzed query term: IDF}, from the lexical index when available (uniform otherwise).
+        """
+        with self._lock:
+            weights = self._query_weights.get(query)
+        if weights is None:
+            if self.lexical_index is not None:
+                weights = self.lexical_index.query_term_idf(query)
+            else:
+                weights = {token: 1.0 for token in self.analyzer(query)}
+            with self._lock:
+                self._query_weights[query] = weights
+                if len(self._query_weights) > 64:
+                    self._query_weights.popitem(last=False)
+        return weights
+
+    def _score(self, chunk: str, label: str, weights: dict, k1: float = 1.2) -> float:
+        relevance = 0.0
+        if weights:
+            counts = {}
+            for token in self.analyzer(chunk):
+                if token in weights:
+                    counts[token] = counts.get(token, 0) + 1
+            relevance = sum(weights[token] * tf * (k1 + 1) / (tf + k1) for token, tf in counts.items())
+        return SECTION_PRIORITY.get(label, DEFAULT_SECTION_PRIORITY) * (1.0 + relevance)
+
+    def compact(self, resume_text: str, query: str, token_budget: int, candidate_id: str = None) -> str:
+        """
+        Return resume_text unchanged if it fits token_budget, otherwise its most query-relevant
+        sections and chunks, trimmed to the budget.
+        """
+        key = (candidate_id or hashlib.sha256(resume_text.encode('utf-8')).hexdigest(), query, token_budget)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        if count_tokens(resume_text, self.model) <= token_budget:
+            compacted = resume_text
+        else:
+            compacted = self._compact(resume_text, query, token_budget)
+
+        with self._lock:
+            self._cache[key] = compacted
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compacted
+
+    def _compact(self, resume_text: str, query: str, token_budget: int) -> str:
+        sections, labelled = split_sections(resume_text)
+        weights = self.query_weights(query)
+
+        # (section index, chunk index, score, tokens) for every chunk
+        chunks = []
+        pieces = []
+        for s, (label, body) in enumerate(sections):
+            section_chunks = chunk_text(body, self.chunk_tokens * CHARS_PER_TOKEN)
+            pieces.append(section_chunks)
+            for c, chunk in enumerate(section_chunks):
+                chunks.append((s, c, self._score(chunk, label, weights), count_tokens(chunk, self.model) + 1))
+
+        kept = set()
+        used = 0
+        section_cost = 4  # label and separators, paid once per section that keeps something
+        opened = set()
+        for s, c, _, tokens in sorted(chunks, key=lambda chunk: -chunk[2]):
+            cost = tokens + (section_cost if s not in opened else 0)
+            if used + cost > token_budget:
+                continue
+            kept.add((s, c))
+            opened.add(s)
+            used += cost
+
+        parts = []
+        for s, (label, _) in enumerate(sections):
+            if s not in opened:
+                continue
+            text, skipped = [], False
+            for c, chunk in enumerate(pieces[s]):
+                if (s, c) in kept:
+                    if skipped and text:
+                        text.append("...")
+                    text.append(chunk.strip() if labelled else chunk)
+                    skipped = False
+                else:
+                    skipped = True
+            if skipped:
+                text.append("...")
+            parts.append((f"{label}: " if labelled else "") + " ".join(text))
+        return ("; " if labelled else "\n\n").join(parts)
@@ -0,0 +1,215 @@
+import json
+import time
+import uuid
+import cProfile
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "resume_"
+
+# The innermost open span of the current thread or asyncio task
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed operation. Attributes (candidate counts, tokens, cache hits, ...) are set with
+    set(); duration_ms is filled in when the span ends.
+    """
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration_ms", "attributes", "_t0")
+
+    def __init__(self, name: str, parent=None, attributes: dict = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = time.time()
+        self.duration_ms = None
+        self.attributes = dict(attributes or {})
+        self._t0 = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Spans and metrics for the search and ingestion pipeline. Every finished span updates a
+    per-stage latency histogram and, if jsonl_path is set, is appended to that file as one
+    JSON line. Counters (LLM requests, cache hits, tokens, candidates in/out of each filter)
+    are kept alongside and exported with the histograms in Prometheus text format.
+    Spans nest through a context variable, so a span opened in a thread or asyncio task
+    becomes a child of the span that was open where the thread or task was started.
+    """
+
+    def __init__(self, jsonl_path: str = None, enabled: bool = True):
+        self.jsonl_path = jsonl_path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+
+    def configure(self, config: dict):
+        """
+        Apply the "tracing" config section: "enabled" (default true) and "jsonl_path"
+        (default none, i.e. spans are not written out).
+        """
+        settings = config.get("tracing", {})
+        self.enabled = settings.get("enabled", True)
+        self.jsonl_path = settings.get("jsonl_path")
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Time the enclosed block as a span named name; yields the Span so the block can set
+        attributes on it.
+        """
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration_ms = round((time.perf_counter() - span._t0) * 1000, 3)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        if not self.enabled:
+            return
+        self.observe("stage_seconds", span.duration_ms / 1000, stage=span.name)
+        for direction in ("in", "out"):
+            count = span.attributes.get(f"candidates_{direction}")
+            if count is not None:
+                self.increment("stage_candidates_total", count, stage=span.name, direction=direction)
+        if self.jsonl_path:
+            line = json.dumps(span.to_dict(), default=str)
+            with self._lock:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+
+    def increment(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def record_llm_request(self, span: Span, response=None, cache_hit: bool = False, error: str = None):
+        """
+        Record one LLM request on its span and in the counters: whether it was served from
+        the cache, the prompt and completion tokens reported by the API, and errors.
+        """
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None) or 0
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        span.set(cache_hit=cache_hit, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        outcome = "error" if error else "ok"
+        if error:
+            span.set(error=error)
+        self.increment("llm_requests_total", source="cache" if cache_hit else "api", outcome=outcome)
+        if prompt_tokens:
+            self.increment("llm_prompt_tokens_total", prompt_tokens)
+        if completion_tokens:
+            self.increment("llm_completion_tokens_total", completion_tokens)
+
+    def prometheus(self) -> str:
+        """
+        All counters and histograms in the Prometheus text exposition format.
+        """
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(values)) for key, values in self._histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{label_text(labels)} {value}")
+        for (name, labels), values in histograms:
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            for bound, count in zip(LATENCY_BUCKETS, values):
+                lines.append(f"{metric}_bucket{label_text(labels, [('le', bound)])} {count}")
+            lines.append(f"{metric}_bucket{label_text(labels, [('le', '+Inf')])} {values[-1]}")
+            lines.append(f"{metric}_sum{label_text(labels)} {values[-2]:.6f}")
+            lines.append(f"{metric}_count{label_text(labels)} {values[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """
+        Write the metrics to path (e.g. for the node_exporter textfile collector).
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+@contextmanager
+def profile(path: str):
+    """
+    Run the enclosed block under cProfile and dump the stats to path
+    (inspect with python -m pstats or snakeviz).
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+TRACER = Tracer()
+
+
+def span(name: str, **attributes):
+    """
+    Open a span on the process-wide tracer.
+    """
+    return TRACER.span(name, **attributes)
@@ -0,0 +1,145 @@
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import numpy as np
+
+def text_hash(text: str) -> str:
+    """
+    SHA-256 of the text (the same hash used for CSV CandidateIDs).
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding store keyed by (model name, text hash).
+    Each model's vectors are appended to a raw float32 file that is memory-mapped for reads;
+    a SQLite table maps (model, text hash) to the row in that file. Any index built with the
+    same model can reuse the vectors, so rebuilds, index-type migrations and re-ingesting
+    overlapping exports do not re-run the encoder for text it has already seen.
+    """
+
+    def __init__(self, directory: str = 'embedding_cache', check_same_thread: bool = True):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(directory, 'embeddings.db'), check_same_thread=check_same_thread)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS models (
+                Model TEXT PRIMARY KEY,
+                Dimension INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                Model TEXT NOT NULL,
+                TextHash TEXT NOT NULL,
+                Row INTEGER NOT NULL,
+                PRIMARY KEY (Model, TextHash)
+            )
+        ''')
+        self.conn.commit()
+        self._views = {}  # model -> read-only memmap of its vector file
+        self.hits = 0
+        self.misses = 0
+
+    def _vectors_path(self, model: str) -> str:
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model)
+        return os.path.join(self.directory, f"{safe_name}.f32")
+
+    def _dimension(self, model: str, dimension: int = None) -> int:
+        row = self.conn.execute('SELECT Dimension FROM models WHERE Model = ?', (model,)).fetchone()
+        if row is not None:
+            if dimension is not None and row[0] != dimension:
+                raise ValueError(f"Cached embeddings for {model} have dimension {row[0]}, not {dimension}.")
+            return row[0]
+        if dimension is None:
+            return None
+        with self.conn:
+            self.conn.execute('INSERT INTO models (Model, Dimension) VALUES (?, ?)', (model, dimension))
+        return dimension
+
+    def _view(self, model: str, dimension: int, min_rows: int) -> np.ndarray:
+        """
+        Memory-map the model's vector file, re-mapping if it has grown past the cached view.
+        """
+        view = self._views.get(model)
+        if view is None or len(view) < min_rows:
+            view = np.memmap(self._vectors_path(model), dtype='float32', mode='r').reshape(-1, dimension)
+            self._views[model] = view
+        return view
+
+    def get_many(self, model: str, hashes: list) -> dict:
+        """
+        Return {text hash: vector} for the hashes that are cached.
+        """
+        dimension = self._dimension(model)
+        if dimension is None or not hashes:
+            return {}
+        rows = self.conn.execute(
+            'SELECT TextHash, Row FROM embeddings WHERE Model = ? AND TextHash IN (SELECT value FROM json_each(?))',
+            (model, json.dumps(list(hashes)))
+        ).fetchall()
+        if not rows:
+            return {}
+        row_numbers = np.array([row for _, row in rows], dtype=np.int64)
+        vectors = np.asarray(self._view(model, dimension, int(row_numbers.max()) + 1)[row_numbers])
+        return {h: vector for (h, _), vector in zip(rows, vectors)}
+
+    def put_many(self, model: str, hashes: list, vectors: np.ndarray):
+        """
+        Store vectors for the given text hashes (hashes already cached are skipped).
+        """
+        vectors = np.ascontiguousarray(vectors, dtype='float32')
+        dimension = self._dimension(model, vectors.shape[1])
+        unique = {}
+        for h, vector in zip(hashes, vectors):
+            unique.setdefault(h, vector)
+        if not unique:
+            return
+        path = self._vectors_path(model)
+        row_bytes = dimension * 4
+        # BEGIN IMMEDIATE serialises writers, so the file offset and the rows stay consistent
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            known = {row[0] for row in self.conn.execute(
+                'SELECT TextHash FROM embeddings WHERE Model = ? AND TextHash IN (SELECT value FROM json_each(?))',
+                (model, json.dumps(list(unique)))
+            )}
+            new = [(h, vector) for h, vector in unique.items() if h not in known]
+            if new:
+                first_row = (os.path.getsize(path) if os.path.exists(path) else 0) // row_bytes
+                with open(path, 'ab') as f:
+                    f.seek(first_row * row_bytes)
+                    f.truncate()  # drop a partial row left by an interrupted write
+                    f.write(np.stack([vector for _, vector in new]).tobytes())
+                self.conn.executemany(
+                    'INSERT INTO embeddings (Model, TextHash, Row) VALUES (?, ?, ?)',
+                    [(model, h, first_row + i) for i, (h, _) in enumerate(new)]
+                )
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def encode(self, model: str, texts: list, encode_fn) -> np.ndarray:
+        """
+        Return embeddings for texts, calling encode_fn(list_of_texts) only for texts whose
+        (model, hash) is not cached yet, and caching the new vectors.
+        """
+        if not texts:
+            return np.zeros((0, self._dimension(model) or 0), dtype='float32')
+        hashes = [text_hash(text) for text in texts]
+        cached = self.get_many(model, list(set(hashes)))
+        missing = {}
+        for h, text in zip(hashes, texts):
+            if h not in cached:
+                missing.setdefault(h, text)
+        self.hits += len(texts) - sum(1 for h in hashes if h in missing)
+        self.misses += len(missing)
+        if missing:
+            new_vectors = np.asarray(encode_fn(list(missing.values())), dtype='float32')
+            self.put_many(model, list(missing.keys()), new_vectors)
+            cached.update(zip(missing.keys(), new_vectors))
+        return np.stack([cached[h] for h in hashes]).astype('float32')
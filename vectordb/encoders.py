@@ -0,0 +1,198 @@
+import os
+import re
+import json
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except ImportError:  # optional; only needed for the "onnx" encoder backend
+    ort = None
+
+DEFAULT_MODEL = 'all-MiniLM-L6-v2'
+ENCODER_BACKENDS = ("torch", "onnx")
+
+
+class SentenceTransformerEncoder:
+    """
+    The sentence-transformers model running in PyTorch (fp32). Its cache key is the bare
+    model name, so embeddings cached before encoder backends existed stay valid.
+    """
+    backend = "torch"
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, threads: int = None):
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        self.model_name = model_name
+        self.model = SentenceTransformer(model_name)
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self.cache_key = model_name
+
+    def encode(self, texts: list, batch_size: int = 64) -> np.ndarray:
+        """
+        Embed texts as a (len(texts), dimension) float32 array. sentence-transformers already
+        sorts each call's texts by length before batching.
+        """
+        return np.asarray(self.model.encode(list(texts), batch_size=batch_size), dtype='float32')
+
+
+def export_onnx(model_name: str, export_dir: str, quantize: bool = False) -> str:
+    """
+    Export the transformer of a sentence-transformers model to ONNX in export_dir, along with
+    its tokenizer and pooling settings (encoder.json), and optionally an int8 dynamically
+    quantised copy. Each file is only produced once; PyTorch is needed for the export but
+    not afterwards. Returns the path of the model to load.
+    """
+    fp32_path = os.path.join(export_dir, "model.onnx")
+    int8_path = os.path.join(export_dir, "model.int8.onnx")
+    if not os.path.exists(fp32_path):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(model_name, device="cpu")
+        transformer = model[0]
+        pooling = next((module for module in model if hasattr(module, "pooling_mode_mean_tokens")), None)
+        if pooling is not None and pooling.pooling_mode_cls_token:
+            pooling_mode = "cls"
+        elif pooling is None or pooling.pooling_mode_mean_tokens:
+            pooling_mode = "mean"
+        else:
+            raise ValueError(f"{model_name} uses a pooling mode the ONNX encoder does not support.")
+
+        os.makedirs(export_dir, exist_ok=True)
+        transformer.tokenizer.save_pretrained(export_dir)
+        sample = transformer.tokenizer(["an example resume"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+        class TokenEmbeddings(torch.nn.Module):
+            def __init__(self, auto_model):
+                super().__init__()
+                self.auto_model = auto_model
+
+            def forward(self, *inputs):
+                return self.auto_model(**dict(zip(input_names, inputs))).last_hidden_state
+
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]}
+        tmp_path = fp32_path + ".tmp"
+        with torch.no_grad():
+            torch.onnx.export(TokenEmbeddings(transformer.auto_model.eval()),
+                              tuple(sample[name] for name in input_names), tmp_path,
+                              input_names=input_names, output_names=["token_embeddings"],
+                              dynamic_axes=dynamic_axes, opset_version=14)
+        with open(os.path.join(export_dir, "encoder.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "model_name": model_name,
+                "pooling": pooling_mode,
+                "normalize": any(type(module).__name__ == "Normalize" for module in model),
+                "max_length": transformer.max_seq_length,
+                "dimension": model.get_sentence_embedding_dimension(),
+            }, f)
+        os.replace(tmp_path, fp32_path)
+
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, int8_path + ".tmp", weight_type=QuantType.QInt8)
+        os.replace(int8_path + ".tmp", int8_path)
+    return int8_path
+
+
+class OnnxEncoder:
+    """
+    The same model exported to ONNX and run with ONNX Runtime on CPU, optionally with int8
+    dynamically quantised weights. threads sets ONNX Runtime's intra-op thread count.
+    Texts are tokenized once, sorted by token length and batched so each batch is padded
+    only to its own longest text; results are returned in the original order.
+    Pooling and normalisation follow the exported model's sentence-transformers modules.
+    The cache key names the backend and quantisation, so cached embeddings from one backend
+    are never mixed with another's.
+    """
+    backend = "onnx"
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, export_dir: str = None, quantize: bool = False,
+                 threads: int = None, max_length: int = None):
+        if ort is None:
+            raise ImportError("The onnx encoder backend needs onnxruntime (pip install onnxruntime).")
+        try:
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The onnx encoder backend needs tokenizers (pip install tokenizers).") from e
+
+        export_dir = export_dir or os.path.join("onnx_models", re.sub(r'[^A-Za-z0-9_.-]', '_', model_name))
+        model_path = export_onnx(model_name, export_dir, quantize)
+        with open(os.path.join(export_dir, "encoder.json"), encoding="utf-8") as f:
+            settings = json.load(f)
+        self.model_name = model_name
+        self.quantize = quantize
+        self.pooling = settings["pooling"]
+        self.normalize = settings["normalize"]
+        self.dimension = settings["dimension"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(export_dir, "tokenizer.json"))
+        self.tokenizer.no_padding()
+        self.tokenizer.enable_truncation(max_length or settings["max_length"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.cache_key = f"{model_name}@onnx-int8" if quantize else f"{model_name}@onnx"
+
+    def encode(self, texts: list, batch_size: int = 64) -> np.ndarray:
+        """
+        Embed texts as a (len(texts), dimension) float32 array.
+        """
+        encodings = self.tokenizer.encode_batch(list(texts))
+        order = np.argsort([len(encoding.ids) for encoding in encodings], kind="stable")
+        embeddings = np.empty((len(encodings), self.dimension), dtype='float32')
+        for start in range(0, len(order), batch_size):
+            rows = order[start:start + batch_size]
+            batch = [encodings[i] for i in rows]
+            width = max(len(encoding.ids) for encoding in batch)
+            input_ids = np.zeros((len(batch), width), dtype=np.int64)
+            attention_mask = np.zeros((len(batch), width), dtype=np.int64)
+            token_type_ids = np.zeros((len(batch), width), dtype=np.int64)
+            for i, encoding in enumerate(batch):
+                length = len(encoding.ids)
+                input_ids[i, :length] = encoding.ids
+                attention_mask[i, :length] = encoding.attention_mask
+                token_type_ids[i, :length] = encoding.type_ids
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": token_type_ids}
+            token_embeddings = self.session.run(None, {name: feeds[name] for name in self.input_names})[0]
+            embeddings[rows] = self._pool(token_embeddings, attention_mask)
+        return embeddings
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.pooling == "cls":
+            pooled = token_embeddings[:, 0]
+        else:
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.normalize:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+
+def get_encoder(config: dict):
+    """
+    Build the embedding encoder described by the "encoder" config section:
+        "backend": "torch" (default) or "onnx"
+        "model": sentence-transformers model (default all-MiniLM-L6-v2)
+        "quantize": int8 dynamic quantisation for the onnx backend (default false)
+        "threads": intra-op CPU threads (default: the runtime's choice)
+        "max_length": token limit for the onnx backend (default: the model's)
+        "onnx_dir": where the exported model is kept (default onnx_models/<model>)
+    """
+    settings = config.get("encoder", {})
+    backend = settings.get("backend", "torch")
+    model_name = settings.get("model", DEFAULT_MODEL)
+    if backend == "torch":
+        return SentenceTransformerEncoder(model_name, threads=settings.get("threads"))
+    if backend == "onnx":
+        return OnnxEncoder(model_name, export_dir=settings.get("onnx_dir"), quantize=settings.get("quantize", False),
+                           threads=settings.get("threads"), max_length=settings.get("max_length"))
+    raise ValueError(f"Unknown encoder backend {backend!r}; expected one of {ENCODER_BACKENDS}.")
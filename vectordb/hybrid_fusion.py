@@ -0,0 +1,89 @@
+import numpy as np
+
+FUSION_METHODS = ("rrf", "weighted")
+
+
+def hybrid_settings(config: dict) -> dict:
+    """
+    Hybrid retrieval settings from the "hybrid" config section, with defaults:
+      fusion              "rrf" (Reciprocal Rank Fusion) or "weighted" (min–max normalised scores)
+      rrf_k               RRF smoothing constant
+      weights             per-source weights for "bm25", "tfidf" and "vector"
+      lexical_depth       BM25 and TF–IDF each contribute at most this many documents
+      vector_depth        nearest neighbours taken from the whole vector index
+      max_candidates      rank cut-off of the fused shortlist (defaults to "rerank_depth")
+      min_relative_score  score cut-off: drop candidates below this fraction of the best fused score
+    """
+    settings = config.get("hybrid", {})
+    fusion = settings.get("fusion", "rrf")
+    if fusion not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method '{fusion}'. Expected one of {FUSION_METHODS}.")
+    return {
+        "fusion": fusion,
+        "rrf_k": settings.get("rrf_k", 60),
+        "weights": {"bm25": 1.0, "tfidf": 1.0, "vector": 1.0, **settings.get("weights", {})},
+        "lexical_depth": settings.get("lexical_depth", 200),
+        "vector_depth": settings.get("vector_depth", 100),
+        "max_candidates": settings.get("max_candidates", config.get("rerank_depth", 50)),
+        "min_relative_score": settings.get("min_relative_score", 0.0),
+    }
+
+
+def reciprocal_rank_fusion(rankings: dict, weights: dict = None, k: int = 60) -> dict:
+    """
+    Fuse ranked lists of (CandidateID, score) pairs, best first, keyed by source name.
+    A candidate's fused score is the sum over sources of weight / (k + rank), rank starting
+    at 1; only the order within each source matters, so differently scaled scores mix safely.
+    Returns {CandidateID: fused score}.
+    """
+    weights = weights or {}
+    fused = {}
+    for source, ranked in rankings.items():
+        weight = weights.get(source, 1.0)
+        for rank, (candidate_id, _) in enumerate(ranked, start=1):
+            fused[candidate_id] = fused.get(candidate_id, 0.0) + weight / (k + rank)
+    return fused
+
+
+def normalise_scores(ranked: list) -> dict:
+    """
+    Min–max normalise the scores of (CandidateID, score) pairs to [0, 1] (all 1 if they are equal).
+    """
+    if not ranked:
+        return {}
+    scores = np.array([score for _, score in ranked], dtype=np.float64)
+    low, high = scores.min(), scores.max()
+    normalised = (scores - low) / (high - low) if high > low else np.ones_like(scores)
+    return {candidate_id: float(value) for (candidate_id, _), value in zip(ranked, normalised)}
+
+
+def weighted_score_fusion(rankings: dict, weights: dict = None) -> dict:
+    """
+    Fuse (CandidateID, score) lists, higher scores better, as the weighted sum of each source's
+    min–max normalised scores; a source that did not return a candidate contributes 0.
+    Returns {CandidateID: fused score}.
+    """
+    weights = weights or {}
+    fused = {}
+    for source, ranked in rankings.items():
+        weight = weights.get(source, 1.0)
+        for candidate_id, value in normalise_scores(ranked).items():
+            fused[candidate_id] = fused.get(candidate_id, 0.0) + weight * value
+    return fused
+
+
+def fuse_rankings(rankings: dict, settings: dict) -> list:
+    """
+    Fuse per-source rankings with the configured method and apply the rank and score
+    cut-offs. Returns (CandidateID, fused score) pairs, best first; ties keep the order in
+    which candidates were first seen.
+    """
+    if settings["fusion"] == "rrf":
+        fused = reciprocal_rank_fusion(rankings, settings["weights"], settings["rrf_k"])
+    else:
+        fused = weighted_score_fusion(rankings, settings["weights"])
+    shortlist = sorted(fused.items(), key=lambda item: -item[1])[:settings["max_candidates"]]
+    if shortlist and settings["min_relative_score"] > 0:
+        threshold = shortlist[0][1] * settings["min_relative_score"]
+        shortlist = [(candidate_id, score) for candidate_id, score in shortlist if score >= threshold]
+    return shortlist
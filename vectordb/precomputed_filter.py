@@ -1,83 +1,658 @@
 import os
-import pickle
+import json
+import time
+import uuid
+import shutil
+import hashlib
+from collections import Counter
 import numpy as np
-from rank_bm25 import BM25Okapi
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from utils.analyzer import Analyzer
 
-PRECOMPUTED_FILE = 'precomputed_filter.pkl'
+# Directory holding the precomputed lexical index (see save_precomputed_indices)
+PRECOMPUTED_DIR = 'precomputed_filter'
+PRECOMPUTED_FORMAT_VERSION = 1
+# File in PRECOMPUTED_DIR naming the published version subdirectory
+PRECOMPUTED_POINTER = 'CURRENT'
+# Unpublished versions and stray files are removed once they are this old, so a concurrent
+# save that has not published yet is never deleted under it
+STALE_VERSION_SECONDS = 60
+# Pickle file written by older versions; never loaded since unpickling is unsafe
+LEGACY_PRECOMPUTED_FILE = 'precomputed_filter.pkl'
 
-def compute_indices(resume_texts, logger):
+# BM25Okapi parameters (rank_bm25 defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+
+def corpus_fingerprint(candidate_ids) -> str:
     """
-    Compute BM25 and TF–IDF indices from the resume_texts.
+    Hash of the sorted CandidateIDs. Since CandidateIDs are content hashes, any added,
+    removed or replaced resume changes the fingerprint, even when the count stays the same.
     """
-    # Tokenize each document for BM25
-    tokenized_corpus = [doc.split() for doc in resume_texts]
-    bm25 = BM25Okapi(tokenized_corpus)
+    digest = hashlib.sha256()
+    for candidate_id in sorted(candidate_ids):
+        digest.update(candidate_id.encode('utf-8'))
+        digest.update(b"\n")
+    return digest.hexdigest()
 
-    # Compute TF–IDF representation
-    tfidf_vectorizer = TfidfVectorizer()
-    tfidf_matrix = tfidf_vectorizer.fit_transform(resume_texts)
-    
-    logger.info("Computed BM25 and TF–IDF indices.")
-    return bm25, tfidf_vectorizer, tfidf_matrix
-
-def load_precomputed_indices(logger):
-    if os.path.exists(PRECOMPUTED_FILE):
-        with open(PRECOMPUTED_FILE, 'rb') as f:
-            data = pickle.load(f)
-        logger.info("Loaded precomputed indices from disk.")
-        return data
+def sparse_query_dot(indptr, indices, data, query_weights: dict, n_cols: int) -> np.ndarray:
+    """
+    Multiply a sparse query vector (term_id -> weight) by a term-major CSR matrix.
+    Only the rows (postings) of the query terms are read; the per-document sums are
+    accumulated in a single bincount.
+    """
+    if not query_weights:
+        return np.zeros(n_cols)
+    term_ids = np.fromiter(query_weights.keys(), dtype=np.int64, count=len(query_weights))
+    weights = np.fromiter(query_weights.values(), dtype=np.float64, count=len(query_weights))
+    starts, ends = indptr[term_ids], indptr[term_ids + 1]
+    rows = [slice(start, end) for start, end in zip(starts, ends)]
+    cols = np.concatenate([indices[row] for row in rows])
+    vals = np.concatenate([data[row] * weight for row, weight in zip(rows, weights)])
+    return np.bincount(cols, weights=vals, minlength=n_cols)
+
+def sparse_queries_dot(indptr, indices, data, query_weights_list: list, n_cols: int) -> np.ndarray:
+    """
+    Batched sparse_query_dot: one sparse matrix-matrix product of several queries (one
+    {term id: weight} dict each) with the CSR term–document matrix (indptr, indices, data).
+    All postings are gathered at once and accumulated with a single bincount over
+    (query, document) cells. Returns an array of shape (len(query_weights_list), n_cols).
+    """
+    n_queries = len(query_weights_list)
+    query_rows = np.fromiter((row for row, weights in enumerate(query_weights_list) for _ in weights),
+                             dtype=np.int64)
+    if not len(query_rows):
+        return np.zeros((n_queries, n_cols))
+    term_ids = np.fromiter((term_id for weights in query_weights_list for term_id in weights), dtype=np.int64)
+    term_weights = np.fromiter((weight for weights in query_weights_list for weight in weights.values()),
+                               dtype=np.float64)
+    starts, ends = indptr[term_ids], indptr[term_ids + 1]
+    lengths = ends - starts
+    # Positions of every selected posting in indices/data, without a Python loop per term
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    positions = np.arange(lengths.sum()) + offsets
+    cells = np.repeat(query_rows, lengths) * n_cols + indices[positions]
+    vals = data[positions] * np.repeat(term_weights, lengths)
+    return np.bincount(cells, weights=vals, minlength=n_queries * n_cols).reshape(n_queries, n_cols)
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Indices of the top_k highest scores, best first.
+    Uses argpartition so only the selected candidates are sorted.
+    """
+    top_k = min(top_k, len(scores))
+    if top_k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if top_k < len(scores):
+        candidates = np.argpartition(scores, -top_k)[-top_k:]
     else:
-        logger.info("No precomputed indices file found.")
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(scores[candidates])[::-1]]
+
+
+class TermIndex:
+    """
+    Appendable term–document count matrix for one analyzer.
+    Stored as CSR with one row per term, so each row is that term's postings list
+    (document positions and term counts). Document frequencies are the row lengths.
+    """
+
+    def __init__(self, analyzer):
+        self.analyzer = analyzer
+        self.vocabulary = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)   # document positions
+        self.data = np.zeros(0, dtype=np.int32)      # term counts
+        self.doc_lengths = np.zeros(0, dtype=np.int64)
+        self._weights = {}  # cached scoring weights, cleared whenever documents are added
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_lengths)
+
+    @property
+    def doc_freqs(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def add_documents(self, texts):
+        """
+        Tokenize new documents and append them after the existing ones.
+        Existing postings are kept; new postings are merged onto the end of each term's row.
+        """
+        first_doc = self.n_docs
+        terms, docs, counts, lengths = [], [], [], []
+        for offset, text in enumerate(texts):
+            tokens = self.analyzer(text)
+            lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                terms.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                docs.append(first_doc + offset)
+                counts.append(count)
+
+        terms = np.asarray(terms, dtype=np.int64)
+        order = np.argsort(terms, kind='stable')  # docs are already ascending within a term
+        terms = terms[order]
+        docs = np.asarray(docs, dtype=np.int32)[order]
+        counts = np.asarray(counts, dtype=np.int32)[order]
+
+        n_terms = len(self.vocabulary)
+        old_rows = len(self.indptr) - 1
+        old_counts = np.zeros(n_terms, dtype=np.int64)
+        old_counts[:old_rows] = np.diff(self.indptr)
+        new_counts = np.bincount(terms, minlength=n_terms)
+
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(old_counts + new_counts, out=indptr[1:])
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        data = np.empty(indptr[-1], dtype=np.int32)
+
+        # Existing postings keep their offset within the (now longer) row
+        rows = np.repeat(np.arange(old_rows), old_counts[:old_rows])
+        positions = indptr[rows] + (np.arange(len(self.indices)) - self.indptr[rows])
+        indices[positions] = self.indices
+        data[positions] = self.data
+
+        # New postings go after the existing ones in each row
+        new_starts = np.zeros(n_terms, dtype=np.int64)
+        np.cumsum(new_counts[:-1], out=new_starts[1:])
+        positions = indptr[terms] + old_counts[terms] + (np.arange(len(terms)) - new_starts[terms])
+        indices[positions] = docs
+        data[positions] = counts
+
+        self.indptr, self.indices, self.data = indptr, indices, data
+        self.doc_lengths = np.concatenate([self.doc_lengths, np.asarray(lengths, dtype=np.int64)])
+        self._weights = {}
+
+    def remove_documents(self, keep: np.ndarray):
+        """
+        Drop the documents whose entry in the boolean mask keep is False. The remaining
+        documents are renumbered in order, and terms no longer used by any document are
+        dropped from the vocabulary, as they would be in a rebuild.
+        """
+        new_positions = np.cumsum(keep) - 1
+        kept_postings = keep[self.indices]
+        rows = np.repeat(np.arange(len(self.indptr) - 1), self.doc_freqs)[kept_postings]
+        counts = np.bincount(rows, minlength=len(self.indptr) - 1)
+        used = counts > 0
+        term_ids = np.cumsum(used) - 1
+        self.vocabulary = {term: int(term_ids[term_id]) for term, term_id in self.vocabulary.items() if used[term_id]}
+        self.indptr = np.zeros(int(used.sum()) + 1, dtype=np.int64)
+        np.cumsum(counts[used], out=self.indptr[1:])
+        self.indices = new_positions[self.indices[kept_postings]].astype(np.int32)
+        self.data = np.asarray(self.data[kept_postings], dtype=np.int32)
+        self.doc_lengths = np.asarray(self.doc_lengths[keep], dtype=np.int64)
+        self._weights = {}
+
+    def term_weights(self, tokens) -> dict:
+        """
+        Count the query tokens that are in the vocabulary, keyed by term id.
+        """
+        counts = {}
+        for token in tokens:
+            term_id = self.vocabulary.get(token)
+            if term_id is not None:
+                counts[term_id] = counts.get(term_id, 0) + 1
+        return counts
+
+    def bm25_weights(self, k1: float, b: float, epsilon: float):
+        """
+        Precompute BM25Okapi IDF and the per-posting weights
+        tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)) * idf, aligned with self.indices.
+        """
+        key = ("bm25", k1, b, epsilon)
+        if key not in self._weights:
+            doc_freqs = self.doc_freqs
+            idf = np.log(self.n_docs - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+            # Like BM25Okapi, replace negative IDFs by a fraction of the average IDF
+            if len(idf):
+                idf[idf < 0] = epsilon * idf.mean()
+            # A corpus whose documents are all empty after analysis has no postings to weight
+            avgdl = (self.doc_lengths.sum() / self.n_docs if self.n_docs else 0) or 1.0
+            length_norm = k1 * (1 - b + b * self.doc_lengths / avgdl)
+            tf = self.data.astype(np.float64)
+            rows = np.repeat(np.arange(len(idf)), doc_freqs)
+            weights = idf[rows] * (tf * (k1 + 1) / (tf + length_norm[self.indices]))
+            self._weights[key] = (idf, weights)
+        return self._weights[key]
+
+    def tfidf_weights(self):
+        """
+        Precompute smoothed IDF and the per-posting weights tf * idf / ||doc||,
+        i.e. the L2-normalised TF–IDF matrix of TfidfVectorizer, aligned with self.indices.
+        """
+        key = ("tfidf",)
+        if key not in self._weights:
+            idf = np.log((1 + self.n_docs) / (1 + self.doc_freqs)) + 1
+            rows = np.repeat(np.arange(len(idf)), self.doc_freqs)
+            weights = self.data * idf[rows]
+            doc_norms = np.sqrt(np.bincount(self.indices, weights=weights ** 2, minlength=self.n_docs))
+            doc_norms[doc_norms == 0] = 1
+            weights /= doc_norms[self.indices]
+            self._weights[key] = (idf, weights)
+        return self._weights[key]
+
+
+class LexicalIndex:
+    """
+    Incrementally maintained BM25 and TF–IDF index over the resume corpus.
+    Documents are kept in insertion order; doc_ids[i] is the CandidateID of position i.
+    Each resume is analyzed once, when it is added; BM25, TF–IDF and the query share the
+    same analyzer and vocabulary. Scores match a full rebuild with BM25Okapi and
+    TfidfVectorizer fed the same analyzed tokens.
+    """
+
+    def __init__(self, analyzer: Analyzer = None):
+        self.analyzer = analyzer or Analyzer()
+        self.doc_ids = []
+        self.fingerprint = corpus_fingerprint([])
+        self.terms = TermIndex(self.analyzer)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+    def add_documents(self, candidate_ids: list, resume_texts: list):
+        """
+        Append new resumes to the index. Only the new documents are tokenized.
+        """
+        if len(candidate_ids) != len(resume_texts):
+            raise ValueError(f"Got {len(resume_texts)} resume texts for {len(candidate_ids)} candidates.")
+        if not candidate_ids:
+            return
+        self.terms.add_documents(resume_texts)
+        self.doc_ids.extend(candidate_ids)
+        self.fingerprint = corpus_fingerprint(self.doc_ids)
+
+    def remove_documents(self, candidate_ids):
+        """
+        Remove resumes from the index without re-tokenizing the others. Unknown IDs are ignored.
+        """
+        removed = set(candidate_ids)
+        keep = np.fromiter((candidate_id not in removed for candidate_id in self.doc_ids), dtype=bool,
+                           count=len(self.doc_ids))
+        if keep.all():
+            return
+        self.terms.remove_documents(keep)
+        self.doc_ids = [candidate_id for candidate_id in self.doc_ids if candidate_id not in removed]
+        self.fingerprint = corpus_fingerprint(self.doc_ids)
+
+    def copy(self):
+        """
+        A copy that can be updated while searches keep using this index. The postings arrays
+        are shared; adding or removing documents replaces them instead of writing to them.
+        """
+        clone = LexicalIndex(self.analyzer)
+        clone.doc_ids = list(self.doc_ids)
+        clone.fingerprint = self.fingerprint
+        terms, source = clone.terms, self.terms
+        terms.vocabulary = dict(source.vocabulary)
+        terms.indptr, terms.indices, terms.data = source.indptr, source.indices, source.data
+        terms.doc_lengths = source.doc_lengths
+        terms._weights = dict(source._weights)
+        return clone
+
+    def bm25_scores(self, query: str, k1: float = BM25_K1, b: float = BM25_B, epsilon: float = BM25_EPSILON) -> np.ndarray:
+        """
+        BM25Okapi scores of every document for the query: one sparse product of the query
+        term counts with the precomputed BM25 weight matrix.
+        """
+        terms = self.terms
+        _, weights = terms.bm25_weights(k1, b, epsilon)
+        query_weights = terms.term_weights(self.analyzer(query))
+        return sparse_query_dot(terms.indptr, terms.indices, weights, query_weights, terms.n_docs)
+
+    def query_term_idf(self, query: str, epsilon: float = BM25_EPSILON) -> dict:
+        """
+        BM25 IDF of each distinct analyzed query term, keyed by term. Terms not in the
+        corpus get the highest IDF, as they would if they occurred in a single document.
+        """
+        terms = self.terms
+        if terms.n_docs == 0:
+            return {token: 1.0 for token in self.analyzer(query)}
+        idf, _ = terms.bm25_weights(BM25_K1, BM25_B, epsilon)
+        unseen_idf = float(np.log(terms.n_docs - 0.5) - np.log(1.5)) if terms.n_docs > 2 else 1.0
+        weights = {}
+        for token in self.analyzer(query):
+            term_id = terms.vocabulary.get(token)
+            weights[token] = float(idf[term_id]) if term_id is not None else unseen_idf
+        return weights
+
+    def _tfidf_query_weights(self, query: str, idf: np.ndarray) -> dict:
+        """
+        The query's L2-normalised TF–IDF vector as {term id: weight}.
+        """
+        query_weights = {term_id: count * idf[term_id]
+                         for term_id, count in self.terms.term_weights(self.analyzer(query)).items()}
+        if not query_weights:
+            return {}
+        query_norm = np.sqrt(sum(weight ** 2 for weight in query_weights.values()))
+        return {term_id: weight / query_norm for term_id, weight in query_weights.items()}
+
+    def tfidf_scores(self, query: str) -> np.ndarray:
+        """
+        Cosine similarity between the query and every document using smoothed-IDF,
+        L2-normalised TF–IDF vectors (TfidfVectorizer defaults).
+        """
+        terms = self.terms
+        idf, weights = terms.tfidf_weights()
+        query_weights = self._tfidf_query_weights(query, idf)
+        if not query_weights:
+            return np.zeros(terms.n_docs)
+        return sparse_query_dot(terms.indptr, terms.indices, weights, query_weights, terms.n_docs)
+
+    def bm25_score_matrix(self, queries: list, k1: float = BM25_K1, b: float = BM25_B,
+                          epsilon: float = BM25_EPSILON) -> np.ndarray:
+        """
+        bm25_scores for several queries at once, as one (len(queries), n_docs) array.
+        """
+        terms = self.terms
+        _, weights = terms.bm25_weights(k1, b, epsilon)
+        query_weights = [terms.term_weights(self.analyzer(query)) for query in queries]
+        return sparse_queries_dot(terms.indptr, terms.indices, weights, query_weights, terms.n_docs)
+
+    def tfidf_score_matrix(self, queries: list) -> np.ndarray:
+        """
+        tfidf_scores for several queries at once, as one (len(queries), n_docs) array.
+        """
+        terms = self.terms
+        idf, weights = terms.tfidf_weights()
+        query_weights = [self._tfidf_query_weights(query, idf) for query in queries]
+        return sparse_queries_dot(terms.indptr, terms.indices, weights, query_weights, terms.n_docs)
+
+
+def compute_indices(candidate_ids, resume_texts, logger, analyzer: Analyzer = None):
+    """
+    Build the lexical index from scratch for the given resumes.
+    """
+    lexical_index = LexicalIndex(analyzer)
+    lexical_index.add_documents(list(candidate_ids), list(resume_texts))
+    logger.info("Computed BM25 and TF–IDF indices.")
+    return lexical_index
+
+def _read_pointer(path: str) -> str:
+    """
+    Name of the published version subdirectory of path, or None.
+    """
+    try:
+        with open(os.path.join(path, PRECOMPUTED_POINTER), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def load_precomputed_indices(logger, path: str = PRECOMPUTED_DIR):
+    """
+    Load the lexical index saved by save_precomputed_indices.
+    The published version is resolved once through the pointer file and every file is read
+    from that version's directory, so a concurrent save never mixes two versions.
+    The large arrays are memory-mapped read-only, so loading is near-instant and several
+    processes opening the same directory share the pages through the OS cache.
+    Returns None if nothing usable is stored.
+    """
+    for attempt in range(2):
+        version = _read_pointer(path)
+        # Directories written before versioned saves hold the files directly
+        version_path = os.path.join(path, version) if version else path
+        try:
+            return _load_version(logger, version_path)
+        except FileNotFoundError:
+            if attempt:
+                raise
+            # The version was cleaned up while it was being opened; resolve the pointer again
+            logger.info(f"Precomputed index version {version} disappeared while loading; retrying.")
+
+def _load_version(logger, path: str):
+    manifest_path = os.path.join(path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        if os.path.exists(LEGACY_PRECOMPUTED_FILE):
+            logger.info(f"Ignoring legacy {LEGACY_PRECOMPUTED_FILE}; indices will be rebuilt.")
+        else:
+            logger.info("No precomputed indices found.")
+        return None
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != PRECOMPUTED_FORMAT_VERSION:
+        logger.info(f"Precomputed indices use format {manifest.get('format_version')}; "
+                    f"expected {PRECOMPUTED_FORMAT_VERSION}. Ignoring them.")
+        return None
+    analyzer = Analyzer(**manifest["analyzer"])
+    # The settings alone do not capture changes to the tokenization rules (ANALYZER_VERSION)
+    if manifest.get("analyzer_signature") != analyzer.signature:
+        logger.info("Precomputed indices were built by an older analyzer. Ignoring them.")
         return None
 
-def save_precomputed_indices(data, logger):
-    with open(PRECOMPUTED_FILE, 'wb') as f:
-        pickle.dump(data, f)
-    logger.info("Saved precomputed indices to disk.")
+    def load_array(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
 
-def get_precomputed_indices(resume_texts, logger):
+    lexical_index = LexicalIndex(analyzer)
+    with open(os.path.join(path, "doc_ids.json"), 'r', encoding='utf-8') as f:
+        lexical_index.doc_ids = json.load(f)
+    with open(os.path.join(path, "vocabulary.json"), 'r', encoding='utf-8') as f:
+        lexical_index.terms.vocabulary = {term: term_id for term_id, term in enumerate(json.load(f))}
+    lexical_index.fingerprint = manifest["fingerprint"]
+
+    terms = lexical_index.terms
+    terms.indptr = load_array("indptr")
+    terms.indices = load_array("indices")
+    terms.data = load_array("data")
+    terms.doc_lengths = load_array("doc_lengths")
+    bm25 = manifest["bm25"]
+    terms._weights = {
+        ("bm25", bm25["k1"], bm25["b"], bm25["epsilon"]): (load_array("bm25_idf"), load_array("bm25_weights")),
+        ("tfidf",): (load_array("tfidf_idf"), load_array("tfidf_weights")),
+    }
+    logger.info(f"Loaded precomputed indices from disk ({len(lexical_index)} documents).")
+    return lexical_index
+
+def save_precomputed_indices(lexical_index, logger, path: str = PRECOMPUTED_DIR):
+    """
+    Save the lexical index as a new version subdirectory of path:
+      manifest.json          format version, corpus fingerprint, analyzer settings and
+                             signature, BM25 settings
+      vocabulary.json        terms in term-id order
+      doc_ids.json           CandidateIDs in document order
+      indptr/indices/data    term-major CSR postings (document positions, term counts)
+      doc_lengths            analyzed length of every document
+      bm25_idf, bm25_weights / tfidf_idf, tfidf_weights
+                             precomputed IDF and per-posting scoring weights
+    All arrays are raw .npy files. The version is published by atomically replacing the
+    pointer file (PRECOMPUTED_POINTER) that names it, so readers and concurrent savers never
+    see a half-written or missing index. The previously published version is kept for
+    readers still opening it; older ones are removed.
     """
-    Returns the precomputed BM25, TF–IDF vectorizer, and TF–IDF matrix.
-    Recompute only if:
-      1) There is no existing precomputed file, or
-      2) The number of resumes has changed.
+    terms = lexical_index.terms
+    bm25_idf, bm25_weights = terms.bm25_weights(BM25_K1, BM25_B, BM25_EPSILON)
+    tfidf_idf, tfidf_weights = terms.tfidf_weights()
+    arrays = {
+        "indptr": terms.indptr,
+        "indices": terms.indices,
+        "data": terms.data,
+        "doc_lengths": terms.doc_lengths,
+        "bm25_idf": bm25_idf,
+        "bm25_weights": bm25_weights,
+        "tfidf_idf": tfidf_idf,
+        "tfidf_weights": tfidf_weights,
+    }
+    manifest = {
+        "format_version": PRECOMPUTED_FORMAT_VERSION,
+        "fingerprint": lexical_index.fingerprint,
+        "n_docs": len(lexical_index),
+        "n_terms": len(terms.vocabulary),
+        "nnz": int(len(terms.indices)),
+        "analyzer": lexical_index.analyzer.settings,
+        "analyzer_signature": lexical_index.analyzer.signature,
+        "bm25": {"k1": BM25_K1, "b": BM25_B, "epsilon": BM25_EPSILON},
+    }
+
+    version = f"v{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    version_path = os.path.join(path, version)
+    os.makedirs(version_path)
+    for name, array in arrays.items():
+        np.save(os.path.join(version_path, f"{name}.npy"), np.ascontiguousarray(array))
+    vocabulary = sorted(terms.vocabulary, key=terms.vocabulary.get)
+    with open(os.path.join(version_path, "vocabulary.json"), 'w', encoding='utf-8') as f:
+        json.dump(vocabulary, f)
+    with open(os.path.join(version_path, "doc_ids.json"), 'w', encoding='utf-8') as f:
+        json.dump(lexical_index.doc_ids, f)
+    with open(os.path.join(version_path, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    previous = _read_pointer(path)
+    pointer_tmp = os.path.join(path, f"{PRECOMPUTED_POINTER}.{version}")
+    with open(pointer_tmp, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(path, PRECOMPUTED_POINTER))
+    _remove_stale_versions(path, keep={PRECOMPUTED_POINTER, version, previous})
+    logger.info(f"Saved precomputed indices to disk ({version}).")
+
+def _remove_stale_versions(path: str, keep: set):
     """
-    data = load_precomputed_indices(logger)
-    current_doc_count = len(resume_texts)
-    if data and data.get("doc_count") == current_doc_count:
-        return data["bm25"], data["tfidf_vectorizer"], data["tfidf_matrix"]
+    Delete version directories and files in path other than keep that have not been
+    written for STALE_VERSION_SECONDS (including files of the pre-versioning layout).
+    """
+    cutoff = time.time() - STALE_VERSION_SECONDS
+    for name in os.listdir(path):
+        entry = os.path.join(path, name)
+        try:
+            if name in keep or os.path.getmtime(entry) > cutoff:
+                continue
+            if os.path.isdir(entry):
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                os.remove(entry)
+        except FileNotFoundError:
+            pass  # removed by a concurrent save
+
+def get_precomputed_indices(db_manager, logger, analyzer: Analyzer = None, save: bool = True):
+    """
+    Returns the LexicalIndex for every resume in db_manager.
+    The stored index is keyed by the corpus fingerprint and the analyzer settings. The
+    fingerprint is computed from the CandidateIDs alone, and resume texts are read from the
+    database only for documents that have to be tokenized:
+      1) If both match, the stored index (with its cached token counts) is used as is.
+      2) If resumes were only added, just the new ones are fetched, tokenized and appended.
+      3) If resumes were removed or replaced, the analyzer changed, or nothing is stored,
+         the index is rebuilt.
+    An appended or rebuilt index is saved unless save is False (callers that do not hold
+    the ingest lock).
+    """
+    analyzer = analyzer or Analyzer()
+    candidate_ids = db_manager.get_all_candidate_ids()
+    fingerprint = corpus_fingerprint(candidate_ids)
+    lexical_index = load_precomputed_indices(logger)
+    if lexical_index is not None and lexical_index.analyzer.signature != analyzer.signature:
+        logger.info("Analyzer settings changed; precomputed indices will be rebuilt.")
+        lexical_index = None
+    if lexical_index is not None and lexical_index.fingerprint == fingerprint:
+        return lexical_index
+
+    known = set(lexical_index.doc_ids) if lexical_index is not None else None
+    if known is not None and known.issubset(candidate_ids):
+        new_ids, new_texts = _stored_resumes(db_manager, [cid for cid in candidate_ids if cid not in known], logger)
+        lexical_index.add_documents(new_ids, new_texts)
+        logger.info(f"Appended {len(new_ids)} new resumes to the precomputed indices.")
     else:
         logger.info("Precomputed indices are outdated or not available. Recomputing...")
-        bm25, tfidf_vectorizer, tfidf_matrix = compute_indices(resume_texts, logger)
-        data = {
-            "doc_count": current_doc_count,
-            "bm25": bm25,
-            "tfidf_vectorizer": tfidf_vectorizer,
-            "tfidf_matrix": tfidf_matrix
-        }
-        save_precomputed_indices(data, logger)
-        return bm25, tfidf_vectorizer, tfidf_matrix
-
-def bm25_filter(query, bm25, total_docs, logger, top_percentage=0.1):
+        lexical_index = compute_indices(*_stored_resumes(db_manager, candidate_ids, logger), logger, analyzer)
+    if save:
+        save_precomputed_indices(lexical_index, logger)
+    return lexical_index
+
+def _stored_resumes(db_manager, candidate_ids, logger):
+    """
+    Read the resume texts of candidate_ids, returning (CandidateIDs, ResumeTexts) aligned by
+    position. Candidates no longer in the database (e.g. deleted meanwhile) are logged and skipped.
+    """
+    pairs = db_manager.get_resume_text_pairs(candidate_ids)
+    if len(pairs) < len(candidate_ids):
+        found = {candidate_id for candidate_id, _ in pairs}
+        missing = [candidate_id for candidate_id in candidate_ids if candidate_id not in found]
+        logger.warning(f"Skipping {len(missing)} candidates missing from the database: {missing[:10]}")
+    return [candidate_id for candidate_id, _ in pairs], [text for _, text in pairs]
+
+def update_precomputed_indices(lexical_index, db_manager, logger, added_ids=(), removed_ids=(), save: bool = True):
+    """
+    Apply newly ingested and removed resumes to a copy of lexical_index, save and return it.
+    Only the added resumes' texts are read from the database and tokenized; lexical_index
+    itself is left untouched, so searches can keep using it until the copy is swapped in.
+    The copy is saved unless save is False.
+    """
+    added_ids, removed_ids = list(added_ids), list(removed_ids)
+    lexical_index = lexical_index.copy()
+    lexical_index.remove_documents(removed_ids)
+    added_ids, added_texts = _stored_resumes(db_manager, added_ids, logger)
+    lexical_index.add_documents(added_ids, added_texts)
+    logger.info(f"Updated precomputed indices: {len(added_ids)} added, {len(removed_ids)} removed.")
+    if save:
+        save_precomputed_indices(lexical_index, logger)
+    return lexical_index
+
+def bm25_filter(query, lexical_index, total_docs, logger, top_percentage=0.1):
     """
     Compute BM25 scores for the query and return indices of the top percentage of documents.
+    Indices are positions in lexical_index.doc_ids.
     """
-    tokenized_query = query.split()
-    scores = bm25.get_scores(tokenized_query)
+    scores = lexical_index.bm25_scores(query)
     top_k = max(1, int(total_docs * top_percentage))
-    top_indices = np.argsort(scores)[::-1][:top_k]
+    top_indices = top_k_indices(scores, top_k)
     logger.info(f"BM25 filtering selected indices: {top_indices.tolist()}")
     return set(top_indices.tolist())
 
-def tfidf_filter(query, tfidf_vectorizer, tfidf_matrix, total_docs, logger, top_percentage=0.1):
+def tfidf_filter(query, lexical_index, total_docs, logger, top_percentage=0.1):
     """
     Compute cosine similarity using TF–IDF and return indices of the top percentage of documents.
+    Indices are positions in lexical_index.doc_ids.
     """
-    query_vector = tfidf_vectorizer.transform([query])
-    cos_sim = cosine_similarity(query_vector, tfidf_matrix).flatten()
+    cos_sim = lexical_index.tfidf_scores(query)
     top_k = max(1, int(total_docs * top_percentage))
-    top_indices = np.argsort(cos_sim)[::-1][:top_k]
+    top_indices = top_k_indices(cos_sim, top_k)
     logger.info(f"TF–IDF filtering selected indices: {top_indices.tolist()}")
     return set(top_indices.tolist())
+
+def ranked_documents(scores: np.ndarray, top_k: int, min_score: float = 0.0) -> list:
+    """
+    (position, score) pairs of the top_k documents scoring above min_score, best first.
+    With the default min_score documents sharing no term with the query are dropped.
+    """
+    top_indices = top_k_indices(scores, top_k)
+    top_indices = top_indices[scores[top_indices] > min_score]
+    return list(zip(top_indices.tolist(), scores[top_indices].tolist()))
+
+def bm25_ranked(query, lexical_index, top_k, logger, min_score=0.0):
+    """
+    BM25-scored (position, score) pairs of the best top_k documents, for hybrid fusion.
+    """
+    ranked = ranked_documents(lexical_index.bm25_scores(query), top_k, min_score)
+    logger.info(f"BM25 ranked {len(ranked)} documents.")
+    return ranked
+
+def tfidf_ranked(query, lexical_index, top_k, logger, min_score=0.0):
+    """
+    TF–IDF cosine-scored (position, score) pairs of the best top_k documents, for hybrid fusion.
+    """
+    ranked = ranked_documents(lexical_index.tfidf_scores(query), top_k, min_score)
+    logger.info(f"TF–IDF ranked {len(ranked)} documents.")
+    return ranked
+
+def _ranked_batch(score_matrix, n_docs, queries, top_k, min_score, max_cells):
+    # Score at most max_cells (query, document) cells at a time to bound memory on large corpora
+    chunk = max(1, max_cells // max(1, n_docs))
+    ranked = []
+    for start in range(0, len(queries), chunk):
+        for scores in score_matrix(queries[start:start + chunk]):
+            ranked.append(ranked_documents(scores, top_k, min_score))
+    return ranked
+
+def bm25_ranked_batch(queries, lexical_index, top_k, logger, min_score=0.0, max_cells=1 << 24):
+    """
+    bm25_ranked for several queries, scored with batched sparse matrix products.
+    """
+    ranked = _ranked_batch(lexical_index.bm25_score_matrix, len(lexical_index), queries, top_k, min_score, max_cells)
+    logger.info(f"BM25 ranked documents for {len(queries)} queries.")
+    return ranked
+
+def tfidf_ranked_batch(queries, lexical_index, top_k, logger, min_score=0.0, max_cells=1 << 24):
+    """
+    tfidf_ranked for several queries, scored with batched sparse matrix products.
+    """
+    ranked = _ranked_batch(lexical_index.tfidf_score_matrix, len(lexical_index), queries, top_k, min_score, max_cells)
+    logger.info(f"TF–IDF ranked documents for {len(queries)} queries.")
+    return ranked